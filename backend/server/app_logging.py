@@ -0,0 +1,228 @@
+"""
+Logging estruturado da API.
+
+- Os registros vão para uma fila (QueueHandler) e uma única thread
+  (QueueListener) os formata e escreve no stdout: quem loga não espera pela
+  escrita, e linhas de threads diferentes não se misturam.
+- Formato JSON por padrão (LOG_FORMAT=text para desenvolvimento), com os
+  campos passados em `extra` e o request_id da requisição atual.
+- O request_id vem do cabeçalho X-Request-ID (ou é gerado) e volta na resposta.
+- Mensagens frequentes podem ser amostradas: com `extra={"sample_key": ...}`,
+  cada chave é emitida no máximo uma vez a cada LOG_SAMPLE_SECONDS e o
+  registro seguinte informa quantas foram suprimidas.
+
+Uso:
+    logger = get_logger(__name__)
+    logger.warning("Modelo indisponível", extra={"sample_key": "model_missing"})
+"""
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# Configurações
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" ou "text"
+LOG_SAMPLE_SECONDS = float(os.getenv("LOG_SAMPLE_SECONDS", "60"))
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Atributos padrão de LogRecord; o que não estiver aqui veio de `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_INTERNAL_ATTRS = {"sample_key", "request_id", "suppressed"}
+
+_listener = None
+_listener_pid = None
+_setup_lock = threading.Lock()
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Anota o registro com o request_id da requisição atual (lido no contexto de quem loga).
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Limita registros com `sample_key` a um por chave a cada `interval` segundos.
+
+    Chaves cuja janela já terminou são descartadas a cada `interval` segundos, junto
+    com a contagem de suprimidas: a memória fica limitada às chaves ativas na janela.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _prune(self, now: float):
+        expired = [key for key, last in self._last.items() if now - last >= self.interval]
+        for key in expired:
+            del self._last[key]
+            self._suppressed.pop(key, None)
+        self._pruned_at = now
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            if now - self._pruned_at >= self.interval:
+                self._prune(now)
+            last = self._last.get(key)
+            if last is not None and now - last < self.interval:
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                return False
+            self._last[key] = now
+            suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if getattr(record, "suppressed", None):
+            entry["suppressed"] = record.suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in _INTERNAL_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        message = super().format(record)
+        if getattr(record, "suppressed", None):
+            message += f" (+{record.suppressed} suprimidas)"
+        return message
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que mantém mensagem e traceback em campos separados.
+
+    O QueueHandler padrão junta os dois em um texto só; aqui só os argumentos
+    são resolvidos (no contexto de quem loga) e a formatação fica na thread do listener.
+    """
+
+    _exception_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(force: bool = False):
+    """
+    Configura o logger raiz com fila e listener (uma vez por processo, inclusive após fork).
+    """
+    global _listener, _listener_pid
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid() and not force:
+            return
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = StructuredQueueHandler(log_queue)
+        queue_handler.addFilter(RequestIdFilter())
+        queue_handler.addFilter(SamplingFilter(LOG_SAMPLE_SECONDS))
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def shutdown_logging():
+    """
+    Esvazia a fila e para o listener (shutdown da aplicação).
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(name)
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que define o request_id da requisição e o devolve no cabeçalho X-Request-ID.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = dict(scope["headers"]).get(REQUEST_ID_HEADER, b"").decode("latin-1")[:64]
+        request_id = request_id or uuid.uuid4().hex[:16]
+        token = request_id_var.set(request_id)
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
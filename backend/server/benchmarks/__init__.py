@@ -0,0 +1 @@
+# Este arquivo torna o diretório um pacote Python
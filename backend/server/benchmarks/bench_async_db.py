@@ -0,0 +1,191 @@
+"""
+Teste de carga dos endpoints de leitura: sessão síncrona (get_db) × assíncrona (get_async_db).
+
+Os endpoints async dos routers (lista de medidores, medidor e condomínio por
+id) são comparados com cópias síncronas registradas só aqui, com a mesma
+consulta e o mesmo response_model do código anterior à migração. As
+requisições vão direto para o app ASGI (httpx.ASGITransport), então o que se
+mede é o caminho do FastAPI: o endpoint síncrono ocupa uma thread do
+threadpool do anyio (40 por padrão) durante a consulta; o assíncrono espera o
+banco no event loop. Com mais requisições simultâneas que threads, o caminho
+síncrono pode esgotar o pool de conexões: as threads ficam presas esperando
+conexão enquanto o fechamento das sessões (que devolveria as conexões) espera
+uma thread livre, até o pool_timeout; essas requisições contam como erros.
+
+O banco é um SQLite temporário, populado com --meters medidores; com
+--database-url (ex.: um PostgreSQL de teste, que será recriado) a latência de
+rede entra na medição.
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_async_db --concurrency 1 32 128 256 --requests 2000 --json async_db_report.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+DEFAULT_URL = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_async_db_'), 'medicoes.db')}"
+
+
+def seed(meters: int) -> dict:
+    """
+    Recria as tabelas e grava condomínio, unidades e medidores. Retorna ids e o token do admin.
+    """
+    from auth import create_access_token, get_password_hash
+    from dbmodels.condominiums import Condominium
+    from dbmodels.database import Base, SessionLocal, engine
+    from dbmodels.measurement_types import MeasurementType
+    from dbmodels.meters import Meter
+    from dbmodels.units import Unit
+    from dbmodels.users import User, UserRole
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        db.add(User(username="admin", email="admin@bench.com", name="Admin", password_hash=get_password_hash("x"),
+                    role=UserRole.ADMIN, active=True))
+        condominium = Condominium(name="Bench", address="Rua A", cnpj="00", manager="M", phone="0", email="c@bench.com")
+        measurement_type = MeasurementType(name="Água", unit="m³")
+        db.add_all([condominium, measurement_type])
+        db.flush()
+        units = [Unit(condominium_id=condominium.id, number=str(i), owner="P") for i in range(max(1, meters // 4))]
+        db.add_all(units)
+        db.flush()
+        db.add_all([
+            Meter(unit_id=units[i % len(units)].id, measurement_type_id=measurement_type.id, serial_number=f"S{i}")
+            for i in range(meters)
+        ])
+        db.commit()
+        return {"condominium_id": condominium.id, "token": create_access_token({"sub": "admin"})}
+    finally:
+        db.close()
+
+
+def add_sync_routes(app):
+    """
+    Versões síncronas (como antes da migração) dos endpoints comparados.
+    """
+    from typing import List
+
+    from fastapi import Depends, HTTPException
+    from sqlalchemy.orm import Session
+
+    from dbmodels.condominiums import Condominium, CondominiumResponse
+    from dbmodels.database import get_db
+    from dbmodels.meters import Meter
+    from dependencies import get_any_authenticated_user
+    from routers.meters import MeterResponse
+
+    @app.get("/bench/sync/meters/", response_model=List[MeterResponse])
+    def list_meters(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        return db.query(Meter).offset(skip).limit(limit).all()
+
+    @app.get("/bench/sync/meters/{meter_id}", response_model=MeterResponse)
+    def get_meter(meter_id: int, db: Session = Depends(get_db)):
+        meter = db.query(Meter).filter(Meter.id == meter_id).first()
+        if meter is None:
+            raise HTTPException(status_code=404, detail="Medidor não encontrado")
+        return meter
+
+    @app.get("/bench/sync/condominiums/{condominium_id}", response_model=CondominiumResponse)
+    def get_condominium(condominium_id: int, db: Session = Depends(get_db), current_user=Depends(get_any_authenticated_user)):
+        condominium = db.query(Condominium).filter(Condominium.id == condominium_id).first()
+        if condominium is None:
+            raise HTTPException(status_code=404, detail="Condomínio não encontrado")
+        return condominium
+
+
+async def load(client, paths: list, requests: int, concurrency: int) -> dict:
+    from benchmarks.bench_detector import latency_stats
+
+    timings = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.get(paths[i % len(paths)])
+                errors += response.status_code != 200
+            except Exception:  # Ex.: TimeoutError do pool de conexões, propagado pelo ASGITransport
+                errors += 1
+            timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    report = latency_stats(timings)
+    report.update(requests_per_second=len(timings) / elapsed, errors=errors)
+    return report
+
+
+async def run(args, ids: dict) -> dict:
+    import httpx
+
+    import main
+    from dbmodels.database import dispose_async_engine
+
+    add_sync_routes(main.app)
+    endpoints = {
+        "meters_list": "/api/meters/meters/?limit=100",
+        "meter": "/api/meters/meters/{meter_id}",
+        "condominium": f"/api/condominiums/{ids['condominium_id']}",
+    }
+    report = {}
+    transport = httpx.ASGITransport(app=main.app)
+    headers = {"Authorization": f"Bearer {ids['token']}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for name, path in endpoints.items():
+            async_paths = [path.format(meter_id=i + 1) for i in range(min(args.meters, 100))]
+            sync_paths = [p.replace("/api/meters/meters/", "/bench/sync/meters/").replace("/api/condominiums/", "/bench/sync/condominiums/")
+                          for p in async_paths]
+            await load(client, async_paths, 20, 1)  # aquecimento
+            await load(client, sync_paths, 20, 1)
+            for concurrency in args.concurrency:
+                section = report.setdefault(f"{name}_c{concurrency}", {})
+                section["sync"] = await load(client, sync_paths, args.requests, concurrency)
+                section["async"] = await load(client, async_paths, args.requests, concurrency)
+                section["speedup"] = section["async"]["requests_per_second"] / section["sync"]["requests_per_second"]
+                print(
+                    f"   {name:<12} c={concurrency:<4} sync {section['sync']['requests_per_second']:8.1f} req/s  "
+                    f"async {section['async']['requests_per_second']:8.1f} req/s  "
+                    f"p95 {section['sync']['latency_ms_p95']:7.1f} → {section['async']['latency_ms_p95']:7.1f} ms  "
+                    f"erros {section['sync']['errors']} → {section['async']['errors']}"
+                )
+    await dispose_async_engine()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DEFAULT_URL, help="Banco descartável (as tabelas são recriadas)")
+    parser.add_argument("--meters", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32, 128, 256])
+    parser.add_argument("--requests", type=int, default=2000, help="Requisições por endpoint e nível de concorrência")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    # Antes de importar dbmodels: o engine do módulo é criado a partir do DATABASE_URL
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["MODEL_PRELOAD"] = "0"
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # Uma linha de log por requisição
+    ids = seed(args.meters)
+
+    print("\n📊 Endpoints de leitura (sync × async)")
+    report = {"meta": {"database": args.database_url.split("://")[0], "meters": args.meters, "requests": args.requests}}
+    report.update(asyncio.run(run(args, ids)))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
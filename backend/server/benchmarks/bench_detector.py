@@ -0,0 +1,286 @@
+"""
+Benchmark do detector: latência, vazão, memória e acurácia por dígito.
+
+Roda sobre um diretório de fotos rotuladas (ver benchmarks/fixtures.py) em dois níveis:
+
+- direct: utilits.run_yolov8_obb sobre a imagem decodificada como no /detect/;
+- pipeline_full / pipeline_roi: decodificação e detecção (inference.process_batch)
+  sem e com dica de ROI do medidor (ver roi_hints.py);
+- http: o /detect/ completo, via TestClient, em vários níveis de concorrência.
+
+O relatório JSON tem chaves estáveis para ser comparado entre commits
+(--baseline imprime as diferenças). Sem os pesos reais, --stub usa o detector
+substituto de benchmarks/stub_detector.py.
+
+O /detect/ roda com banco e pasta de uploads temporários (o DATABASE_URL do
+ambiente é ignorado) e com o cache de detecções desligado, para que fotos
+repetidas não sejam servidas do cache.
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_detector --stub --json detector_report.json
+    python -m benchmarks.bench_detector --images fotos/ --concurrency 1 4 8 --baseline detector_report.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.bench_ingest import peak_rss_kb
+from benchmarks.fixtures import load_fixtures, write_fixtures
+from validation_set import accuracy
+
+ROI_JITTER = 0.2  # Deslocamento máximo da dica simulada, relativo ao tamanho do visor
+
+
+def reset_peak_rss():
+    """
+    Zera o pico de memória (VmHWM) do processo, quando o kernel permite.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def latency_stats(seconds: list) -> dict:
+    ms = np.asarray(seconds) * 1000
+    return {
+        "latency_ms_p50": float(np.percentile(ms, 50)),
+        "latency_ms_p95": float(np.percentile(ms, 95)),
+        "latency_ms_p99": float(np.percentile(ms, 99)),
+        "latency_ms_mean": float(ms.mean()),
+    }
+
+
+def bench_direct(fixtures: list, repeat: int) -> dict:
+    """
+    utilits.run_yolov8_obb sobre as imagens decodificadas (sem HTTP, banco ou gravação).
+    """
+    from image_io import decode_image
+    from utilits import run_yolov8_obb
+
+    images = []
+    for path, _ in fixtures:
+        with open(path, "rb") as f:
+            images.append(decode_image(f.read())[0])
+    run_yolov8_obb(images[0])  # aquecimento
+
+    reset_peak_rss()
+    timings = []
+    predictions = []
+    for _ in range(repeat):
+        predictions = []
+        for image in images:
+            start = time.perf_counter()
+            result = run_yolov8_obb(image)
+            timings.append(time.perf_counter() - start)
+            predictions.append(result["number_detected"])
+    report = latency_stats(timings)
+    report["throughput_ips"] = len(timings) / sum(timings)
+    report["peak_rss_mb"] = peak_rss_kb() / 1024
+    report.update(accuracy(predictions, [label for _, label in fixtures]))
+    return report
+
+
+def bench_pipeline(fixtures: list, repeat: int) -> tuple:
+    """
+    inference.process_batch por foto, primeiro na imagem inteira e depois com dica de ROI.
+
+    A dica vem da detecção na imagem inteira, deslocada aleatoriamente em até
+    ROI_JITTER do tamanho do visor para simular a foto do mês seguinte, tirada
+    de um ângulo um pouco diferente.
+    """
+    from image_io import image_size
+    from inference import process_batch
+    from utilits import accept_roi
+
+    uploads = []
+    for path, _ in fixtures:
+        with open(path, "rb") as f:
+            uploads.append(f.read())
+    labels = [label for _, label in fixtures]
+    process_batch([(uploads[0], None)])  # aquecimento
+
+    def run(hints: list) -> tuple:
+        reset_peak_rss()
+        timings = []
+        results = []
+        for _ in range(repeat):
+            results = []
+            for contents, hint in zip(uploads, hints):
+                start = time.perf_counter()
+                result = process_batch([(contents, hint)])[0][0]
+                timings.append(time.perf_counter() - start)
+                results.append(result)
+        report = latency_stats(timings)
+        report["throughput_ips"] = len(timings) / sum(timings)
+        report["peak_rss_mb"] = peak_rss_kb() / 1024
+        report.update(accuracy([r["number_detected"] for r in results], labels))
+        return report, results
+
+    full_report, full_results = run([None] * len(uploads))
+
+    rng = np.random.default_rng(0)
+    hints = []
+    for contents, result in zip(uploads, full_results):
+        if not accept_roi(result):
+            hints.append(None)
+            continue
+        width, height = image_size(contents)
+        x1, y1, x2, y2 = result["box"]
+        dx, dy = rng.uniform(-ROI_JITTER, ROI_JITTER, 2) * (x2 - x1, y2 - y1)
+        hints.append(((x1 + dx) / width, (y1 + dy) / height, (x2 + dx) / width, (y2 + dy) / height))
+
+    roi_report, roi_results = run(hints)
+    roi_report["hinted_fraction"] = sum(hint is not None for hint in hints) / len(hints)
+    roi_report["roi_hit_ratio"] = sum(bool(r.get("roi")) for r in roi_results) / len(roi_results)
+    return full_report, roi_report
+
+
+def bench_http(client, fixtures: list, concurrency: int, repeat: int) -> dict:
+    """
+    /detect/ completo (upload, detecção, banco, fila de fotos) com `concurrency` clientes simultâneos.
+    """
+    uploads = []
+    for path, label in fixtures:
+        with open(path, "rb") as f:
+            uploads.append((os.path.basename(path), f.read(), label))
+    jobs = uploads * repeat
+
+    def post(upload):
+        filename, contents, _ = upload
+        start = time.perf_counter()
+        response = client.post("/detect/", files={"file": (filename, contents, "image/jpeg")})
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        return elapsed, response.json()["number_detected"]
+
+    reset_peak_rss()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(post, jobs))
+    wall = time.perf_counter() - start
+
+    report = latency_stats([elapsed for elapsed, _ in results])
+    report["throughput_ips"] = len(jobs) / wall
+    report["peak_rss_mb"] = peak_rss_kb() / 1024
+    report.update(accuracy([number for _, number in results], [label for _, _, label in jobs]))
+    return report
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: dict, baseline: dict = None):
+    for section in ("direct", "pipeline_full", "pipeline_roi", *sorted(k for k in report if k.startswith("http_"))):
+        if section not in report:
+            continue
+        print(f"\n📊 {section}")
+        for key, value in report[section].items():
+            line = f"   {key}: {value:.3f}"
+            previous = (baseline or {}).get(section, {}).get(key)
+            if previous:
+                line += f"  ({(value - previous) / previous * 100:+.1f}% vs baseline)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="Diretório de fotos rotuladas (padrão: conjunto sintético gerado)")
+    parser.add_argument("--count", type=int, default=40, help="Fotos do conjunto sintético")
+    parser.add_argument("--stub", action="store_true", help="Usa o detector substituto em vez dos pesos reais")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--skip-pipeline", action="store_true")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    parser.add_argument("--baseline", help="Relatório anterior para comparação")
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    workdir = tempfile.mkdtemp(prefix="bench_detector_")
+    original_cwd = os.getcwd()
+    # Antes de importar main (migrações no import) e dbmodels: o /detect/ grava em um banco descartável,
+    # nunca no DATABASE_URL do ambiente (os engines síncrono e assíncrono são criados a partir dele)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    try:
+        images_dir = args.images or os.path.join(workdir, "fixtures")
+        if not args.images:
+            write_fixtures(images_dir, args.count)
+        fixtures = load_fixtures(images_dir)
+        if not fixtures:
+            sys.exit(f"Nenhuma foto rotulada em {images_dir}")
+
+        # O /detect/ precisa de cache desligado e de um banco descartável
+        os.environ["DETECTION_CACHE_SIZE"] = "0"
+        from model_registry import registry
+
+        if args.stub:
+            from benchmarks.stub_detector import StubObbBackend
+
+            registry.set_backend(StubObbBackend(), "stub")
+        elif registry.get() is None:
+            sys.exit("Modelo indisponível; use --stub para rodar com o detector substituto")
+
+        import utilits
+
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "date": datetime.now().isoformat(timespec="seconds"),
+                "backend": registry.backend_name,
+                "detection_mode": utilits.DETECTION_MODE,
+                "images": len(fixtures),
+                "repeat": args.repeat,
+            },
+            "direct": bench_direct(fixtures, args.repeat),
+        }
+        if not args.skip_pipeline:
+            report["pipeline_full"], report["pipeline_roi"] = bench_pipeline(fixtures, args.repeat)
+
+        if not args.skip_http:
+            from fastapi.testclient import TestClient
+
+            import main  # cria as tabelas no banco descartável (migrações)
+
+            os.chdir(workdir)
+            os.makedirs(main.UPLOAD_DIR, exist_ok=True)  # uploads/ é relativo ao diretório atual
+
+            with TestClient(main.app) as client:
+                for concurrency in args.concurrency:
+                    report[f"http_c{concurrency}"] = bench_http(client, fixtures, concurrency, args.repeat)
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark de memória e tempo da ingestão de fotos do /detect/.
+
+Compara o caminho antigo (decodificação na resolução original, np.array e
+nova gravação com image.save) com o de image_io (decodificação reduzida em
+modo draft e gravação dos bytes originais) em JPEGs sintéticos de 12 e 48 MP.
+
+Cada medição roda em um subprocesso novo, para que o pico de memória
+(VmHWM em /proc; ru_maxrss fora do Linux) reflita apenas aquele caminho.
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_ingest --sizes 12 48 --json ingest_report.json
+"""
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+METHODS = ("legacy", "image_io")
+
+
+def make_photo(megapixels: int, path: str, seed: int = 0):
+    """
+    Gera um JPEG 4:3 com textura (ruído suavizado), parecido em tamanho com uma foto de celular.
+    """
+    width = int(round((megapixels * 1e6 * 4 / 3) ** 0.5))
+    height = int(round(width * 3 / 4))
+    rng = np.random.default_rng(seed)
+    # Ruído em baixa resolução ampliado: compressão realista sem gerar o array grande aqui
+    small = Image.fromarray(rng.integers(0, 256, (height // 16, width // 16, 3), dtype=np.uint8))
+    small.resize((width, height), Image.BILINEAR).save(path, "JPEG", quality=90)
+
+
+def peak_rss_kb() -> int:
+    """
+    Pico de memória residente do processo atual, em KB.
+
+    O ru_maxrss é herdado do processo pai através do fork, por isso o VmHWM
+    (zerado no exec) é preferido quando disponível.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_method(method: str, photo_path: str, out_dir: str) -> dict:
+    """
+    Executado no subprocesso: processa a foto por um dos caminhos e mede tempo e pico de memória.
+    """
+    import time
+
+    from image_io import decode_image, store_image
+
+    with open(photo_path, "rb") as f:
+        contents = f.read()
+    baseline_kb = peak_rss_kb()
+    out_path = os.path.join(out_dir, f"{method}.jpg")
+
+    start = time.perf_counter()
+    if method == "legacy":
+        image = Image.open(io.BytesIO(contents)).convert("RGB")
+        image_np = np.array(image)
+        image.save(out_path)
+    else:
+        image_np, _, _ = decode_image(contents)
+        store_image(contents, out_path)
+    seconds = time.perf_counter() - start
+
+    peak_kb = peak_rss_kb()
+    return {
+        "seconds": seconds,
+        "peak_rss_mb": peak_kb / 1024,
+        "delta_rss_mb": (peak_kb - baseline_kb) / 1024,
+        "decoded_shape": list(image_np.shape),
+    }
+
+
+def measure(method: str, photo_path: str, out_dir: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_ingest", "--run", method, photo_path, out_dir],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[12, 48], help="Tamanhos das fotos em MP")
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    parser.add_argument("--run", nargs=3, metavar=("METHOD", "PHOTO", "OUT_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_method(*args.run)))
+        return
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for megapixels in args.sizes:
+            photo_path = os.path.join(tmp, f"photo_{megapixels}mp.jpg")
+            make_photo(megapixels, photo_path)
+            key = f"{megapixels}MP"
+            report[key] = {"file_mb": os.path.getsize(photo_path) / (1024 * 1024)}
+            for method in METHODS:
+                report[key][method] = measure(method, photo_path, tmp)
+
+    for name, metrics in report.items():
+        print(f"\n📊 {name} ({metrics['file_mb']:.1f} MB)")
+        for method in METHODS:
+            m = metrics[method]
+            print(
+                f"   {method}: {m['seconds'] * 1000:.0f} ms, pico RSS {m['peak_rss_mb']:.0f} MB "
+                f"(+{m['delta_rss_mb']:.0f} MB), decodificada {m['decoded_shape']}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
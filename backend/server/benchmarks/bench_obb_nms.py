@@ -0,0 +1,175 @@
+"""
+Benchmark de precisão e velocidade: NMS rotacionado (obb_nms) × NMS alinhado aos eixos (torchvision).
+
+Gera um conjunto determinístico de visores de medidor inclinados, com detecções
+duplicadas em volta de cada dígito, e compara quantos dígitos cada NMS perde
+(supressão excessiva) e quantas duplicatas deixa passar.
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_obb_nms --faces 500 --json nms_report.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from obb_nms import rotated_nms
+
+IOU_THRESHOLD = 0.45
+
+
+def regularize(xywhr: np.ndarray) -> np.ndarray:
+    """
+    Convenção das caixas do ultralytics: w é o lado maior e a rotação fica em [0, π).
+    """
+    swap = xywhr[:, 3] > xywhr[:, 2]
+    out = xywhr.copy()
+    out[swap, 2] = xywhr[swap, 3]
+    out[swap, 3] = xywhr[swap, 2]
+    out[:, 4] = np.where(swap, xywhr[:, 4] + np.pi / 2, xywhr[:, 4]) % np.pi
+    return out
+
+
+def make_fixtures(n_faces: int, seed: int = 0) -> list:
+    """
+    Cria visores sintéticos: uma linha de dígitos inclinada e candidatos com duplicatas.
+
+    As caixas saem na convenção do ultralytics (lado maior em w), como no
+    resultado real de results.obb.xywhr.
+
+    Returns:
+        list: Dicionários com gt (K, 5), boxes (N, 5) e scores (N,)
+    """
+    rng = np.random.default_rng(seed)
+    fixtures = []
+    for _ in range(n_faces):
+        n_digits = int(rng.integers(5, 9))
+        width = rng.uniform(18, 30)
+        height = width * rng.uniform(1.6, 2.8)
+        gap = width * rng.uniform(0.05, 0.3)
+        tilt = rng.uniform(-0.6, 0.6)
+        center = rng.uniform(200, 400, 2)
+        direction = np.array([np.cos(tilt), np.sin(tilt)])
+        offsets = (np.arange(n_digits) - (n_digits - 1) / 2) * (width + gap)
+        centers = center + offsets[:, None] * direction
+        gt = np.column_stack((centers, np.full(n_digits, width), np.full(n_digits, height), np.full(n_digits, tilt)))
+
+        boxes = [gt + np.column_stack((rng.normal(0, 1.0, (n_digits, 2)), np.zeros((n_digits, 3))))]
+        scores = [rng.uniform(0.6, 0.95, n_digits)]
+        for _ in range(int(rng.integers(1, 4))):
+            jitter = np.column_stack((
+                rng.normal(0, 2.0, (n_digits, 2)),
+                gt[:, 2:4] * rng.normal(0, 0.05, (n_digits, 2)),
+                rng.normal(0, 0.03, n_digits),
+            ))
+            boxes.append(gt + jitter)
+            scores.append(rng.uniform(0.3, 0.6, n_digits))
+        fixtures.append({
+            "gt": gt,
+            "boxes": regularize(np.concatenate(boxes)).astype(np.float32),
+            "scores": np.concatenate(scores).astype(np.float32),
+        })
+    return fixtures
+
+
+def _axis_xyxy(xywhr: np.ndarray) -> np.ndarray:
+    half = xywhr[:, 2:4] / 2
+    return np.concatenate((xywhr[:, 0:2] - half, xywhr[:, 0:2] + half), axis=1)
+
+
+def _numpy_axis_nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Mesma semântica de torchvision.ops.nms, usada quando o torchvision não está instalado.
+    """
+    order = np.argsort(-scores, kind="stable")
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        inter_w = np.clip(np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0]), 0, None)
+        inter_h = np.clip(np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1]), 0, None)
+        inter = inter_w * inter_h
+        order = rest[inter / (areas[i] + areas[rest] - inter) <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def axis_nms_method():
+    """
+    Caminho atual do utilits (xyxy sem rotação + torchvision.ops.nms), com fallback em NumPy.
+    """
+    try:
+        import torch
+        from torchvision.ops import nms
+    except ImportError:
+        return "axis (numpy reference)", lambda b, s: _numpy_axis_nms(_axis_xyxy(b), s, IOU_THRESHOLD)
+
+    def run(boxes, scores):
+        return nms(torch.from_numpy(_axis_xyxy(boxes)), torch.from_numpy(scores), IOU_THRESHOLD).numpy()
+
+    return "axis (torchvision)", run
+
+
+def evaluate(method, fixtures: list) -> dict:
+    """
+    Executa um NMS sobre as fixtures e mede tempo, dígitos perdidos e duplicatas.
+    """
+    missed = duplicates = exact = total_digits = 0
+    timings = []
+    for fixture in fixtures:
+        start = time.perf_counter()
+        keep = method(fixture["boxes"], fixture["scores"])
+        timings.append(time.perf_counter() - start)
+
+        gt = fixture["gt"]
+        kept = fixture["boxes"][keep]
+        distances = np.linalg.norm(kept[:, None, 0:2] - gt[None, :, 0:2], axis=2)
+        matched = np.bincount(distances.argmin(axis=1), minlength=len(gt))
+        face_missed = int((matched == 0).sum())
+        face_duplicates = int(np.clip(matched - 1, 0, None).sum())
+        missed += face_missed
+        duplicates += face_duplicates
+        exact += int(face_missed == 0 and face_duplicates == 0)
+        total_digits += len(gt)
+
+    timings = np.array(timings) * 1e6
+    return {
+        "faces": len(fixtures),
+        "digits": total_digits,
+        "missed_digits": missed,
+        "duplicate_digits": duplicates,
+        "exact_faces_ratio": exact / len(fixtures),
+        "latency_us_mean": float(timings.mean()),
+        "latency_us_p95": float(np.percentile(timings, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--faces", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    fixtures = make_fixtures(args.faces, args.seed)
+    axis_name, axis_method = axis_nms_method()
+    report = {
+        axis_name: evaluate(axis_method, fixtures),
+        "rotated (obb_nms)": evaluate(lambda b, s: rotated_nms(b, s, IOU_THRESHOLD), fixtures),
+    }
+
+    for name, metrics in report.items():
+        print(f"\n📊 {name}")
+        for key, value in metrics.items():
+            print(f"   {key}: {value:.3f}" if isinstance(value, float) else f"   {key}: {value}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
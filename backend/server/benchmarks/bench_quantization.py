@@ -0,0 +1,100 @@
+"""
+Benchmark do modelo INT8 (INFERENCE_BACKEND=onnx_int8) contra o ONNX FP32.
+
+Mede, no mesmo conjunto de fotos rotuladas, a latência de predict de cada
+modelo (uma foto por chamada, como no /detect/ sem carga), o tamanho dos
+arquivos, a acurácia e a fração de leituras iguais entre os dois, e imprime o
+speedup do INT8. Também mostra o resultado da verificação de acurácia que
+decide se o INT8 é ativado (ver quantization.py).
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_quantization --weights best-obb.pt --images validation/ --json quant_report.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks.bench_detector import latency_stats
+from validation_set import accuracy, load_labeled_photos
+
+
+def bench_backend(backend, images: list, repeat: int) -> tuple:
+    """
+    Latência de predict por foto e leituras do backend.
+    """
+    from utilits import postprocess_obb
+
+    backend.predict([images[0]], conf=0.3, iou=0.4)  # aquecimento
+    timings = []
+    predictions = []
+    for _ in range(repeat):
+        predictions = []
+        for image in images:
+            start = time.perf_counter()
+            output = backend.predict([image], conf=0.3, iou=0.4)[0]
+            timings.append(time.perf_counter() - start)
+            predictions.append(postprocess_obb(*output)["number_detected"])
+    report = latency_stats(timings)
+    report["throughput_ips"] = len(timings) / sum(timings)
+    report["model_mb"] = os.path.getsize(backend.onnx_path) / (1024 * 1024)
+    return report, predictions
+
+
+def main():
+    from model_registry import MODEL_V8_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights", default=MODEL_V8_PATH, help="Pesos .pt ou modelo .onnx")
+    parser.add_argument("--images", help="Fotos rotuladas (padrão: QUANT_VALIDATION_DIR ou validation/ ao lado dos pesos)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    from detector_backends import OnnxObbBackend
+    from image_io import decode_image
+    from quantization import OnnxInt8ObbBackend, accuracy_gate, validation_dir_for
+
+    images_dir = args.images or validation_dir_for(args.weights)
+    fixtures = load_labeled_photos(images_dir)
+    if not fixtures:
+        sys.exit(f"Nenhuma foto rotulada em {images_dir}")
+    labels = [label for _, label in fixtures]
+    images = []
+    for path, _ in fixtures:
+        with open(path, "rb") as f:
+            images.append(decode_image(f.read())[0])
+
+    int8_backend = OnnxInt8ObbBackend(args.weights)
+    fp32_backend = OnnxObbBackend(int8_backend.fp32_path, int8_backend.threads)
+
+    report = {"meta": {"weights": os.path.basename(args.weights), "images": len(fixtures), "repeat": args.repeat}}
+    report["fp32"], fp32_predictions = bench_backend(fp32_backend, images, args.repeat)
+    report["int8"], int8_predictions = bench_backend(int8_backend, images, args.repeat)
+    report["fp32"].update(accuracy(fp32_predictions, labels))
+    report["int8"].update(accuracy(int8_predictions, labels))
+    report["comparison"] = {
+        "speedup_mean": report["fp32"]["latency_ms_mean"] / report["int8"]["latency_ms_mean"],
+        "speedup_p95": report["fp32"]["latency_ms_p95"] / report["int8"]["latency_ms_p95"],
+        "size_ratio": report["int8"]["model_mb"] / report["fp32"]["model_mb"],
+        "agreement": sum(a == b for a, b in zip(fp32_predictions, int8_predictions)) / len(labels),
+    }
+    gate = accuracy_gate(fp32_backend, int8_backend, fixtures)
+    report["gate"] = {key: gate.get(key) for key in ("accepted", "reason", "relative_accuracy")}
+
+    for section in ("fp32", "int8", "comparison"):
+        print(f"\n📊 {section}")
+        for key, value in report[section].items():
+            print(f"   {key}: {value:.3f}")
+    status = "✅ INT8 aceito" if gate["accepted"] else f"⚠️ INT8 recusado: {gate['reason']}"
+    print(f"\n{status}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark de inserção concorrente de leituras no SQLite.
+
+Várias threads gravam leituras (uma sessão e um commit por leitura, como o
+POST /api/readings/meters/{id}/readings e o /detect/), enquanto outras
+threads listam leituras sem parar. Compara três configurações do engine (ver
+dbmodels/database.py):
+
+- default: SQLite sem pragmas (journal em rollback, synchronous=FULL);
+- pragmas: WAL, synchronous=NORMAL, cache maior, mmap e busy_timeout;
+- single_writer: pragmas e escritor único no processo (SQLITE_SINGLE_WRITER).
+
+O relatório mostra inserções/s, latência do commit, consultas/s dos leitores
+e quantas escritas falharam com "database is locked".
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_sqlite --writers 1 4 16 --inserts 200 --json sqlite_report.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+MODES = ("default", "pragmas", "single_writer")
+
+# O engine do módulo não deve apontar para o medicoes.db do repositório
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_sqlite_'), 'unused.db')}")
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from benchmarks.bench_detector import latency_stats  # noqa: E402
+from dbmodels import condominiums, measurement_types, meters, reading_photos, units, users  # noqa: E402,F401
+from dbmodels.database import Base, create_db_engine, create_session_factory  # noqa: E402
+from dbmodels.readings import Reading, ReadingStatus  # noqa: E402
+
+
+def bench_mode(mode: str, writers: int, inserts: int, readers: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_sqlite_"), "medicoes.db")
+    engine = create_db_engine(f"sqlite:///{path}", sqlite_pragmas=mode != "default")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = create_session_factory(engine, single_writer=mode == "single_writer")
+
+    commit_seconds = []
+    errors = []
+    queries = [0]
+    stop = threading.Event()
+    lock = threading.Lock()
+
+    def write(worker: int):
+        for i in range(inserts):
+            db = SessionLocal()
+            try:
+                start = time.perf_counter()
+                db.add(Reading(meter_id=worker + 1, current_reading=str(i), status=ReadingStatus.COMPLETED))
+                db.commit()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    commit_seconds.append(elapsed)
+            except OperationalError as e:
+                db.rollback()
+                with lock:
+                    errors.append(str(e.orig))
+            finally:
+                db.close()
+
+    def read():
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                db.query(Reading).order_by(Reading.id.desc()).limit(50).all()
+                with lock:
+                    queries[0] += 1
+            except OperationalError:
+                pass
+            finally:
+                db.close()
+
+    reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+    writer_threads = [threading.Thread(target=write, args=(worker,)) for worker in range(writers)]
+    for thread in reader_threads:
+        thread.start()
+    start = time.perf_counter()
+    for thread in writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in reader_threads:
+        thread.join()
+    engine.dispose()
+
+    report = latency_stats(commit_seconds) if commit_seconds else {}
+    report.update(
+        inserts_per_second=len(commit_seconds) / elapsed,
+        reader_queries_per_second=queries[0] / elapsed,
+        locked_errors=sum("locked" in error for error in errors),
+        failed=len(errors),
+    )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--inserts", type=int, default=200, help="Leituras gravadas por thread")
+    parser.add_argument("--readers", type=int, default=2, help="Threads listando leituras durante o teste")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    report = {"meta": {"inserts_per_writer": args.inserts, "readers": args.readers}}
+    for writers in args.writers:
+        section = report[f"writers_{writers}"] = {}
+        print(f"\n📊 {writers} escritor(es)")
+        for mode in args.modes:
+            result = section[mode] = bench_mode(mode, writers, args.inserts, args.readers)
+            print(
+                f"   {mode:<14} {result['inserts_per_second']:8.1f} inserções/s  "
+                f"p95 {result.get('latency_ms_p95', 0):7.1f} ms  "
+                f"leitores {result['reader_queries_per_second']:8.1f} consultas/s  "
+                f"falhas {result['failed']}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
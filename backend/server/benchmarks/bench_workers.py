@@ -0,0 +1,139 @@
+"""
+Benchmark de vazão agregada com vários processos de inferência na mesma máquina.
+
+Simula N workers do uvicorn (WEB_CONCURRENCY=N): N processos carregam o
+modelo e executam utilits.run_yolov8_obb em paralelo, sem pausa, durante
+--seconds. Para cada N, compara três configurações do runtime (ver
+runtime_config.py):
+
+- default: bibliotecas com a configuração padrão (cada processo usa todos os núcleos);
+- configured: threads intra-op divididas entre os N processos;
+- pinned: como configured, com cada processo fixado na sua fatia de núcleos.
+
+O relatório mostra fotos/s somadas de todos os processos e a latência média.
+
+Uso (a partir de backend/server):
+    python -m benchmarks.bench_workers --workers 1 2 4 --json workers_report.json
+    python -m benchmarks.bench_workers --stub --seconds 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import load_fixtures, write_fixtures
+
+MODES = {
+    "default": {"INFERENCE_RUNTIME_CONFIG": "0"},
+    "configured": {"INFERENCE_RUNTIME_CONFIG": "1", "INFERENCE_PIN_CORES": "0"},
+    "pinned": {"INFERENCE_RUNTIME_CONFIG": "1", "INFERENCE_PIN_CORES": "1"},
+}
+
+
+def run_worker(env: dict, stub: bool, paths: list, seconds: float, barrier, results):
+    """
+    Processo de inferência: carrega o modelo, espera os demais e processa fotos até o prazo.
+    """
+    os.environ.update(env)
+    import runtime_config
+    from image_io import decode_image
+    from model_registry import registry
+    from utilits import run_yolov8_obb
+
+    runtime_config.configure_process()
+    if stub:
+        from benchmarks.stub_detector import StubObbBackend
+
+        registry.set_backend(StubObbBackend(), "stub")
+    images = []
+    for path in paths:
+        with open(path, "rb") as f:
+            images.append(decode_image(f.read())[0])
+    run_yolov8_obb(images[0])  # aquecimento
+
+    barrier.wait()
+    count = 0
+    busy = 0.0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        run_yolov8_obb(images[count % len(images)])
+        busy += time.perf_counter() - start
+        count += 1
+    results.put({"count": count, "busy": busy, "runtime": runtime_config.get_status()})
+
+
+def bench_workers(workers: int, mode: str, stub: bool, paths: list, seconds: float) -> dict:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    env = dict(
+        MODES[mode],
+        WEB_CONCURRENCY=str(workers),
+        INFERENCE_EXECUTOR="thread",
+        INFERENCE_WORKERS="1",
+        INFERENCE_PIN_LOCK_DIR=tempfile.mkdtemp(prefix="bench_workers_"),
+        TORCH_THREADS="0",
+        ONNX_THREADS="0",
+    )
+    processes = [
+        context.Process(target=run_worker, args=(env, stub, paths, seconds, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    reports = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    count = sum(report["count"] for report in reports)
+    return {
+        "throughput_ips": count / seconds,
+        "latency_ms_mean": 1000 * sum(report["busy"] for report in reports) / max(1, count),
+        "threads_per_worker": reports[0]["runtime"]["threads_per_worker"],
+        "pinned_cores": [report["runtime"]["cores"] for report in reports],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="Diretório de fotos rotuladas (padrão: conjunto sintético gerado)")
+    parser.add_argument("--count", type=int, default=8, help="Fotos do conjunto sintético")
+    parser.add_argument("--stub", action="store_true", help="Usa o detector substituto em vez dos pesos reais")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--json", help="Grava o relatório neste arquivo")
+    args = parser.parse_args()
+
+    images_dir = args.images or os.path.join(tempfile.mkdtemp(prefix="bench_workers_"), "fixtures")
+    if not args.images:
+        write_fixtures(images_dir, args.count)
+    paths = [path for path, _ in load_fixtures(images_dir)]
+    if not paths:
+        sys.exit(f"Nenhuma foto rotulada em {images_dir}")
+
+    report = {"meta": {"cores": os.cpu_count(), "images": len(paths), "seconds": args.seconds, "stub": args.stub}}
+    for workers in args.workers:
+        section = report[f"workers_{workers}"] = {}
+        for mode in args.modes:
+            section[mode] = bench_workers(workers, mode, args.stub, paths, args.seconds)
+
+        print(f"\n📊 {workers} worker(s)")
+        for mode, result in section.items():
+            print(
+                f"   {mode:<10} {result['throughput_ips']:8.2f} fotos/s  "
+                f"{result['latency_ms_mean']:8.1f} ms/foto  threads/worker: {result['threads_per_worker']}"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Relatório salvo em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Conjunto fixo de fotos sintéticas de medidores, rotuladas, para os benchmarks do detector.
+
+Cada foto tem um fundo texturizado e um visor escuro com a leitura em dígitos
+claros; o tamanho do visor varia de 6% a 30% da largura da foto. O conjunto é
+determinístico (semente fixa): o mesmo comando gera os mesmos arquivos, então
+os relatórios de commits diferentes são comparáveis.
+
+Uso (a partir de backend/server):
+    python -m benchmarks.fixtures fixtures/ --count 40
+"""
+import argparse
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from validation_set import LABELS_FILE, load_labeled_photos
+
+DIGITS_PER_READING = 5
+
+
+@lru_cache(maxsize=None)
+def digit_glyph(digit: int) -> Image.Image:
+    """
+    Dígito na fonte padrão do Pillow, recortado na área com tinta (modo L).
+    """
+    try:
+        font = ImageFont.load_default(size=48)
+    except TypeError:  # Pillow < 10.1: só a fonte bitmap
+        font = ImageFont.load_default()
+    canvas = Image.new("L", (96, 96), 0)
+    ImageDraw.Draw(canvas).text((16, 16), str(digit), fill=255, font=font)
+    return canvas.crop(canvas.getbbox())
+
+
+def make_meter_photo(label: str, size: tuple, display_fraction: float, rng: np.random.Generator) -> Image.Image:
+    """
+    Gera uma foto com o visor em posição aleatória, ocupando `display_fraction` da largura.
+    """
+    width, height = size
+    texture = rng.integers(100, 220, (height // 24 + 1, width // 24 + 1, 3), dtype=np.uint8)
+    photo = Image.fromarray(texture).resize((width, height), Image.BILINEAR)
+
+    display_width = int(width * display_fraction)
+    digit_width = display_width / (len(label) * 1.25 + 0.5)
+    glyph_aspect = np.mean([digit_glyph(d).size[1] / digit_glyph(d).size[0] for d in range(10)])
+    digit_height = int(digit_width * glyph_aspect * 0.8)
+    display_height = int(digit_height * 1.6)
+
+    left = int(rng.integers(0, width - display_width))
+    top = int(rng.integers(0, height - display_height))
+    panel = Image.new("RGB", (display_width, display_height), (25, 25, 30))
+    x = digit_width * 0.5
+    for char in label:
+        glyph = digit_glyph(int(char))
+        glyph_width = max(1, int(digit_height * glyph.size[0] / glyph.size[1]))
+        glyph = glyph.resize((glyph_width, digit_height), Image.BILINEAR)
+        offset = int(x + (digit_width - glyph_width) / 2)
+        panel.paste((235, 235, 235), (offset, (display_height - digit_height) // 2), glyph)
+        x += digit_width * 1.25
+    photo.paste(panel, (left, top))
+    return photo
+
+
+def write_fixtures(directory: str, count: int, size: tuple = (2000, 1500), seed: int = 0) -> dict:
+    """
+    Grava `count` fotos JPEG e o labels.json ({arquivo: leitura}) em `directory`.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    labels = {}
+    for i in range(count):
+        label = "".join(str(d) for d in rng.integers(0, 10, DIGITS_PER_READING))
+        display_fraction = float(rng.uniform(0.06, 0.3))
+        filename = f"meter_{i:03d}.jpg"
+        make_meter_photo(label, size, display_fraction, rng).save(os.path.join(directory, filename), "JPEG", quality=90)
+        labels[filename] = label
+    with open(os.path.join(directory, LABELS_FILE), "w") as f:
+        json.dump(labels, f, indent=2)
+    return labels
+
+
+def load_fixtures(directory: str) -> list:
+    """
+    Pares (caminho, leitura esperada) de um diretório de fotos rotuladas (ver validation_set.py).
+    """
+    return load_labeled_photos(directory)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory")
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_fixtures(args.directory, args.count, seed=args.seed)
+    print(f"✅ {args.count} fotos gravadas em {args.directory}")
@@ -0,0 +1,135 @@
+"""
+Configuração comum dos testes: nenhum teste usa o medicoes.db do repositório.
+
+Definido antes de qualquer import de dbmodels.database, que cria o engine a partir do DATABASE_URL.
+"""
+import os
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='medicoes_test_'), 'medicoes.db')}")
+os.environ.setdefault("MODEL_PRELOAD", "0")
+
+
+@pytest.fixture(scope="module")
+def make_api():
+    """
+    Fábrica de clientes do app contra um banco descartável.
+
+    `make(url=None, seed=None)` recria as tabelas de `url` (padrão: um SQLite
+    temporário), grava o admin (admin/admin123) e o que `seed(db)` adicionar,
+    aponta get_db e get_async_db para esse banco e devolve um namespace com
+    client (já autenticado como admin), Session, engine, async_engine e o
+    retorno de `seed`.
+    """
+    from types import SimpleNamespace
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    from auth import get_password_hash
+    from dbmodels.database import Base, async_database_url, create_db_engine, get_async_db, get_db
+    from dbmodels.users import User, UserRole, UserStatus
+    import main
+
+    created = []
+
+    def make(url: str = None, seed=None):
+        url = url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='medicoes_api_'), 'medicoes.db')}"
+        engine = create_db_engine(url)
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = Session()
+        db.add(User(
+            username="admin", email="admin@teste.com", name="Admin", password_hash=get_password_hash("admin123"),
+            role=UserRole.ADMIN, status=UserStatus.ACTIVE, active=True,
+        ))
+        seeded = seed(db) if seed is not None else None
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # Endpoints async (get_async_db): sem pool, porque cada requisição do TestClient roda em um event loop novo
+        async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+        AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with AsyncSession() as db:
+                yield db
+
+        main.app.dependency_overrides[get_db] = override_get_db
+        main.app.dependency_overrides[get_async_db] = override_get_async_db
+        client = TestClient(main.app)
+        token = client.post("/api/users/login", params={"username": "admin", "password": "admin123"}).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        api = SimpleNamespace(client=client, Session=Session, engine=engine, async_engine=async_engine, seed=seeded)
+        created.append(api)
+        return api
+
+    yield make
+    main.app.dependency_overrides.clear()
+    for api in created:
+        api.engine.dispose()
+
+
+class RecordingBackend:
+    """
+    Detector substituto que não encontra nada e registra cada chamada a predict.
+    """
+
+    name = "recording"
+    device = "cpu"
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, images: list, conf: float, iou: float, imgsz: int = None) -> list:
+        import numpy as np
+
+        self.calls.append(([image.shape for image in images], imgsz))
+        return [(np.zeros((0, 5), np.float32), np.zeros(0, np.float32), np.zeros(0, np.float32)) for _ in images]
+
+
+@pytest.fixture
+def recording_backend(monkeypatch):
+    """
+    RecordingBackend como modelo principal (registry), restaurado no fim do teste.
+    """
+    from model_registry import registry
+
+    for attribute in ("backend", "backend_name", "version", "_active", "status", "error"):
+        monkeypatch.setattr(registry, attribute, getattr(registry, attribute))
+    backend = RecordingBackend()
+    registry.set_backend(backend, "recording")
+    return backend
+
+
+@pytest.fixture
+def make_jpeg():
+    """
+    Fábrica de fotos JPEG de ruído: `make_jpeg(seed=0, size=(64, 48))` devolve os bytes.
+    """
+    import io
+
+    import numpy as np
+    from PIL import Image
+
+    def make(seed: int = 0, size: tuple = (64, 48)) -> bytes:
+        rng = np.random.default_rng(seed)
+        buffer = io.BytesIO()
+        Image.fromarray(rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)).save(buffer, "JPEG")
+        return buffer.getvalue()
+
+    return make
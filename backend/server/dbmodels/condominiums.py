@@ -58,6 +58,12 @@ class CondominiumResponse(CondominiumBase):
     class Config:
         orm_mode = True
 
+class CondominiumListResponse(BaseModel):
+    condominiums: List[CondominiumResponse]
+    total: int
+    skip: int
+    limit: int
+
 
 
 
@@ -11,7 +11,7 @@ class Meter(Base):
     __table_args__ = {'extend_existing': True}
 
     id = Column(Integer, primary_key=True, index=True)
-    unit_id = Column(Integer, ForeignKey("units.id", ondelete="CASCADE"))
+    unit_id = Column(Integer, ForeignKey("units.id", ondelete="CASCADE"), index=True)
     measurement_type_id = Column(Integer, ForeignKey("measurement_types.id"))
     serial_number = Column(String, index=True, nullable=True)
     active = Column(Boolean, default=True)
@@ -9,7 +9,7 @@ class ReadingPhoto(Base):
     __tablename__ = "reading_photos"
 
     id = Column(Integer, primary_key=True, index=True)
-    reading_id = Column(Integer, ForeignKey("readings.id", ondelete="CASCADE"))
+    reading_id = Column(Integer, ForeignKey("readings.id", ondelete="CASCADE"), index=True)
     file_path = Column(String)  # Path to the full image
     cropped_file_path = Column(String, nullable=True)  # Path to the cropped image
     is_cropped = Column(Boolean, default=False)
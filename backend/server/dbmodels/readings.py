@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import List, Optional
@@ -23,13 +23,22 @@ class Reading(Base):
     date = Column(DateTime, default=datetime.utcnow)
     registered_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     
-    status = Column(Enum(ReadingStatus), default=ReadingStatus.PENDING)
+    status = Column(Enum(ReadingStatus, name="reading_status"), default=ReadingStatus.PENDING)
     inaccessible_reason = Column(String, nullable=True)
     observations = Column(String, nullable=True)
+    model_version = Column(String, nullable=True)  # Versão do modelo que fez a leitura (ver model_registry.py)
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Índices das consultas de histórico (criados pela migração 0002, ver migrations/)
+    __table_args__ = (
+        # Histórico de um medidor, mais recentes primeiro (GET /api/readings/?meter_id=)
+        Index("ix_readings_meter_id_date", meter_id, date.desc()),
+        # Última leitura aceita por medidor (reading_validation.MeterHistory)
+        Index("ix_readings_status_meter_id_id", status, meter_id, id),
+    )
+
     # Relacionamentos
     meter = relationship("Meter", back_populates="readings")
     photos = relationship("ReadingPhoto", back_populates="reading", cascade="all, delete-orphan")
@@ -54,13 +63,23 @@ class ReadingUpdate(BaseModel):
     inaccessible_reason: Optional[str] = None
     observations: Optional[str] = None
 
+class ReadingMeterResponse(BaseModel):
+    id: int
+    unit_id: int
+    measurement_type_id: int
+    serial_number: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
 class ReadingResponse(ReadingBase):
     id: int
+    model_version: Optional[str] = None
     date: datetime
     created_at: datetime
     updated_at: datetime
     photos: List[ReadingPhotoResponse] = []
-    meter: dict  # Incluirá informações básicas do medidor
+    meter: ReadingMeterResponse  # Informações básicas do medidor
 
     class Config:
         orm_mode = True
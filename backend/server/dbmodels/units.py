@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from typing import List, Optional
@@ -8,7 +8,11 @@ from .database import Base
 # SQLAlchemy Model
 class Unit(Base):
     __tablename__ = "units"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Unidades de um condomínio e busca pelo número dentro dele
+        Index("ix_units_condominium_id_number", "condominium_id", "number"),
+        {'extend_existing': True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     condominium_id = Column(Integer, ForeignKey("condominiums.id", ondelete="CASCADE"))
@@ -50,3 +54,9 @@ class UnitResponse(UnitBase):
     updated_at: datetime    
     class Config:
         orm_mode = True
+
+class UnitListResponse(BaseModel):
+    units: List[UnitResponse]
+    total: int
+    skip: int
+    limit: int
@@ -26,8 +26,8 @@ class User(Base):
     email = Column(String, unique=True, index=True)
     name = Column(String)
     password_hash = Column(String)
-    role = Column(Enum(UserRole), default=UserRole.USER)
-    status = Column(Enum(UserStatus), default=UserStatus.ACTIVE)
+    role = Column(Enum(UserRole, name="user_role"), default=UserRole.USER)
+    status = Column(Enum(UserStatus, name="user_status"), default=UserStatus.ACTIVE)
     last_access = Column(DateTime, nullable=True)
     avatar_url = Column(String, nullable=True)
     avatar_color = Column(String, nullable=True)
@@ -1,19 +1,18 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from auth import verify_token
-from dbmodels.database import get_db
+from dbmodels.database import get_async_db, get_db
 from dbmodels.users import User, UserRole
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+def _token_username(credentials: HTTPAuthorizationCredentials) -> str:
     """
-    Obtém o usuário atual com base no token JWT.
+    Extrai o nome de usuário do token JWT.
     """
     token = credentials.credentials
     payload = verify_token(token)
@@ -24,8 +23,12 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido",
         )
-    
-    user = db.query(User).filter(User.username == username).first()
+    return username
+
+def _check_user(user: Optional[User]) -> User:
+    """
+    Verifica se o usuário do token existe e está ativo.
+    """
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,6 +43,28 @@ def get_current_user(
     
     return user
 
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Obtém o usuário atual com base no token JWT.
+    """
+    username = _token_username(credentials)
+    user = db.query(User).filter(User.username == username).first()
+    return _check_user(user)
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Mesmo que get_current_user, com a sessão assíncrona (endpoints async).
+    """
+    username = _token_username(credentials)
+    result = await db.execute(select(User).filter(User.username == username))
+    return _check_user(result.scalars().first())
+
 def require_roles(allowed_roles: List[UserRole]):
     """
     Decorator factory para verificar se o usuário tem uma das roles permitidas.
@@ -92,3 +117,9 @@ def get_any_authenticated_user(current_user: User = Depends(get_current_user)) -
     Verifica se o usuário está autenticado (qualquer role).
     """
     return current_user
+
+async def get_any_authenticated_user_async(current_user: User = Depends(get_current_user_async)) -> User:
+    """
+    Verifica se o usuário está autenticado (qualquer role), nos endpoints async.
+    """
+    return current_user
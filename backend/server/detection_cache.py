@@ -0,0 +1,174 @@
+"""
+Cache de detecções indexado pelo hash do conteúdo da imagem e pela versão do modelo.
+
+O app móvel reenvia a mesma foto quando a conexão falha e os leituristas às
+vezes submetem a mesma imagem de novo. Com o cache, uma foto repetida devolve o
+resultado anterior e o caminho do arquivo já gravado, sem nova inferência e sem
+gravar outra cópia em uploads/.
+
+Camadas: LRU em memória (DETECTION_CACHE_SIZE entradas) e, opcionalmente, uma
+tabela SQLite (DETECTION_CACHE_DB) que sobrevive a reinícios e é compartilhada
+entre os workers do uvicorn. A versão do modelo entra na chave (cache_key):
+depois de um /model/swap, as fotos são detectadas de novo pelo modelo novo.
+As consultas e gravações no SQLite rodam fora do event loop.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Configurações
+DETECTION_CACHE_SIZE = int(os.getenv("DETECTION_CACHE_SIZE", "512"))  # 0 desativa o cache
+DETECTION_CACHE_DB = os.getenv("DETECTION_CACHE_DB", "")  # Ex.: detection_cache.db
+
+
+def content_hash(contents: bytes) -> str:
+    """
+    Hash SHA-256 (hexadecimal) do conteúdo enviado.
+    """
+    return hashlib.sha256(contents).hexdigest()
+
+
+def cache_key(digest: str, model_version: str) -> str:
+    """
+    Chave de uma foto no cache: o mesmo conteúdo detectado por outro modelo é outra entrada.
+    """
+    return f"{digest}:{model_version or ''}"
+
+
+class DetectionCache:
+    """
+    Cache LRU de resultados de detecção com camada opcional em SQLite.
+
+    Cada entrada guarda o resultado do detector e o caminho da imagem gravada.
+    """
+
+    def __init__(self, max_entries: int, db_path: str = ""):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._db = None
+        # Verifica se a imagem de uma entrada ainda existe (substituível, ver photo_store)
+        self.file_exists = os.path.exists
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS detection_cache ("
+                "hash TEXT PRIMARY KEY, result TEXT NOT NULL, image_path TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str):
+        """
+        Busca uma entrada (memória e depois SQLite). Entradas cuja imagem não existe mais são descartadas.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            from_disk = False
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT result, image_path FROM detection_cache WHERE hash = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = {"result": json.loads(row[0]), "image_path": row[1]}
+                    from_disk = True
+
+            if entry is None or not self.file_exists(entry["image_path"]):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._remember(key, entry)
+            self.hits += 1
+            self.disk_hits += from_disk
+            return entry
+
+    def put(self, key: str, result: dict, image_path: str):
+        entry = {"result": result, "image_path": image_path}
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO detection_cache (hash, result, image_path) VALUES (?, ?, ?)",
+                    (key, json.dumps(result), image_path),
+                )
+                self._db.commit()
+
+    async def get_or_detect(self, key: str, detect):
+        """
+        Devolve a entrada em cache ou executa `detect()` e guarda o resultado.
+
+        Envios simultâneos da mesma foto (reenvio enquanto a primeira tentativa
+        ainda processa) aguardam a mesma detecção em vez de rodar outra.
+
+        Args:
+            key (str): Chave da foto (ver cache_key)
+            detect: Função assíncrona sem argumentos que retorna (result, image_path)
+
+        Returns:
+            tuple: (entrada {"result", "image_path"}, veio do cache)
+        """
+        if self.max_entries <= 0:
+            result, image_path = await detect()
+            return {"result": result, "image_path": image_path}, False
+
+        loop = asyncio.get_running_loop()
+        # A camada SQLite faz I/O: a busca roda no executor padrão
+        entry = self.get(key) if self._db is None else await loop.run_in_executor(None, self.get, key)
+        if entry is not None:
+            return entry, True
+
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), True
+
+        future = loop.create_future()
+        self._in_flight[key] = future
+        try:
+            result, image_path = await detect()
+            entry = {"result": result, "image_path": image_path}
+            if self._db is None:
+                self.put(key, result, image_path)
+            else:
+                await loop.run_in_executor(None, self.put, key, result, image_path)
+            future.set_result(entry)
+            return entry, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita o aviso de exceção não recuperada quando ninguém mais aguardava
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "sqlite": bool(self._db),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+detection_cache = DetectionCache(DETECTION_CACHE_SIZE, DETECTION_CACHE_DB)
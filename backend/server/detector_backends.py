@@ -0,0 +1,297 @@
+"""
+Backends de inferência do detector OBB de dígitos.
+
+Todos os backends expõem `predict(images, conf, iou, imgsz)` e devolvem, por imagem,
+os arrays (xywhr, confidences, labels) em coordenadas da imagem original. O
+pós-processamento (utilits.postprocess_obb) é o mesmo para qualquer backend.
+
+- torch: ultralytics/PyTorch com os pesos best-obb.pt
+- onnx: onnxruntime (CPU) com best-obb.onnx, exportado uma vez e salvo ao lado dos pesos
+- openvino: igual ao onnx, usando o OpenVINOExecutionProvider do onnxruntime
+- onnx_int8: o .onnx quantizado em INT8, se passar na verificação de acurácia (ver quantization.py)
+
+Os backends onnx/openvino não importam torch quando o .onnx já existe.
+"""
+import os
+import threading
+
+import numpy as np
+from PIL import Image
+
+from obb_nms import rotated_nms
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configurações
+INFERENCE_IMGSZ = int(os.getenv("INFERENCE_IMGSZ", "640"))
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = divisão dos núcleos (ver runtime_config.py)
+MAX_DETECTIONS = 300
+
+
+class TorchObbBackend:
+    """
+    YOLOv8-OBB via ultralytics.
+    """
+
+    name = "torch"
+
+    def __init__(self, weights_path: str):
+        import torch
+        from ultralytics import YOLO  # YOLOv8 via ultralytics
+
+        from runtime_config import configure_torch
+
+        configure_torch()
+        self.torch = torch
+        self.device = "cuda:0" if torch.cuda.is_available() else "cpu"
+        self.model = YOLO(weights_path)
+        # O predictor do ultralytics não é thread-safe: no executor de threads
+        # as chamadas ao modelo compartilhado são serializadas
+        self._lock = threading.Lock()
+
+    def predict(self, images: list, conf: float, iou: float, imgsz: int = INFERENCE_IMGSZ) -> list:
+        # O letterbox é feito no buffer da thread e o ultralytics recebe o tensor
+        # pronto (from_numpy compartilha a memória): as caixas voltam no quadro da rede
+        batch, transforms = preprocess(images, imgsz)
+        with self._lock:
+            results = self.model.predict(
+                source=self.torch.from_numpy(batch), conf=conf, iou=iou, imgsz=imgsz, device=self.device, verbose=False
+            )
+        return [
+            (
+                unletterbox(result.obb.xywhr.cpu().numpy(), gain, pad),
+                result.obb.conf.cpu().numpy(),
+                result.obb.cls.cpu().numpy(),
+            )
+            for result, (gain, pad) in zip(results, transforms)
+        ]
+
+
+def export_onnx(weights_path: str) -> str:
+    """
+    Exporta os pesos .pt para ONNX uma única vez; o arquivo fica ao lado dos pesos.
+
+    Returns:
+        str: Caminho do .onnx (reaproveitado se for mais novo que o .pt)
+    """
+    onnx_path = os.path.splitext(weights_path)[0] + ".onnx"
+    if os.path.exists(onnx_path) and (
+        not os.path.exists(weights_path) or os.path.getmtime(onnx_path) >= os.path.getmtime(weights_path)
+    ):
+        return onnx_path
+
+    from ultralytics import YOLO
+
+    logger.info("Exportando o modelo para ONNX", extra={"weights": weights_path})
+    exported = YOLO(weights_path).export(format="onnx", imgsz=INFERENCE_IMGSZ, dynamic=True, simplify=True)
+    if os.path.abspath(exported) != os.path.abspath(onnx_path):
+        os.replace(exported, onnx_path)
+    return onnx_path
+
+
+PAD_VALUE = 114 / 255.0  # Preenchimento do letterbox (cinza 114 do ultralytics), já normalizado
+
+
+class InputBuffers(threading.local):
+    """
+    Entrada da rede (lote × 3 × imgsz × imgsz, float32) pré-alocada e reaproveitada.
+
+    Uma por thread de inferência (no modo "process", uma por worker): o
+    letterbox e a normalização escrevem direto nela e o mesmo array vai para o
+    modelo, sem alocar um quadro novo a cada foto. Há um buffer por imgsz
+    (imagem inteira, recorte de ROI); ele só cresce quando chega um lote maior
+    que os anteriores.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+
+    def get(self, batch_size: int, imgsz: int) -> np.ndarray:
+        buffer = self.buffers.get(imgsz)
+        if buffer is None or len(buffer) < batch_size:
+            buffer = self.buffers[imgsz] = np.empty((batch_size, 3, imgsz, imgsz), dtype=np.float32)
+        return buffer[:batch_size]
+
+
+_input_buffers = InputBuffers()
+
+
+def letterbox_into(image: np.ndarray, out: np.ndarray):
+    """
+    Redimensiona mantendo a proporção e escreve a imagem normalizada e centralizada em `out`.
+
+    Args:
+        image (np.ndarray): Imagem RGB (altura × largura × 3, uint8)
+        out (np.ndarray): Quadro de entrada da rede (3 × size × size, float32)
+
+    Returns:
+        tuple: (ganho, (pad_x, pad_y))
+    """
+    size = out.shape[-1]
+    height, width = image.shape[:2]
+    gain = min(size / height, size / width)
+    new_width, new_height = int(round(width * gain)), int(round(height * gain))
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    bottom, right = top + new_height, left + new_width
+
+    # Só as faixas de preenchimento; o miolo é sobrescrito pela imagem
+    out[:, :top] = PAD_VALUE
+    out[:, bottom:] = PAD_VALUE
+    out[:, top:bottom, :left] = PAD_VALUE
+    out[:, top:bottom, right:] = PAD_VALUE
+    resized = np.asarray(Image.fromarray(image).resize((new_width, new_height), Image.BILINEAR))
+    # O ultralytics trata arrays NumPy como BGR e inverte os canais antes
+    # da rede; a mesma inversão mantém os resultados iguais ao backend torch
+    np.multiply(resized[..., ::-1].transpose(2, 0, 1), 1 / 255.0, out=out[:, top:bottom, left:right], casting="unsafe")
+    return gain, (left, top)
+
+
+def preprocess(images: list, imgsz: int) -> tuple:
+    """
+    Letterbox e normalização do lote no buffer de entrada da thread.
+
+    Returns:
+        tuple: (lote len(images) × 3 × imgsz × imgsz, [(ganho, pad) por imagem])
+    """
+    batch = _input_buffers.get(len(images), imgsz)
+    transforms = [letterbox_into(image, batch[i]) for i, image in enumerate(images)]
+    return batch, transforms
+
+
+def unletterbox(xywhr: np.ndarray, gain: float, pad: tuple) -> np.ndarray:
+    """
+    Leva as caixas do quadro da rede para as coordenadas da imagem original (no lugar).
+    """
+    xywhr[:, 0] = (xywhr[:, 0] - pad[0]) / gain
+    xywhr[:, 1] = (xywhr[:, 1] - pad[1]) / gain
+    xywhr[:, 2:4] /= gain
+    return xywhr
+
+
+def _regularize(xywhr: np.ndarray) -> np.ndarray:
+    """
+    Mesma convenção do ultralytics: w é o lado maior e a rotação fica em [0, π).
+    """
+    swap = xywhr[:, 3] > xywhr[:, 2]
+    out = xywhr.copy()
+    out[swap, 2] = xywhr[swap, 3]
+    out[swap, 3] = xywhr[swap, 2]
+    out[:, 4] = np.where(swap, xywhr[:, 4] + np.pi / 2, xywhr[:, 4]) % np.pi
+    return out
+
+
+def decode_obb_output(prediction: np.ndarray, conf: float, iou: float, gain: float, pad: tuple):
+    """
+    Decodifica a saída bruta (4 + nc + 1, anchors) do YOLOv8-OBB exportado.
+
+    Aplica o filtro de confiança, o NMS rotacionado por classe (como o
+    predict do ultralytics) e desfaz o letterbox.
+
+    Returns:
+        tuple: (xywhr, confidences, labels)
+    """
+    prediction = prediction.T
+    num_classes = prediction.shape[1] - 5
+    class_scores = prediction[:, 4:4 + num_classes]
+    labels = class_scores.argmax(axis=1)
+    confidences = class_scores[np.arange(len(labels)), labels]
+
+    mask = confidences > conf
+    xywhr = np.concatenate((prediction[mask, 0:4], prediction[mask, -1:]), axis=1).astype(np.float64)
+    confidences = confidences[mask]
+    labels = labels[mask]
+
+    # NMS por classe: deslocar cada classe para uma região distinta do plano
+    offsets = labels[:, None] * 4096.0
+    shifted = xywhr.copy()
+    shifted[:, 0:2] += offsets
+    keep = rotated_nms(shifted, confidences, iou)[:MAX_DETECTIONS]
+
+    xywhr = unletterbox(_regularize(xywhr[keep]), gain, pad)
+    return xywhr.astype(np.float32), confidences[keep].astype(np.float32), labels[keep].astype(np.float32)
+
+
+class OnnxObbBackend:
+    """
+    YOLOv8-OBB exportado para ONNX, executado pelo onnxruntime.
+    """
+
+    name = "onnx"
+    providers = ["CPUExecutionProvider"]
+
+    def __init__(self, weights_path: str, threads: int = ONNX_THREADS):
+        import onnxruntime as ort
+
+        onnx_path = weights_path if weights_path.endswith(".onnx") else export_onnx(weights_path)
+
+        if threads <= 0:
+            from runtime_config import threads_per_worker
+
+            # No modo "thread" as INFERENCE_WORKERS threads usam a mesma sessão ao mesmo tempo
+            thread_mode = os.getenv("INFERENCE_EXECUTOR", "thread") == "thread"
+            threads = threads_per_worker(int(os.getenv("INFERENCE_WORKERS", "1")) if thread_mode else 1)
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        available = ort.get_available_providers()
+        providers = [p for p in self.providers if p in available] or ["CPUExecutionProvider"]
+        self.session = ort.InferenceSession(onnx_path, sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.onnx_path = onnx_path
+        self.threads = threads
+        self.device = providers[0]
+
+    def predict(self, images: list, conf: float, iou: float, imgsz: int = INFERENCE_IMGSZ) -> list:
+        # O modelo é exportado com eixos dinâmicos: imgsz menores (recortes de ROI) custam menos
+        batch, transforms = preprocess(images, imgsz)
+        predictions = self.session.run(None, {self.input_name: batch})[0]
+        return [
+            decode_obb_output(prediction, conf, iou, gain, pad)
+            for prediction, (gain, pad) in zip(predictions, transforms)
+        ]
+
+
+class OpenVinoObbBackend(OnnxObbBackend):
+    """
+    Mesmo modelo ONNX, executado pelo OpenVINOExecutionProvider (com fallback para CPU).
+    """
+
+    name = "openvino"
+    providers = ["OpenVINOExecutionProvider", "CPUExecutionProvider"]
+
+
+def create_int8_backend(weights_path: str):
+    from quantization import create_int8_backend
+
+    return create_int8_backend(weights_path)
+
+
+BACKENDS = {
+    "torch": TorchObbBackend,
+    "onnx": OnnxObbBackend,
+    "openvino": OpenVinoObbBackend,
+    "onnx_int8": create_int8_backend,
+}
+
+
+def create_backend(name: str, weights_path: str):
+    """
+    Instancia o backend configurado em INFERENCE_BACKEND.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND inválido: {name}")
+    return BACKENDS[name](weights_path)
+
+
+if __name__ == "__main__":
+    # Exporta o modelo para ONNX antecipadamente: python detector_backends.py [caminho/best-obb.pt]
+    import sys
+    from model_registry import MODEL_V8_PATH
+
+    print(export_onnx(sys.argv[1] if len(sys.argv) > 1 else MODEL_V8_PATH))
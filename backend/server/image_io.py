@@ -0,0 +1,222 @@
+"""
+Leitura, decodificação e gravação das fotos enviadas ao /detect/.
+
+Fotos de celular têm de 12 a 50 MP. Decodificar a imagem inteira para depois
+reduzi-la a 640 px na inferência custa centenas de MB por requisição. Aqui:
+
+- o upload é lido em blocos, com limite rígido de tamanho (413 acima dele);
+- JPEGs são decodificados direto em escala reduzida (modo draft do Pillow),
+  perto da resolução de entrada do modelo;
+- JPEGs são gravados com os bytes originais, sem recodificar (a gravação
+  roda em segundo plano, ver photo_store.py).
+"""
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+# Configurações
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 256 * 1024
+DECODE_MAX_SIDE = int(os.getenv("DECODE_MAX_SIDE", os.getenv("INFERENCE_IMGSZ", "640")))
+
+
+async def read_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Lê o arquivo enviado em blocos, interrompendo assim que o limite é ultrapassado.
+
+    Raises:
+        HTTPException: 413 se o arquivo for maior que `max_bytes`
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Arquivo excede o limite de {max_bytes // (1024 * 1024)} MB",
+            )
+    return bytes(buffer)
+
+
+def decode_image(contents: bytes, max_side: int = DECODE_MAX_SIDE):
+    """
+    Decodifica a imagem em RGB já reduzida para no máximo `max_side` no maior lado.
+
+    Para JPEG, o modo draft faz a redução durante a decodificação (escalas
+    1/2, 1/4, 1/8), sem materializar a imagem na resolução original.
+
+    Returns:
+        tuple: (array RGB uint8, formato original, (largura, altura) originais)
+    """
+    image = Image.open(io.BytesIO(contents))
+    original_format = image.format
+    original_size = image.size
+    if original_format == "JPEG":
+        image.draft("RGB", (max_side, max_side))
+    image = image.convert("RGB")
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.BILINEAR)
+    return np.asarray(image), original_format, original_size
+
+
+def image_size(contents: bytes) -> tuple:
+    """
+    (largura, altura) da imagem, lidas do cabeçalho sem decodificar os pixels.
+    """
+    return Image.open(io.BytesIO(contents)).size
+
+
+def decode_region(contents: bytes, region: tuple, max_side: int = DECODE_MAX_SIDE):
+    """
+    Decodifica apenas uma região da imagem original, com o maior lado limitado a `max_side`.
+
+    Para JPEG, o modo draft reduz a decodificação o quanto for possível sem
+    deixar a região menor que `max_side`.
+
+    Args:
+        region (tuple): (left, top, right, bottom) em coordenadas da imagem original
+
+    Returns:
+        tuple: (array RGB uint8, (left, top) do recorte na imagem original, pixels originais por pixel do recorte)
+    """
+    image = Image.open(io.BytesIO(contents))
+    width = image.size[0]
+    left, top, right, bottom = region
+    factor = max(right - left, bottom - top) / max_side
+    if image.format == "JPEG" and factor > 1:
+        image.draft("RGB", (int(image.size[0] / factor), int(image.size[1] / factor)))
+    draft_scale = width / image.size[0]
+
+    crop_left, crop_top = int(left / draft_scale), int(top / draft_scale)
+    crop_right = max(crop_left + 1, int(np.ceil(right / draft_scale)))
+    crop_bottom = max(crop_top + 1, int(np.ceil(bottom / draft_scale)))
+    crop = image.crop((crop_left, crop_top, crop_right, crop_bottom)).convert("RGB")
+    crop_width = crop.size[0]
+    if max(crop.size) > max_side:
+        crop.thumbnail((max_side, max_side), Image.BILINEAR)
+
+    scale = draft_scale * crop_width / crop.size[0]
+    return np.asarray(crop), (crop_left * draft_scale, crop_top * draft_scale), scale
+
+
+def _atomic_save(image_path: str, write):
+    # Grava em um arquivo temporário e renomeia: ninguém lê uma foto pela metade
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(image_path) or ".")
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, image_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_image(contents: bytes, image_path: str):
+    """
+    Grava a foto: JPEGs com os bytes originais; outros formatos recodificados em JPEG.
+
+    Returns:
+        tuple: (largura, altura) da imagem gravada
+    """
+    image = Image.open(io.BytesIO(contents))
+    if image.format == "JPEG":
+        def write(path):
+            with open(path, "wb") as f:
+                f.write(contents)
+    else:
+        def write(path):
+            image.convert("RGB").save(path, "JPEG")
+    _atomic_save(image_path, write)
+    return image.size
+
+
+def crop_image(image_path: str, box: list, crop_path: str):
+    """
+    Recorta a região `box` (x1, y1, x2, y2, em pixels da imagem gravada) e grava em `crop_path`.
+
+    Returns:
+        bool: False se a caixa ficar vazia depois de limitada à imagem
+    """
+    with Image.open(image_path) as image:
+        width, height = image.size
+        x1, y1, x2, y2 = box
+        left, top = max(0, int(x1)), max(0, int(y1))
+        right, bottom = min(width, int(round(x2))), min(height, int(round(y2)))
+        if right <= left or bottom <= top:
+            return False
+        cropped = image.crop((left, top, right, bottom)).convert("RGB")
+    _atomic_save(crop_path, lambda path: cropped.save(path, "JPEG", quality=95))
+    return True
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Middleware ASGI que recusa com 413 corpos maiores que o limite configurado por rota.
+
+    Verifica o Content-Length antes de ler o corpo e, para envios sem tamanho
+    declarado (chunked), conta os bytes recebidos e interrompe a leitura.
+    """
+
+    class _TooLarge(HTTPException):
+        # HTTPException para que o FastAPI não converta em 400 ao ler o formulário
+        def __init__(self, max_bytes: int):
+            super().__init__(
+                status_code=413,
+                detail=f"Arquivo excede o limite de {max_bytes // (1024 * 1024)} MB",
+            )
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = limits
+
+    async def _reject(self, send, max_bytes: int):
+        body = json.dumps(
+            {"detail": f"Arquivo excede o limite de {max_bytes // (1024 * 1024)} MB"}
+        ).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if max_bytes is None:
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and int(content_length) > max_bytes:
+            return await self._reject(send, max_bytes)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise self._TooLarge(max_bytes)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except self._TooLarge:
+            if not response_started:
+                await self._reject(send, max_bytes)
@@ -0,0 +1,538 @@
+"""
+Executor dedicado para a inferência do detector YOLOv8.
+
+O endpoint /detect/ é assíncrono, mas a decodificação da imagem e a inferência
+são operações de CPU síncronas. Elas são executadas aqui,
+em um pool de threads ou de processos, para que o event loop do uvicorn continue
+atendendo /health e os demais routers enquanto uma foto é processada.
+
+Requisições simultâneas passam por um micro-batcher: as imagens que chegam em
+até INFERENCE_MAX_WAIT_MS (ou até completar INFERENCE_MAX_BATCH_SIZE) são
+processadas por uma única chamada a model_v8.predict.
+"""
+import asyncio
+import contextvars
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from image_io import decode_image, decode_region, image_size
+from metrics import add_spans, collecting, span
+import runtime_config
+from app_logging import get_logger, request_id_var, setup_logging
+
+logger = get_logger(__name__)
+
+# Configurações
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")  # "thread" ou "process"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "1"))
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+
+_executor = None
+_batcher = None
+_worker_model_status = []
+_model_spec = None  # (pesos, backend) do pool de processos depois de um swap_model
+
+
+def _init_process_worker(model_spec: tuple = None):
+    """
+    Inicializador dos processos do pool: carrega e aquece o modelo uma única vez por worker.
+    """
+    from model_registry import preload_model, registry
+
+    # O listener de log do processo pai não existe no worker
+    setup_logging()
+    runtime_config.configure_process()
+    runtime_config.configure_thread()
+    if model_spec is not None:
+        registry.configure(*model_spec)
+    preload_model()
+
+
+def _create_process_pool(model_spec: tuple = None) -> ProcessPoolExecutor:
+    # Os workers não são criados por fork do processo da API: com threads já
+    # rodando nele (onnxruntime do shadow, listener de log), o fork pode travar
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(
+        max_workers=INFERENCE_WORKERS,
+        mp_context=multiprocessing.get_context(start_method),
+        initializer=_init_process_worker,
+        initargs=(model_spec,),
+    )
+
+
+def _worker_status() -> dict:
+    from model_registry import registry
+
+    return dict(registry.get_status(), pid=os.getpid(), runtime=runtime_config.get_status())
+
+
+def get_executor():
+    """
+    Retorna o executor de inferência, criando-o na primeira chamada.
+    """
+    global _executor
+    if _executor is None:
+        if INFERENCE_EXECUTOR == "process":
+            _executor = _create_process_pool(_model_spec)
+        elif INFERENCE_EXECUTOR == "thread":
+            # A inferência roda neste processo: ele recebe a fatia de núcleos
+            runtime_config.configure_process()
+            _executor = ThreadPoolExecutor(
+                max_workers=INFERENCE_WORKERS,
+                thread_name_prefix="inference",
+                initializer=runtime_config.configure_thread,
+            )
+        else:
+            raise ValueError(f"INFERENCE_EXECUTOR inválido: {INFERENCE_EXECUTOR}")
+    return _executor
+
+
+def _run_with_request_id(request_id, func, *args):
+    """
+    Executa `func(*args)` no worker do pool de processos com o request_id de quem pediu.
+    """
+    token = request_id_var.set(request_id)
+    try:
+        return func(*args)
+    finally:
+        request_id_var.reset(token)
+
+
+async def run_inference(func, *args):
+    """
+    Executa `func(*args)` no executor de inferência sem bloquear o event loop.
+
+    Os logs de `func` saem com o request_id atual: no modo "thread", `func` roda em
+    uma cópia do contexto; no modo "process", o contexto não atravessa o processo e
+    só o request_id é repassado.
+
+    Args:
+        func: Função síncrona (deve ser serializável no modo "process")
+        *args: Argumentos da função
+
+    Returns:
+        O valor retornado por `func`
+    """
+    loop = asyncio.get_running_loop()
+    if INFERENCE_EXECUTOR == "process":
+        return await loop.run_in_executor(get_executor(), _run_with_request_id, request_id_var.get(), func, *args)
+    return await loop.run_in_executor(get_executor(), contextvars.copy_context().run, func, *args)
+
+
+class MicroBatcher:
+    """
+    Agrupa requisições concorrentes em lotes para o detector.
+
+    Um lote é fechado quando atinge `max_batch_size` imagens ou quando
+    `max_wait_ms` se passam desde a primeira imagem. No máximo um lote por
+    worker fica em execução; enquanto todos estão ocupados, as novas imagens
+    se acumulam na fila e formam lotes maiores.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, workers: int):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self._queue = None
+        self._slots = None
+        self._task = None
+        self.in_flight = 0
+        self.batch_sizes = Counter()
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.workers)
+            # Contexto vazio: a tarefa não herda o request_id (nem os spans) da primeira requisição
+            self._task = contextvars.Context().run(asyncio.get_running_loop().create_task, self._collect())
+
+    async def submit(self, contents: bytes, hint: tuple = None) -> dict:
+        """
+        Enfileira uma imagem e aguarda o resultado do lote em que ela for processada.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight += 1
+        try:
+            await self._queue.put((contents, hint, future, time.perf_counter(), request_id_var.get()))
+            result, spans = await future
+            # Etapas medidas no executor entram na requisição que originou a imagem
+            add_spans(spans)
+            return result
+        finally:
+            self.in_flight -= 1
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batch_sizes[len(batch)] += 1
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        dispatched_at = time.perf_counter()
+        # Logs do lote (ex.: erro no predict) saem com os request_ids de todas as requisições dele
+        request_id_var.set(",".join(dict.fromkeys(request_id for *_, request_id in batch if request_id)) or None)
+        try:
+            results, spans = await run_inference(process_batch, [(contents, hint) for contents, hint, *_ in batch])
+        except Exception as e:
+            results, spans = [e] * len(batch), [[] for _ in batch]
+        finally:
+            self._slots.release()
+
+        for (_, _, future, enqueued_at, _), result, item_spans in zip(batch, results, spans):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result((result, [("queue_wait", dispatched_at - enqueued_at)] + item_spans))
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self) -> dict:
+        batches = sum(self.batch_sizes.values())
+        images = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches": batches,
+            "images": images,
+            "mean_batch_size": images / batches if batches else 0.0,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
+def get_batcher() -> MicroBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = MicroBatcher(INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, INFERENCE_WORKERS)
+    return _batcher
+
+
+async def detect(contents: bytes, hint: tuple = None) -> dict:
+    """
+    Processa uma imagem enviada ao /detect/ através do micro-batcher.
+
+    Args:
+        contents (bytes): Conteúdo do arquivo enviado
+        hint (tuple): Posição do visor na última foto do medidor (ver roi_hints.py), se houver
+
+    Returns:
+        dict: Resultado do detector (number_detected, confidence, box nas coordenadas da
+        foto original; roi=True quando a leitura veio do recorte da dica)
+    """
+    return await get_batcher().submit(contents, hint)
+
+
+async def redetect(contents: bytes, result: dict, max_side: int) -> dict:
+    """
+    Relê uma imagem em resolução alta, fora do micro-batcher (leituras suspeitas, ver reading_validation.py).
+
+    Args:
+        contents (bytes): Conteúdo do arquivo enviado
+        result (dict): Resultado da primeira detecção (a caixa do visor delimita o recorte)
+        max_side (int): Maior lado da imagem relida
+
+    Returns:
+        dict: Novo resultado do detector, com a caixa nas coordenadas da foto original
+    """
+    result, spans = await run_inference(process_rerun, contents, result["box"], max_side)
+    add_spans(spans)
+    return result
+
+
+async def preload():
+    """
+    Carrega o modelo antes da primeira requisição (hook de startup).
+
+    No modo "thread" o modelo é carregado e aquecido no próprio processo; no
+    modo "process" cada worker do pool é iniciado, o que dispara o
+    carregamento no inicializador.
+    """
+    global _worker_model_status
+    if INFERENCE_EXECUTOR == "process":
+        _worker_model_status = await asyncio.gather(
+            *[run_inference(_worker_status) for _ in range(INFERENCE_WORKERS)]
+        )
+    else:
+        from model_registry import preload_model
+
+        await run_inference(preload_model)
+
+
+async def swap_model(weights_path: str, backend_name: str = None) -> dict:
+    """
+    Troca os pesos do detector sem parar de atender (ver ModelRegistry.swap).
+
+    No modo "thread" o novo modelo é carregado em segundo plano e trocado
+    atomicamente no registro. No modo "process" cada worker tem o seu modelo:
+    um pool novo é iniciado e aquecido com os novos pesos e só então substitui
+    o atual; os lotes em andamento terminam no pool antigo.
+
+    Returns:
+        dict: Estado do novo modelo
+
+    Raises:
+        FileNotFoundError: Arquivo de pesos ausente
+        RuntimeError: O novo modelo não carregou (o atual é mantido)
+    """
+    global _executor, _model_spec, _worker_model_status
+    from model_registry import registry, resolve_weights
+
+    loop = asyncio.get_running_loop()
+    if INFERENCE_EXECUTOR != "process":
+        return await loop.run_in_executor(None, registry.swap, weights_path, backend_name)
+
+    spec = (weights_path, backend_name or registry.backend_name)
+    if not os.path.exists(resolve_weights(*spec)):
+        raise FileNotFoundError(weights_path)
+    pool = _create_process_pool(spec)
+    statuses = await asyncio.gather(
+        *[loop.run_in_executor(pool, _worker_status) for _ in range(INFERENCE_WORKERS)]
+    )
+    failed = [status for status in statuses if status["status"] != "ready"]
+    if failed:
+        pool.shutdown(wait=False)
+        raise RuntimeError(f"Falha ao carregar o modelo: {failed[0]['error'] or failed[0]['status']}")
+
+    previous = _executor
+    previous_version = _worker_model_status[0]["version"] if _worker_model_status else None
+    _executor, _model_spec = pool, spec
+    _worker_model_status = [dict(status, previous_version=previous_version) for status in statuses]
+    if previous is not None:
+        previous.shutdown(wait=False)
+    logger.info("Pool de inferência trocado", extra={"version": statuses[0]["version"], "previous_version": previous_version})
+    return _worker_model_status[0]
+
+
+def get_model_status() -> dict:
+    """
+    Estado do carregamento do modelo.
+
+    No modo "process", o último estado informado pelos workers: o de um worker
+    que não está pronto (ou o do primeiro), com a lista completa em `workers`.
+    """
+    if INFERENCE_EXECUTOR == "process":
+        if not _worker_model_status:
+            return {"status": "not_loaded"}
+        status = next((s for s in _worker_model_status if s["status"] != "ready"), _worker_model_status[0])
+        return dict(status, workers=list(_worker_model_status))
+    from model_registry import registry
+
+    return registry.get_status()
+
+
+async def shutdown():
+    """
+    Para o batcher e encerra o executor de inferência (shutdown da aplicação).
+    """
+    global _executor, _batcher
+    if _batcher is not None:
+        await _batcher.stop()
+        _batcher = None
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def queue_depth() -> int:
+    """
+    Número de imagens aguardando um worker livre.
+    """
+    return _batcher.queue_depth() if _batcher is not None else 0
+
+
+def get_stats() -> dict:
+    """
+    Estado atual do executor de inferência e métricas do micro-batcher.
+    """
+    batcher = get_batcher()
+    return {
+        "executor": INFERENCE_EXECUTOR,
+        "workers": INFERENCE_WORKERS,
+        "runtime": runtime_config.get_status() if INFERENCE_EXECUTOR == "thread" else None,
+        "in_flight": batcher.in_flight,
+        "queue_depth": batcher.queue_depth(),
+        "batching": batcher.get_stats(),
+    }
+
+
+def process_batch(items: list) -> list:
+    """
+    Decodifica um lote de imagens (já reduzidas) e executa o detector uma única vez.
+
+    Roda dentro do executor de inferência, por isso importa o detector sob
+    demanda: no modo "process" o modelo só é carregado nos workers. Uma imagem
+    inválida não derruba o lote: a exceção é devolvida na posição dela.
+
+    Imagens com dica de ROI passam antes pelo recorte do visor (_roi_pass); só
+    as que não tiverem leitura confiável no recorte vão para a imagem inteira.
+
+    Args:
+        items (list): Pares (conteúdo do arquivo enviado, dica de ROI do medidor ou None)
+
+    Returns:
+        tuple: (resultado do detector ou exceção, um por item; spans medidos de cada item)
+    """
+    from utilits import DETECTION_MODE, run_yolov8_obb_batch
+
+    contents_list = [contents for contents, _ in items]
+    results = [None] * len(items)
+    spans = [[] for _ in items]
+    full_frame = [i for i, (_, hint) in enumerate(items) if hint is None]
+    with_hint = [i for i, (_, hint) in enumerate(items) if hint is not None]
+    if with_hint:
+        full_frame = sorted(full_frame + _roi_pass(items, with_hint, results, spans))
+
+    original_sizes = {}
+    images = []
+    decoded = []
+    for i in full_frame:
+        start = time.perf_counter()
+        try:
+            image_np, _, original_size = decode_image(contents_list[i])
+        except Exception as e:
+            results[i] = e
+            continue
+        spans[i].append(("decode", time.perf_counter() - start))
+        images.append((image_np, original_size))
+        decoded.append(i)
+        original_sizes[i] = original_size
+
+    if decoded:
+        # predict e pós-processamento são medidos uma vez para o lote inteiro
+        with collecting() as batch_spans:
+            detections = run_yolov8_obb_batch([image_np for image_np, _ in images])
+        for i, (image_np, original_size), detection in zip(decoded, images, detections):
+            spans[i].extend(batch_spans)
+            # A caixa vem nas coordenadas da imagem reduzida; devolve nas da foto original
+            if detection.get("box") is not None:
+                scale = original_size[0] / image_np.shape[1]
+                detection["box"] = [coord * scale for coord in detection["box"]]
+            results[i] = detection
+
+        if DETECTION_MODE == "two_stage":
+            _second_pass(contents_list, results, original_sizes, spans)
+
+    return results, spans
+
+
+def _roi_pass(items: list, indices: list, results: list, spans: list) -> list:
+    """
+    Detecção no recorte indicado pela dica de ROI do medidor, em resolução reduzida (ROI_IMGSZ).
+
+    Os recortes são decodificados direto dos bytes originais e processados em
+    um único lote. Leituras aceitas (utilits.accept_roi) vão para `results`.
+
+    Returns:
+        list: Índices que precisam da imagem inteira (recorte pouco confiável ou inválido)
+    """
+    from utilits import ROI_IMGSZ, accept_roi, map_box, roi_region, run_yolov8_obb_batch
+
+    crops = []
+    fallback = []
+    for i in indices:
+        contents, hint = items[i]
+        start = time.perf_counter()
+        try:
+            region = roi_region(hint, image_size(contents))
+            crops.append((i, decode_region(contents, region, ROI_IMGSZ)))
+        except Exception:
+            # Imagens inválidas recebem o erro da decodificação completa
+            fallback.append(i)
+            continue
+        spans[i].append(("roi_decode", time.perf_counter() - start))
+
+    if not crops:
+        return fallback
+    with collecting() as batch_spans:
+        detections = run_yolov8_obb_batch([crop_np for _, (crop_np, _, _) in crops], imgsz=ROI_IMGSZ)
+    for (i, (_, offset, scale)), detection in zip(crops, detections):
+        spans[i].extend((f"roi_{stage}", seconds) for stage, seconds in batch_spans)
+        if not accept_roi(detection):
+            fallback.append(i)
+            continue
+        detection["box"] = map_box(detection["box"], offset, scale)
+        detection["roi"] = True
+        results[i] = detection
+    return fallback
+
+
+def _second_pass(items: list, results: list, original_sizes: dict, spans: list):
+    """
+    Segunda passada do modo "two_stage": relê o visor em resolução alta nas imagens pouco confiáveis.
+
+    Os recortes são decodificados dos bytes originais (não da imagem reduzida
+    da primeira passada) e processados em um único lote.
+    """
+    from utilits import display_region, merge_second_pass, needs_second_pass, run_yolov8_obb_batch
+
+    start = time.perf_counter()
+    crops = []
+    for i in sorted(original_sizes):
+        if not needs_second_pass(results[i]):
+            continue
+        region = display_region(results[i]["box"], original_sizes[i])
+        try:
+            crops.append((i, decode_region(items[i], region)))
+        except Exception:
+            logger.warning("Erro ao recortar o visor para a segunda passada", exc_info=True, extra={"sample_key": "second_pass_crop"})
+
+    if not crops:
+        return
+    detections = run_yolov8_obb_batch([crop_np for _, (crop_np, _, _) in crops])
+    elapsed = time.perf_counter() - start
+    for (i, (_, offset, scale)), detection in zip(crops, detections):
+        results[i] = merge_second_pass(results[i], detection, offset, scale)
+        spans[i].append(("second_pass", elapsed))
+
+
+def process_rerun(contents: bytes, box: list, max_side: int):
+    """
+    Detecção em resolução alta de uma imagem: só o visor, se ele foi encontrado, ou a imagem inteira.
+
+    Returns:
+        tuple: (resultado do detector, spans medidos)
+    """
+    from utilits import display_region, map_box, run_yolov8_obb_batch
+
+    with collecting() as spans:
+        with span("rerun_decode"):
+            if box is not None:
+                region = display_region(box, image_size(contents))
+                image_np, offset, scale = decode_region(contents, region, max_side)
+            else:
+                image_np, _, original_size = decode_image(contents, max_side)
+                offset, scale = (0.0, 0.0), original_size[0] / image_np.shape[1]
+        with span("rerun"):
+            # Entrada da rede no tamanho da releitura (múltiplo do stride, 32): no tamanho
+            # padrão o letterbox reduziria a imagem de volta à resolução da primeira passada
+            detection = run_yolov8_obb_batch([image_np], imgsz=max(32, max_side - max_side % 32))[0]
+        if detection.get("box") is not None:
+            detection["box"] = map_box(detection["box"], offset, scale)
+    return detection, spans
@@ -1,15 +1,20 @@
-import io
+import asyncio
+import json
 import os
-import numpy as np
-from PIL import Image
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from typing import List, Optional
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-from dbmodels import Base, engine
-from dbmodels.database import get_db
+from dbmodels import engine
+from dbmodels.database import get_db, SessionLocal, DB_AUTO_MIGRATE, dispose_async_engine, run_migrations
+from dbmodels.meters import Meter
 from dbmodels.readings import Reading, ReadingStatus
+from dbmodels.users import User
+from dependencies import get_admin_user
 from routers.readings import router as readings_router
 from routers.users import router as users_router
 from routers.condominiums import router as condominiums_router
@@ -17,9 +22,25 @@ from routers.units import router as units_router
 from routers.meters import router as meters_router
 from routers.measurement_types import router as measurement_types_router
 from routers.reading_photos import router as reading_photos_router
+import inference
+from detection_cache import detection_cache, cache_key, content_hash
+from image_io import MAX_UPLOAD_BYTES, UploadSizeLimitMiddleware, image_size, read_upload
+import metrics
+from metrics import TimingMiddleware, span
+from app_logging import RequestIdMiddleware, get_logger, setup_logging, shutdown_logging
+from model_registry import INFERENCE_BACKEND, MODEL_DIR, MODEL_PRELOAD, MODEL_V8_PATH
+from photo_store import photo_store, photo_record
+import reading_validation
+from reading_validation import meter_history
+from roi_hints import roi_hints
+from shadow import shadow
 
-# Criar todas as tabelas
-Base.metadata.create_all(bind=engine)
+setup_logging()
+logger = get_logger(__name__)
+
+# Criar/atualizar as tabelas (migrações do Alembic, ver migrations/)
+if DB_AUTO_MIGRATE:
+    run_migrations(engine)
 
 # FastAPI app
 app = FastAPI(
@@ -36,9 +57,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Importa funções do utils.py
+# Limites do /detect/batch (sincronização de uma ronda de leituras feita offline)
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "100"))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", str(256 * 1024 * 1024)))
+
+# Recusa uploads grandes demais antes de ler o corpo (folga para os cabeçalhos do multipart)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/detect/": MAX_UPLOAD_BYTES + 64 * 1024,
+        "/detect/batch": MAX_BATCH_UPLOAD_BYTES,
+    },
+)
+
+# Tempo por etapa das rotas de detecção (histogramas em /metrics; Server-Timing com SERVER_TIMING=1)
+app.add_middleware(TimingMiddleware, paths=("/detect/", "/detect/batch"))
+
+# Correlation ID (X-Request-ID) em todos os logs da requisição; adicionado por último para ser o mais externo
+app.add_middleware(RequestIdMiddleware)
+
+# A inferência (utilits.run_yolov8_obb) roda no executor definido em inference.py
 # from utilits import run_yolov5, run_yolov8_obb  # YOLOv5 comentado temporariamente
-from utilits import run_yolov8_obb
 
 # Adiciona os endpoints
 app.include_router(readings_router, prefix="/api/readings", tags=["readings"])
@@ -55,6 +94,58 @@ if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
 
+@app.on_event("startup")
+async def check_quantization_validation_set():
+    # O INT8 só é ativado depois da verificação de acurácia: sem conjunto de validação, o servidor não sobe
+    if INFERENCE_BACKEND == "onnx_int8":
+        from quantization import require_validation_set
+
+        require_validation_set(MODEL_V8_PATH)
+
+
+@app.on_event("startup")
+async def preload_inference_model():
+    # Carrega e aquece o modelo em segundo plano; /health mostra o andamento
+    if MODEL_PRELOAD:
+        asyncio.get_running_loop().create_task(inference.preload())
+
+
+@app.on_event("startup")
+async def preload_shadow_model():
+    # Modelo candidato (SHADOW_MODEL_PATH), carregado na thread do shadow
+    if shadow.registry is not None:
+        asyncio.get_running_loop().create_task(shadow.preload())
+
+
+@app.on_event("startup")
+async def link_photo_store():
+    # Fotos ainda na fila de gravação contam como existentes para o cache de detecções
+    detection_cache.file_exists = photo_store.exists
+
+
+@app.on_event("startup")
+async def load_meter_history():
+    # Última leitura de cada medidor, para validar as detecções sem consultar o banco
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, meter_history.load)
+    except Exception:
+        logger.exception("Erro ao carregar o histórico de leituras; os medidores serão carregados sob demanda")
+
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    await inference.shutdown()
+    shadow.stop()
+
+
+@app.on_event("shutdown")
+async def shutdown_photo_store():
+    # Grava as fotos pendentes antes de encerrar
+    await photo_store.stop()
+    await dispose_async_engine()
+    # Por último: esvazia a fila de logs
+    shutdown_logging()
+
 
 @app.get("/health")
 async def health_check():
@@ -62,9 +153,88 @@ async def health_check():
     Endpoint para verificar a saúde da API.
     
     Returns:
-        dict: Status da API
+        dict: Status da API, do executor de inferência, do carregamento do modelo,
+        do cache de detecções, da fila de gravação de fotos, do histórico de leituras,
+        das dicas de ROI por medidor e da avaliação do modelo candidato
     """
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "inference": inference.get_stats(),
+        "model": inference.get_model_status(),
+        "detection_cache": detection_cache.get_stats(),
+        "photo_store": photo_store.get_stats(),
+        "meter_history": meter_history.get_stats(),
+        "roi_hints": roi_hints.get_stats(),
+        "shadow": shadow.get_stats(),
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """
+    Histogramas por etapa do /detect/ e estado das filas, no formato do Prometheus.
+    """
+    inference_stats = inference.get_stats()
+    cache_stats = detection_cache.get_stats()
+    lines = (
+        metrics.gauge("inference_queue_depth", "Imagens aguardando um worker de inferência.", inference_stats["queue_depth"])
+        + metrics.gauge("inference_in_flight", "Imagens em processamento ou na fila.", inference_stats["in_flight"])
+        + metrics.gauge("photo_store_queue_depth", "Fotos aguardando gravação.", photo_store.queue_depth())
+        + metrics.gauge("detection_cache_hit_ratio", "Fração das buscas atendidas pelo cache de detecções.", cache_stats["hit_ratio"])
+    )
+    if shadow.enabled:
+        shadow_stats = shadow.get_stats()
+        lines += shadow.render_metrics() + metrics.gauge(
+            "shadow_agreement_ratio",
+            "Fração das fotos comparadas em que o modelo candidato leu o mesmo número que o principal.",
+            shadow_stats["agreement_ratio"] or 0.0,
+        )
+    return PlainTextResponse(metrics.render(lines), media_type="text/plain; version=0.0.4")
+
+
+class ModelSwapRequest(BaseModel):
+    weights: str  # Arquivo de pesos dentro de MODEL_DIR
+    backend: Optional[str] = None  # Padrão: o backend atual
+    target: str = "primary"  # "primary" ou "shadow"
+
+
+model_swap_lock = asyncio.Lock()
+
+
+@app.post("/model/swap")
+async def swap_model(request: ModelSwapRequest, current_user: User = Depends(get_admin_user)):
+    """
+    Carrega novos pesos em segundo plano e troca o modelo sem reiniciar a API.
+
+    Com target="shadow", troca o modelo candidato avaliado em uma fração do
+    tráfego (ver shadow.py). O modelo atual continua atendendo até a troca.
+
+    Returns:
+        dict: Estado do novo modelo (com version e previous_version)
+    """
+    if request.target not in ("primary", "shadow"):
+        raise HTTPException(status_code=400, detail="target deve ser primary ou shadow")
+    model_dir = os.path.realpath(MODEL_DIR)
+    weights_path = os.path.realpath(os.path.join(model_dir, request.weights))
+    if os.path.dirname(weights_path) != model_dir:
+        raise HTTPException(status_code=400, detail="Os pesos devem estar em MODEL_DIR")
+    if model_swap_lock.locked():
+        raise HTTPException(status_code=409, detail="Troca de modelo já em andamento")
+
+    async with model_swap_lock:
+        try:
+            if request.target == "shadow":
+                status = await asyncio.get_running_loop().run_in_executor(
+                    None, shadow.swap, weights_path, request.backend
+                )
+            else:
+                status = await inference.swap_model(weights_path, request.backend)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Arquivo de pesos não encontrado")
+        except Exception as e:
+            logger.exception("Erro ao trocar o modelo", extra={"weights": request.weights, "target": request.target})
+            raise HTTPException(status_code=500, detail=f"Modelo mantido: {e}")
+    return status
 
 
 def extract_number_from_results(results):
@@ -88,55 +258,289 @@ def extract_number_from_results(results):
     return ''.join(digits)
 
 
+def format_observations(confidence, suspect_reason: str = None) -> str:
+    if confidence is None:
+        observations = "Detecção automática sem dígitos reconhecidos"
+    else:
+        observations = f"Detecção automática com confiança: {confidence:.2f}"
+    if suspect_reason:
+        observations += f"; leitura suspeita: {suspect_reason}"
+    return observations
+
+
+async def detect_cached(contents: bytes, meter_id: int):
+    """
+    Executa a detecção de uma foto, reaproveitando o resultado de fotos já enviadas.
+
+    Fotos reenviadas (mesmo conteúdo) reaproveitam a detecção e o arquivo já gravado.
+    Se o medidor tem dica de ROI, a detecção tenta primeiro o recorte do visor.
+
+    Returns:
+        tuple: (entrada {"result", "image_path"}, veio do cache)
+    """
+    with span("hash"):
+        digest = content_hash(contents)
+
+    async def detect():
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        image_filename = f"reading_{timestamp}_{digest[:12]}.jpg"
+        image_path = os.path.join(UPLOAD_DIR, image_filename)
+
+        # Decodificação e YOLOv8 (em lote com requisições simultâneas) rodam fora do event loop
+        # yolov5_results = run_yolov5(image_np)  # Comentado temporariamente
+        hint = await roi_hints.get_async(meter_id)
+        with metrics.collecting() as detect_spans:
+            result = await inference.detect(contents, hint)
+        metrics.add_spans(detect_spans)
+        # Uma amostra das fotos também passa pelo modelo candidato, sem aguardar o resultado
+        shadow.maybe_submit(contents, result, detect_spans)
+        if hint is not None:
+            roi_hints.record_outcome(result)
+        if result["box"] is not None:
+            await roi_hints.update_async(meter_id, result, image_size(contents))
+        return result, image_path
+
+    # Depois de um /model/swap, a mesma foto é detectada de novo pelo modelo novo
+    key = cache_key(digest, inference.get_model_status().get("version"))
+    return await detection_cache.get_or_detect(key, detect)
+
+
+async def validate_detection(meter_id: int, contents: bytes, result: dict):
+    """
+    Valida a leitura contra o histórico do medidor e relê em resolução alta as suspeitas.
+
+    A releitura (VALIDATION_RERUN) só roda para leituras suspeitas e só é usada
+    se passar na validação; caso contrário a leitura original fica pendente.
+
+    Returns:
+        tuple: (resultado, status da leitura, motivo da suspeita ou None, houve releitura)
+    """
+    with span("validate"):
+        plausible, reason = await reading_validation.check_async(meter_id, result)
+    if plausible:
+        return result, ReadingStatus.COMPLETED, None, False
+    if not reading_validation.VALIDATION_RERUN:
+        return result, ReadingStatus.PENDING, reason, False
+
+    try:
+        rerun = await inference.redetect(contents, result, reading_validation.VALIDATION_RERUN_MAX_SIDE)
+    except Exception:
+        logger.warning("Erro na releitura de uma leitura suspeita", exc_info=True, extra={"sample_key": "validation_rerun"})
+        return result, ReadingStatus.PENDING, reason, False
+    plausible, rerun_reason = await reading_validation.check_async(meter_id, rerun)
+    if plausible:
+        return rerun, ReadingStatus.COMPLETED, None, True
+    return result, ReadingStatus.PENDING, reason, True
+
+
+def save_reading(db: Session, reading: Reading) -> Reading:
+    """
+    Grava a leitura do /detect/ (executado no threadpool, fora do event loop).
+    """
+    db.add(reading)
+    db.commit()
+    db.refresh(reading)
+    return reading
+
+
 @app.post("/detect/")
 async def detect_image(
     file: UploadFile = File(...),
+    meter_id: int = Form(1),  # Padrão 1 para clientes que ainda não enviam o medidor
     db: Session = Depends(get_db)
 ):
     try:
         if not file.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="Arquivo deve ser uma imagem")
             
-        contents = await file.read()
+        with span("upload_read"):
+            contents = await read_upload(file)
         if not contents:
             raise HTTPException(status_code=400, detail="Arquivo vazio")
             
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        image_np = np.array(image)
-
-        # Usando apenas YOLOv8 por enquanto
-        # yolov5_results = run_yolov5(image_np)  # Comentado temporariamente
-        yolov8_results = run_yolov8_obb(image_np)
+        cache_entry, cached = await detect_cached(contents, meter_id)
+        yolov8_results = cache_entry["result"]
 
         # Usar apenas YOLOv8 results
-        best_result = yolov8_results
         # best_result = yolov8_results if yolov8_results["confidence"] > yolov5_results["confidence"] else yolov5_results
-        
-        # Salvar imagem
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        image_filename = f"reading_{timestamp}.jpg"
-        image_path = os.path.join(UPLOAD_DIR, image_filename)
-        image.save(image_path)
+        # Leituras implausíveis diante do histórico do medidor ficam pendentes de revisão
+        best_result, status, suspect_reason, rerun = await validate_detection(meter_id, contents, yolov8_results)
         
         # Salvar leitura no banco
         reading = Reading(
-            meter_id=1,  # Temporário - será fornecido pelo frontend
+            meter_id=meter_id,
             current_reading=best_result["number_detected"],
-            status=ReadingStatus.COMPLETED,
-            observations=f"Detecção automática com confiança: {best_result['confidence']:.2f}",
+            status=status,
+            observations=format_observations(best_result["confidence"], suspect_reason),
+            model_version=best_result.get("model_version"),
             # user_id será adicionado quando implementarmos autenticação
         )
-        db.add(reading)
-        db.commit()
-        db.refresh(reading)
+        with span("db_commit"):
+            # Fora do event loop: com SQLITE_SINGLE_WRITER o commit pode esperar a vez do escritor
+            await asyncio.get_running_loop().run_in_executor(None, save_reading, db, reading)
+        if status == ReadingStatus.COMPLETED:
+            meter_history.record(meter_id, reading.current_reading)
+
+        # Foto, recorte do visor e ReadingPhoto são gravados em segundo plano
+        with span("photo_enqueue"):
+            await photo_store.submit(reading.id, contents, cache_entry["image_path"], best_result["box"])
 
         return {
             "id": reading.id,
             "number_detected": reading.current_reading,
             "confidence": best_result["confidence"],
+            "status": reading.status,
+            "suspect_reason": suspect_reason,
+            "model_version": reading.model_version,
+            "rerun": rerun,
             "timestamp": reading.created_at,
+            "queue_depth": inference.queue_depth(),
+            "cached": cached,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Erro no /detect/")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def save_batch_readings(items: list) -> list:
+    """
+    Insere as leituras e fotos de um lote em uma única transação.
+
+    Args:
+        items (list): Itens detectados com sucesso (meter_id, result, status, suspect_reason, paths)
+
+    Returns:
+        list: IDs das leituras, na ordem dos itens
+    """
+    db = SessionLocal()
+    try:
+        readings = []
+        for item in items:
+            reading = Reading(
+                meter_id=item["meter_id"],
+                current_reading=item["result"]["number_detected"],
+                status=item["status"],
+                observations=format_observations(item["result"]["confidence"], item["suspect_reason"]),
+                model_version=item["result"].get("model_version"),
+            )
+            reading.photos.append(photo_record(item["paths"]))
+            readings.append(reading)
+        db.add_all(readings)
+        db.commit()
+        return [reading.id for reading in readings]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def known_meter_ids(db: Session, meter_ids: list) -> set:
+    """
+    IDs de `meter_ids` que existem no banco.
+    """
+    return {meter_id for (meter_id,) in db.query(Meter.id).filter(Meter.id.in_(set(meter_ids))).all()}
+
+
+@app.post("/detect/batch")
+async def detect_batch(
+    files: List[UploadFile] = File(...),
+    meter_ids: List[int] = Form(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Detecção em lote para sincronizar as fotos de uma ronda feita offline.
+
+    Recebe as fotos e, na mesma ordem, o meter_id de cada uma. As imagens
+    passam juntas pelo micro-batcher do detector e cada resultado é enviado
+    (NDJSON, uma linha por foto) assim que fica pronto; leituras implausíveis
+    diante do histórico do medidor ficam pendentes. Ao final, todas as
+    leituras e fotos são gravadas em uma única transação e a última linha
+    traz os IDs criados.
+    """
+    if len(files) != len(meter_ids):
+        raise HTTPException(status_code=400, detail="Informe um meter_id para cada arquivo")
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_FILES} arquivos por lote")
+
+    # Consulta síncrona: roda no executor padrão, como a gravação do lote (save_batch_readings)
+    known_meters = await asyncio.get_running_loop().run_in_executor(None, known_meter_ids, db, meter_ids)
+
+    # Lê todos os arquivos antes de responder: o corpo não fica disponível depois
+    uploads = []
+    for file in files:
+        with span("upload_read"):
+            uploads.append((file.filename, file.content_type or "", await read_upload(file)))
+
+    async def process(index: int, filename: str, content_type: str, contents: bytes, meter_id: int) -> dict:
+        line = {"index": index, "filename": filename, "meter_id": meter_id}
+        try:
+            if meter_id not in known_meters:
+                raise ValueError("Medidor não encontrado")
+            if not content_type.startswith("image/"):
+                raise ValueError("Arquivo deve ser uma imagem")
+            if not contents:
+                raise ValueError("Arquivo vazio")
+            cache_entry, cached = await detect_cached(contents, meter_id)
+            result, status, suspect_reason, _ = await validate_detection(meter_id, contents, cache_entry["result"])
+            with span("photo_write"):
+                paths = await photo_store.write_files(contents, cache_entry["image_path"], result["box"])
+        except Exception as e:
+            logger.warning("Erro em um item do /detect/batch", exc_info=True, extra={"index": index, "upload_filename": filename})
+            return dict(line, error=str(e))
+        return dict(
+            line,
+            number_detected=result["number_detected"],
+            confidence=result["confidence"],
+            status=status,
+            suspect_reason=suspect_reason,
+            model_version=result.get("model_version"),
+            cached=cached,
+            _item={
+                "meter_id": meter_id,
+                "result": result,
+                "status": status,
+                "suspect_reason": suspect_reason,
+                "paths": paths,
+            },
+        )
+
+    async def stream():
+        tasks = [
+            asyncio.ensure_future(process(index, filename, content_type, contents, meter_id))
+            for index, ((filename, content_type, contents), meter_id) in enumerate(zip(uploads, meter_ids))
+        ]
+        completed = []
+        for task in asyncio.as_completed(tasks):
+            line = await task
+            item = line.pop("_item", None)
+            if item is not None:
+                completed.append((line["index"], item))
+            yield json.dumps(line) + "\n"
+
+        completed.sort(key=lambda pair: pair[0])
+        try:
+            with span("db_commit"):
+                reading_ids = await asyncio.get_running_loop().run_in_executor(
+                    None, save_batch_readings, [item for _, item in completed]
+                )
+        except Exception as e:
+            logger.exception("Erro ao gravar as leituras do /detect/batch")
+            yield json.dumps({"committed": False, "error": str(e)}) + "\n"
+            return
+        for _, item in completed:
+            if item["status"] == ReadingStatus.COMPLETED:
+                meter_history.record(item["meter_id"], item["result"]["number_detected"])
+        yield json.dumps({
+            "committed": True,
+            "readings": [
+                {"index": index, "reading_id": reading_id}
+                for (index, _), reading_id in zip(completed, reading_ids)
+            ],
+            "failed": len(uploads) - len(completed),
+        }) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
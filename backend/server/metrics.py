@@ -0,0 +1,183 @@
+"""
+Medição do tempo de cada etapa do /detect/, exportada no formato do Prometheus.
+
+Cada etapa (leitura do upload, decodificação, predict, pós-processamento,
+commit no banco...) é um span: `with span("decode"):`. Os spans de uma
+requisição são acumulados em uma contextvar pelo TimingMiddleware, que no
+final os registra nos histogramas e, com SERVER_TIMING=1, devolve o resumo no
+cabeçalho Server-Timing.
+
+As etapas que rodam no executor de inferência (possivelmente em outro
+processo) são coletadas lá com `collecting()` e devolvidas junto com o
+resultado, para serem somadas à requisição que as originou.
+
+O custo é um perf_counter e um append por etapa; pode ficar ligado em produção.
+"""
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Configurações
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_spans = contextvars.ContextVar("metrics_spans", default=None)
+
+
+class Histogram:
+    """
+    Histograma do Prometheus com um rótulo, seguro para várias threads.
+    """
+
+    def __init__(self, name: str, documentation: str, label: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, seconds: float):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += seconds
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {value: (list(counts), total) for value, (counts, total) in self._series.items()}
+        for value, (counts, total) in sorted(series.items()):
+            label = f'{self.label}="{value}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "detect_stage_seconds",
+    "Tempo de cada etapa do pipeline de detecção por requisição.",
+    "stage",
+)
+REQUEST_SECONDS = Histogram(
+    "detect_request_seconds",
+    "Tempo total das requisições de detecção.",
+    "path",
+)
+
+
+def add_span(stage: str, seconds: float):
+    """
+    Registra uma etapa já medida na requisição (ou coleta) atual; sem coleta ativa, não faz nada.
+    """
+    spans = _spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+def current_spans() -> list:
+    """
+    Cópia dos spans já registrados na requisição (ou coleta) atual.
+    """
+    return list(_spans.get() or [])
+
+
+def add_spans(spans: list):
+    for stage, seconds in spans:
+        add_span(stage, seconds)
+
+
+@contextmanager
+def span(stage: str):
+    """
+    Mede o bloco como a etapa `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def collecting():
+    """
+    Coleta os spans do bloco em uma lista nova (usado no executor de inferência).
+    """
+    spans = []
+    token = _spans.set(spans)
+    try:
+        yield spans
+    finally:
+        _spans.reset(token)
+
+
+def server_timing(spans: list) -> str:
+    """
+    Valor do cabeçalho Server-Timing, somando etapas repetidas.
+    """
+    totals = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+class TimingMiddleware:
+    """
+    Middleware ASGI que coleta os spans das rotas instrumentadas e os registra nos histogramas.
+    """
+
+    def __init__(self, app, paths: tuple):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") not in self.paths:
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        start = time.perf_counter()
+        spans = []
+        token = _spans.set(spans)
+
+        async def timed_send(message):
+            if SERVER_TIMING and message["type"] == "http.response.start":
+                total = time.perf_counter() - start
+                value = server_timing(spans + [("total", total)])
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"server-timing", value.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _spans.reset(token)
+            for stage, seconds in spans:
+                STAGE_SECONDS.observe(stage, seconds)
+            REQUEST_SECONDS.observe(path, time.perf_counter() - start)
+
+
+def gauge(name: str, documentation: str, value: float) -> list:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+
+def render(extra_lines: list = ()) -> str:
+    """
+    Texto do /metrics no formato de exposição do Prometheus.
+    """
+    lines = STAGE_SECONDS.render() + REQUEST_SECONDS.render() + list(extra_lines)
+    return "\n".join(lines) + "\n"
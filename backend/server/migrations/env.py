@@ -0,0 +1,59 @@
+"""
+Ambiente do Alembic para o banco configurado em DATABASE_URL (ver dbmodels/database.py).
+
+No startup, database.run_migrations passa a própria conexão em config.attributes;
+pela linha de comando, o env.py abre a conexão com o engine da aplicação.
+
+Uso (a partir de backend/server):
+    alembic upgrade head
+    alembic revision --autogenerate -m "descrição da mudança"
+"""
+from logging.config import fileConfig
+
+from alembic import context
+
+from dbmodels import condominiums, measurement_types, meters, reading_photos, readings, units, users  # noqa: F401
+from dbmodels.database import Base, engine
+
+config = context.config
+target_metadata = Base.metadata
+
+# Pela linha de comando usa o logging do alembic.ini; dentro da aplicação, o logging dela
+if config.attributes.get("connection") is None and config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        render_as_batch=connection.dialect.name == "sqlite",  # SQLite não tem ALTER completo: recria a tabela
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline():
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    with engine.connect() as connection:
+        run_migrations(connection)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
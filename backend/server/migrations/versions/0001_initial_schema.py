@@ -0,0 +1,148 @@
+"""Esquema inicial (o mesmo que o create_all gerava antes das migrações)
+
+Bancos criados antes do Alembic são marcados nesta revisão por
+database.run_migrations, sem executar o upgrade.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def timestamps():
+    return [sa.Column("created_at", sa.DateTime(), nullable=True), sa.Column("updated_at", sa.DateTime(), nullable=True)]
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("password_hash", sa.String(), nullable=True),
+        sa.Column("role", sa.Enum("ADMIN", "MANAGER", "USER", "READER", name="user_role"), nullable=True),
+        sa.Column("status", sa.Enum("ACTIVE", "INACTIVE", "PENDING", "SUSPENDED", name="user_status"), nullable=True),
+        sa.Column("last_access", sa.DateTime(), nullable=True),
+        sa.Column("avatar_url", sa.String(), nullable=True),
+        sa.Column("avatar_color", sa.String(), nullable=True),
+        sa.Column("initials", sa.String(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        *timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "condominiums",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("cnpj", sa.String(), nullable=True),
+        sa.Column("manager", sa.String(), nullable=True),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=True),
+        sa.Column("units_count", sa.Integer(), nullable=True),
+        sa.Column("meters_count", sa.Integer(), nullable=True),
+        sa.Column("readings_count", sa.Integer(), nullable=True),
+        sa.Column("reports_count", sa.Integer(), nullable=True),
+        *timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_condominiums_id", "condominiums", ["id"])
+    op.create_index("ix_condominiums_name", "condominiums", ["name"])
+    op.create_index("ix_condominiums_cnpj", "condominiums", ["cnpj"], unique=True)
+
+    op.create_table(
+        "measurement_types",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("unit", sa.String(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        *timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_measurement_types_id", "measurement_types", ["id"])
+    op.create_index("ix_measurement_types_name", "measurement_types", ["name"], unique=True)
+
+    op.create_table(
+        "units",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("condominium_id", sa.Integer(), nullable=True),
+        sa.Column("number", sa.String(), nullable=True),
+        sa.Column("owner", sa.String(), nullable=True),
+        sa.Column("meters_count", sa.Integer(), nullable=True),
+        sa.Column("last_reading", sa.DateTime(), nullable=True),
+        sa.Column("observations", sa.String(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["condominium_id"], ["condominiums.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_units_id", "units", ["id"])
+    op.create_index("ix_units_number", "units", ["number"])
+
+    op.create_table(
+        "meters",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("unit_id", sa.Integer(), nullable=True),
+        sa.Column("measurement_type_id", sa.Integer(), nullable=True),
+        sa.Column("serial_number", sa.String(), nullable=True),
+        sa.Column("active", sa.Boolean(), nullable=True),
+        *timestamps(),
+        sa.Column("last_reading_date", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["measurement_type_id"], ["measurement_types.id"]),
+        sa.ForeignKeyConstraint(["unit_id"], ["units.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_meters_id", "meters", ["id"])
+    op.create_index("ix_meters_serial_number", "meters", ["serial_number"])
+
+    op.create_table(
+        "readings",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("meter_id", sa.Integer(), nullable=True),
+        sa.Column("current_reading", sa.String(), nullable=True),
+        sa.Column("date", sa.DateTime(), nullable=True),
+        sa.Column("registered_by", sa.Integer(), nullable=True),
+        sa.Column("status", sa.Enum("PENDING", "COMPLETED", "INACCESSIBLE", name="reading_status"), nullable=True),
+        sa.Column("inaccessible_reason", sa.String(), nullable=True),
+        sa.Column("observations", sa.String(), nullable=True),
+        sa.Column("model_version", sa.String(), nullable=True),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["meter_id"], ["meters.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["registered_by"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_readings_id", "readings", ["id"])
+
+    op.create_table(
+        "reading_photos",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("reading_id", sa.Integer(), nullable=True),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("cropped_file_path", sa.String(), nullable=True),
+        sa.Column("is_cropped", sa.Boolean(), nullable=True),
+        sa.Column("timestamp", sa.DateTime(), nullable=True),
+        *timestamps(),
+        sa.ForeignKeyConstraint(["reading_id"], ["readings.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_reading_photos_id", "reading_photos", ["id"])
+
+
+def downgrade():
+    for table in ("reading_photos", "readings", "meters", "units", "measurement_types", "condominiums", "users"):
+        op.drop_table(table)
+    for enum_name in ("reading_status", "user_status", "user_role"):
+        sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
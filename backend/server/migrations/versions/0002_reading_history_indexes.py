@@ -0,0 +1,35 @@
+"""Índices das consultas de histórico de leituras e das chaves estrangeiras mais consultadas
+
+- readings (meter_id, date DESC): histórico de um medidor, mais recentes primeiro;
+- readings (status, meter_id, id): última leitura COMPLETED por medidor (reading_validation);
+- units (condominium_id, number): unidades de um condomínio e busca pelo número;
+- meters (unit_id) e reading_photos (reading_id): medidores da unidade e fotos da leitura.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_readings_meter_id_date", "readings", ["meter_id", sa.text("date DESC")])
+    op.create_index("ix_readings_status_meter_id_id", "readings", ["status", "meter_id", "id"])
+    op.create_index("ix_units_condominium_id_number", "units", ["condominium_id", "number"])
+    op.create_index("ix_meters_unit_id", "meters", ["unit_id"])
+    op.create_index("ix_reading_photos_reading_id", "reading_photos", ["reading_id"])
+
+
+def downgrade():
+    op.drop_index("ix_reading_photos_reading_id", table_name="reading_photos")
+    op.drop_index("ix_meters_unit_id", table_name="meters")
+    op.drop_index("ix_units_condominium_id_number", table_name="units")
+    op.drop_index("ix_readings_status_meter_id_id", table_name="readings")
+    op.drop_index("ix_readings_meter_id_date", table_name="readings")
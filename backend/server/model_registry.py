@@ -0,0 +1,251 @@
+"""
+Registro do modelo YOLOv8-OBB com carregamento sob demanda.
+
+O backend de inferência (torch, onnx ou openvino, ver detector_backends.py) só
+é importado quando o modelo é carregado: no primeiro uso ou no hook de startup
+da aplicação. Processos que não fazem inferência (init_db.py, scripts, testes)
+não pagam esse custo.
+
+Cada modelo carregado tem uma versão (nome do arquivo e hash dos pesos), que
+vai junto com cada resultado e é gravada na leitura. Novos pesos podem ser
+carregados com `swap` enquanto o modelo atual continua atendendo; a troca é
+atômica e só acontece depois do aquecimento.
+"""
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configurações
+MODEL_V8_PATH = os.getenv("MODEL_V8_PATH", os.path.join(os.path.dirname(__file__), "best-obb.pt"))
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")  # "torch", "onnx", "openvino" ou "onnx_int8"
+MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "1") == "1"  # Carregar no startup em vez do primeiro /detect/
+MODEL_WARMUP_RUNS = int(os.getenv("MODEL_WARMUP_RUNS", "1"))
+MODEL_WARMUP_SIZE = int(os.getenv("MODEL_WARMUP_SIZE", "640"))
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.dirname(os.path.abspath(MODEL_V8_PATH)))  # Pesos aceitos pelo /model/swap
+
+
+def resolve_weights(weights_path: str, backend_name: str) -> str:
+    """
+    Arquivo de pesos que o backend vai ler: o .pt ou, nos backends onnx/openvino, o .onnx exportado ao lado.
+    """
+    onnx_path = os.path.splitext(weights_path)[0] + ".onnx"
+    if backend_name != "torch" and os.path.exists(onnx_path):
+        return onnx_path
+    return weights_path
+
+
+def model_version(weights_path: str, backend_name: str) -> str:
+    """
+    Versão dos pesos: nome do arquivo e prefixo do SHA-256 do conteúdo (ex.: best-obb-3f2a9c1d).
+    """
+    path = resolve_weights(weights_path, backend_name)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return f"{os.path.splitext(os.path.basename(weights_path))[0]}-{digest.hexdigest()[:8]}"
+
+
+def warmup_backend(backend, runs: int = MODEL_WARMUP_RUNS, size: int = MODEL_WARMUP_SIZE) -> float:
+    """
+    Executa inferências em uma imagem vazia para inicializar os kernels. Retorna o tempo gasto.
+    """
+    image = np.zeros((size, size, 3), dtype=np.uint8)
+    start = time.perf_counter()
+    for _ in range(runs):
+        backend.predict([image], conf=0.3, iou=0.4)
+    return time.perf_counter() - start
+
+
+class ModelRegistry:
+    """
+    Mantém o modelo carregado no processo e o estado do carregamento.
+
+    Estados: not_loaded, loading, ready, missing (arquivo de pesos ausente) e error.
+    """
+
+    def __init__(self, weights_path: str, backend_name: str):
+        self.weights_path = weights_path
+        self.backend_name = backend_name
+        self.backend = None
+        self.version = None
+        self.previous_version = None
+        self.status = "not_loaded"
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.swapping = False
+        # (backend, versão) lidos juntos por get_active: um lote nunca mistura modelo e versão
+        self._active = (None, None)
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+
+    def configure(self, weights_path: str, backend_name: str):
+        """
+        Define os pesos antes do primeiro carregamento (workers de um pool novo, ver inference.swap_model).
+        """
+        with self._lock:
+            self.weights_path = weights_path
+            self.backend_name = backend_name
+            self.backend = None
+            self.version = None
+            self._active = (None, None)
+            self.status = "not_loaded"
+
+    def get(self):
+        """
+        Retorna o backend do modelo, carregando-o na primeira chamada. Retorna None se não estiver disponível.
+
+        Se o carregamento estiver em andamento em outra thread, aguarda o término.
+        """
+        return self.get_active()[0]
+
+    def get_active(self) -> tuple:
+        """
+        Retorna (backend, versão) do modelo atual, carregando-o na primeira chamada.
+        """
+        if self.status in ("not_loaded", "loading"):
+            self.load()
+        return self._active
+
+    def load(self):
+        """
+        Cria o backend configurado e carrega os pesos (apenas uma vez por processo).
+        """
+        with self._lock:
+            if self.status != "not_loaded":
+                return self.backend
+
+            if not os.path.exists(resolve_weights(self.weights_path, self.backend_name)):
+                logger.warning("Modelo YOLOv8 não encontrado", extra={"weights": self.weights_path})
+                self.status = "missing"
+                return None
+
+            self.status = "loading"
+            start = time.perf_counter()
+            try:
+                from detector_backends import create_backend
+
+                self.backend = create_backend(self.backend_name, self.weights_path)
+                self.version = model_version(self.weights_path, self.backend_name) + getattr(
+                    self.backend, "version_suffix", ""
+                )
+            except Exception as e:
+                logger.exception("Erro ao carregar o modelo YOLOv8", extra={"weights": self.weights_path})
+                self.status = "error"
+                self.error = str(e)
+                return None
+
+            self.load_seconds = time.perf_counter() - start
+            self._active = (self.backend, self.version)
+            self.status = "ready"
+            logger.info(
+                "Modelo YOLOv8 carregado com sucesso",
+                extra={
+                    "weights": self.weights_path,
+                    "backend": self.backend_name,
+                    "version": self.version,
+                    "load_seconds": self.load_seconds,
+                },
+            )
+            return self.backend
+
+    def swap(self, weights_path: str, backend_name: str = None) -> dict:
+        """
+        Carrega e aquece novos pesos enquanto o modelo atual continua atendendo, e troca ao final.
+
+        Lotes já em execução terminam com o modelo antigo; os seguintes usam o
+        novo. Se o carregamento falhar, o modelo atual é mantido.
+
+        Raises:
+            FileNotFoundError: Arquivo de pesos ausente
+        """
+        backend_name = backend_name or self.backend_name
+        if not os.path.exists(resolve_weights(weights_path, backend_name)):
+            raise FileNotFoundError(weights_path)
+
+        from detector_backends import create_backend
+
+        with self._swap_lock:
+            self.swapping = True
+            try:
+                start = time.perf_counter()
+                backend = create_backend(backend_name, weights_path)
+                version = model_version(weights_path, backend_name) + getattr(backend, "version_suffix", "")
+                load_seconds = time.perf_counter() - start
+                warmup_seconds = warmup_backend(backend) if MODEL_WARMUP_RUNS > 0 else None
+            finally:
+                self.swapping = False
+
+            with self._lock:
+                self.previous_version = self.version
+                self.weights_path = weights_path
+                self.backend_name = backend_name
+                self.backend = backend
+                self.version = version
+                self._active = (backend, version)
+                self.status = "ready"
+                self.error = None
+                self.load_seconds = load_seconds
+                self.warmup_seconds = warmup_seconds
+
+        logger.info(
+            "Modelo YOLOv8 trocado",
+            extra={"version": version, "previous_version": self.previous_version, "backend": backend_name},
+        )
+        return self.get_status()
+
+    def set_backend(self, backend, name: str, version: str = None):
+        """
+        Usa um backend já instanciado (benchmarks e testes com modelo substituto).
+        """
+        with self._lock:
+            self.backend = backend
+            self.backend_name = name
+            self.version = version or name
+            self._active = (backend, self.version)
+            self.status = "ready"
+            self.error = None
+
+    def warmup(self, runs: int = MODEL_WARMUP_RUNS, size: int = MODEL_WARMUP_SIZE):
+        """
+        Executa inferências em uma imagem vazia para inicializar os kernels antes da primeira requisição.
+        """
+        backend = self.get()
+        if backend is None or runs <= 0:
+            return
+        self.warmup_seconds = warmup_backend(backend, runs, size)
+
+    def get_status(self) -> dict:
+        return {
+            "status": self.status,
+            "weights": os.path.basename(self.weights_path),
+            "backend": self.backend_name,
+            "version": self.version,
+            "previous_version": self.previous_version,
+            "swapping": self.swapping,
+            "device": getattr(self.backend, "device", None),
+            "quantization": getattr(self.backend, "quantization", None),
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+registry = ModelRegistry(MODEL_V8_PATH, INFERENCE_BACKEND)
+
+
+def preload_model() -> dict:
+    """
+    Carrega e aquece o modelo no processo atual; usado no startup e nos workers do pool.
+    """
+    registry.load()
+    registry.warmup()
+    return registry.get_status()
@@ -0,0 +1,193 @@
+"""
+NMS com IoU rotacionado para as caixas OBB (x_c, y_c, w, h, rotação) do detector.
+
+Implementação apenas com NumPy. Os pares de caixas são pré-filtrados pelos
+limites alinhados aos eixos: a interseção de duas caixas rotacionadas está
+contida na interseção das suas caixas envolventes, o que dá um limite superior
+barato para o IoU. Só os pares que podem passar do limiar têm a interseção
+exata calculada.
+"""
+import numpy as np
+
+_EPS = 1e-9
+_NEXT = np.array([1, 2, 3, 0])
+_NEXT_CANDIDATE = np.roll(np.arange(24), -1)
+
+
+def _geometry(xywhr: np.ndarray):
+    """
+    Vértices (N, 4, 2), cossenos, senos e meias dimensões de cada caixa.
+    """
+    cos = np.cos(xywhr[:, 4])
+    sin = np.sin(xywhr[:, 4])
+    half_w = xywhr[:, 2] / 2
+    half_h = xywhr[:, 3] / 2
+    wx, wy = half_w * cos, half_w * sin
+    hx, hy = -half_h * sin, half_h * cos
+    x, y = xywhr[:, 0], xywhr[:, 1]
+    corners = np.empty((len(xywhr), 4, 2))
+    corners[:, 0, 0], corners[:, 0, 1] = x + wx + hx, y + wy + hy
+    corners[:, 1, 0], corners[:, 1, 1] = x + wx - hx, y + wy - hy
+    corners[:, 2, 0], corners[:, 2, 1] = x - wx - hx, y - wy - hy
+    corners[:, 3, 0], corners[:, 3, 1] = x - wx + hx, y - wy + hy
+    return corners, cos, sin, half_w, half_h
+
+
+def xywhr_to_corners(xywhr: np.ndarray) -> np.ndarray:
+    """
+    Converte caixas (N, 5) em seus quatro vértices (N, 4, 2), na mesma convenção do ultralytics.
+    """
+    return _geometry(np.asarray(xywhr, dtype=np.float64))[0]
+
+
+def xywhr_to_aabb(xywhr: np.ndarray) -> np.ndarray:
+    """
+    Caixa alinhada aos eixos (x1, y1, x2, y2) que envolve cada caixa rotacionada.
+    """
+    cos = np.abs(np.cos(xywhr[:, 4]))
+    sin = np.abs(np.sin(xywhr[:, 4]))
+    extent_x = (xywhr[:, 2] * cos + xywhr[:, 3] * sin) / 2
+    extent_y = (xywhr[:, 2] * sin + xywhr[:, 3] * cos) / 2
+    return np.stack(
+        (xywhr[:, 0] - extent_x, xywhr[:, 1] - extent_y, xywhr[:, 0] + extent_x, xywhr[:, 1] + extent_y),
+        axis=1,
+    )
+
+
+def _points_inside(points, center, cos, sin, half_w, half_h) -> np.ndarray:
+    """
+    Máscara (P, K) dos pontos (P, K, 2) contidos (com tolerância) na caixa correspondente.
+    """
+    dx = points[..., 0] - center[:, 0:1]
+    dy = points[..., 1] - center[:, 1:2]
+    cos, sin = cos[:, None], sin[:, None]
+    half_w, half_h = half_w[:, None], half_h[:, None]
+    along_w = np.abs(dx * cos + dy * sin)
+    along_h = np.abs(dy * cos - dx * sin)
+    return (along_w <= half_w * (1 + 2e-6) + 1e-6) & (along_h <= half_h * (1 + 2e-6) + 1e-6)
+
+
+def _pair_intersection(xywhr, geometry, rows, cols) -> np.ndarray:
+    """
+    Área de interseção entre as caixas rows[k] e cols[k], reaproveitando a geometria pré-calculada.
+
+    O polígono de interseção é formado pelos vértices de cada caixa contidos na
+    outra e pelos cruzamentos entre as arestas (até 24 candidatos por par).
+    Os candidatos válidos são ordenados pelo ângulo em torno do centróide e a
+    área é obtida pela fórmula do laço (shoelace).
+    """
+    corners, cos, sin, half_w, half_h = geometry
+    corners_a = corners[rows]
+    corners_b = corners[cols]
+    n_pairs = len(rows)
+
+    # Cruzamentos aresta × aresta: p + t·r = q + u·s
+    p = corners_a[:, :, None, :]
+    r = (corners_a[:, _NEXT] - corners_a)[:, :, None, :]
+    q = corners_b[:, None, :, :]
+    s = (corners_b[:, _NEXT] - corners_b)[:, None, :, :]
+    qp = q - p
+    denom = r[..., 0] * s[..., 1] - r[..., 1] * s[..., 0]
+    parallel = np.abs(denom) < _EPS
+    denom[parallel] = 1.0
+    t = (qp[..., 0] * s[..., 1] - qp[..., 1] * s[..., 0]) / denom
+    u = (qp[..., 0] * r[..., 1] - qp[..., 1] * r[..., 0]) / denom
+    crossing_valid = ~parallel & (t >= -_EPS) & (t <= 1 + _EPS) & (u >= -_EPS) & (u <= 1 + _EPS)
+    crossings = p + t[..., None] * r
+
+    points = np.concatenate((corners_a, corners_b, crossings.reshape(n_pairs, 16, 2)), axis=1)
+    valid = np.concatenate(
+        (
+            _points_inside(corners_a, xywhr[cols], cos[cols], sin[cols], half_w[cols], half_h[cols]),
+            _points_inside(corners_b, xywhr[rows], cos[rows], sin[rows], half_w[rows], half_h[rows]),
+            crossing_valid.reshape(n_pairs, 16),
+        ),
+        axis=1,
+    )
+
+    counts = valid.sum(axis=1)
+    centroids = (points * valid[..., None]).sum(axis=1) / np.maximum(counts, 1)[:, None]
+    relative = points - centroids[:, None, :]
+
+    # Pontos inválidos recebem ângulo acima de π e vão para o fim da ordenação
+    angles = np.where(valid, np.arctan2(relative[..., 1], relative[..., 0]), 4.0)
+    order = np.argsort(angles, axis=1)
+    pair_index = np.arange(n_pairs)[:, None]
+    relative = relative[pair_index, order]
+    valid = valid[pair_index, order]
+
+    # Repetir o primeiro ponto no lugar dos inválidos fecha o polígono sem somar área
+    relative = np.where(valid[..., None], relative, relative[:, 0:1, :])
+    following = relative[:, _NEXT_CANDIDATE]
+    area = np.abs((relative[..., 0] * following[..., 1] - relative[..., 1] * following[..., 0]).sum(axis=1)) / 2
+    return np.where(counts >= 3, area, 0.0)
+
+
+def rotated_intersection(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Área de interseção entre os pares de caixas rotacionadas boxes_a[i] e boxes_b[i].
+
+    Args:
+        boxes_a (np.ndarray): Caixas (P, 5) em xywhr
+        boxes_b (np.ndarray): Caixas (P, 5) em xywhr
+
+    Returns:
+        np.ndarray: Áreas (P,)
+    """
+    boxes = np.concatenate((boxes_a, boxes_b)).astype(np.float64)
+    n_pairs = len(boxes_a)
+    if n_pairs == 0:
+        return np.zeros(0)
+    index = np.arange(n_pairs)
+    return _pair_intersection(boxes, _geometry(boxes), index, index + n_pairs)
+
+
+def rotated_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    IoU entre os pares de caixas rotacionadas boxes_a[i] e boxes_b[i].
+    """
+    inter = rotated_intersection(boxes_a, boxes_b)
+    union = boxes_a[:, 2] * boxes_a[:, 3] + boxes_b[:, 2] * boxes_b[:, 3] - inter
+    return inter / np.maximum(union, _EPS)
+
+
+def rotated_nms(xywhr: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    NMS guloso com IoU rotacionado.
+
+    Args:
+        xywhr (np.ndarray): Caixas (N, 5) em xywhr
+        scores (np.ndarray): Confianças (N,)
+        iou_threshold (float): Caixas com IoU acima deste valor são suprimidas
+
+    Returns:
+        np.ndarray: Índices mantidos, em ordem decrescente de confiança (como torchvision.ops.nms)
+    """
+    n = len(xywhr)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    order = np.argsort(-scores, kind="stable")
+    boxes = np.asarray(xywhr, dtype=np.float64)[order]
+
+    # Pré-filtro: IoU rotacionado ≤ interseção das envolventes / (área_a + área_b − essa interseção)
+    aabb = xywhr_to_aabb(boxes)
+    inter_w = np.minimum(aabb[:, None, 2], aabb[None, :, 2]) - np.maximum(aabb[:, None, 0], aabb[None, :, 0])
+    inter_h = np.minimum(aabb[:, None, 3], aabb[None, :, 3]) - np.maximum(aabb[:, None, 1], aabb[None, :, 1])
+    aabb_inter = np.maximum(inter_w, 0) * np.maximum(inter_h, 0)
+    areas = boxes[:, 2] * boxes[:, 3]
+    bound = aabb_inter / np.maximum(areas[:, None] + areas[None, :] - aabb_inter, _EPS)
+    rows, cols = np.nonzero(np.triu(bound > iou_threshold, k=1))
+
+    suppress = np.zeros((n, n), dtype=bool)
+    if len(rows):
+        inter = _pair_intersection(boxes, _geometry(boxes), rows, cols)
+        union = areas[rows] + areas[cols] - inter
+        suppress[rows, cols] = inter > iou_threshold * np.maximum(union, _EPS)
+
+    keep = np.ones(n, dtype=bool)
+    for i in np.nonzero(suppress.any(axis=1))[0]:
+        if keep[i]:
+            keep &= ~suppress[i]
+
+    return order[keep]
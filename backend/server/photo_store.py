@@ -0,0 +1,184 @@
+"""
+Gravação das fotos das leituras em segundo plano.
+
+O /detect/ devolve a leitura assim que a detecção termina; gravar a foto em
+uploads/, recortar o visor (caixa da classe 10) e registrar o ReadingPhoto
+ficam a cargo desta fila. A fila é limitada (PHOTO_QUEUE_SIZE): se os
+gravadores não acompanharem, o /detect/ aguarda uma vaga em vez de acumular
+fotos na memória.
+
+Cada tarefa é idempotente: arquivos que já existem (foto reenviada, servida
+pelo cache de detecções) não são gravados de novo; só o registro é criado.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from dbmodels.database import SessionLocal
+from dbmodels.reading_photos import ReadingPhoto
+from image_io import crop_image, store_image
+from metrics import STAGE_SECONDS
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configurações
+PHOTO_QUEUE_SIZE = int(os.getenv("PHOTO_QUEUE_SIZE", "64"))
+PHOTO_WRITERS = int(os.getenv("PHOTO_WRITERS", "2"))
+
+
+def cropped_path_for(image_path: str) -> str:
+    """
+    Caminho do recorte do visor correspondente a uma foto.
+    """
+    root, ext = os.path.splitext(image_path)
+    return f"{root}_crop{ext}"
+
+
+def write_photo_files(contents: bytes, image_path: str, box) -> dict:
+    """
+    Grava a foto e o recorte do visor, pulando os arquivos que já existem.
+
+    Returns:
+        dict: Caminhos gravados (file_path, cropped_file_path)
+    """
+    if not os.path.exists(image_path):
+        store_image(contents, image_path)
+
+    cropped_file_path = None
+    if box is not None:
+        crop_path = cropped_path_for(image_path)
+        if os.path.exists(crop_path) or crop_image(image_path, box, crop_path):
+            cropped_file_path = crop_path
+    return {"file_path": image_path, "cropped_file_path": cropped_file_path}
+
+
+def photo_record(paths: dict, **kwargs) -> ReadingPhoto:
+    """
+    ReadingPhoto correspondente aos arquivos gravados por `write_photo_files`.
+    """
+    return ReadingPhoto(
+        file_path=paths["file_path"],
+        cropped_file_path=paths["cropped_file_path"],
+        is_cropped=paths["cropped_file_path"] is not None,
+        timestamp=datetime.utcnow(),
+        **kwargs,
+    )
+
+
+def persist_photo(reading_id: int, contents: bytes, image_path: str, box) -> dict:
+    """
+    Grava a foto e o recorte do visor e cria o ReadingPhoto da leitura.
+
+    Roda em uma thread do pool de gravação.
+
+    Returns:
+        dict: Caminhos gravados (file_path, cropped_file_path)
+    """
+    paths = write_photo_files(contents, image_path, box)
+    db = SessionLocal()
+    try:
+        db.add(photo_record(paths, reading_id=reading_id))
+        db.commit()
+    finally:
+        db.close()
+    return paths
+
+
+class PhotoStore:
+    """
+    Fila limitada de fotos a gravar, consumida por `writers` tarefas em um pool de threads.
+    """
+
+    def __init__(self, max_queue: int, writers: int):
+        self.max_queue = max_queue
+        self.writers = max(1, writers)
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+        self._pending_paths = {}
+        self.written = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._executor = ThreadPoolExecutor(max_workers=self.writers, thread_name_prefix="photo-writer")
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._writer()) for _ in range(self.writers)]
+
+    async def submit(self, reading_id: int, contents: bytes, image_path: str, box):
+        """
+        Enfileira a gravação da foto de uma leitura; aguarda apenas se a fila estiver cheia.
+        """
+        self._ensure_started()
+        self._pending_paths[image_path] = self._pending_paths.get(image_path, 0) + 1
+        await self._queue.put((reading_id, contents, image_path, box))
+
+    async def write_files(self, contents: bytes, image_path: str, box) -> dict:
+        """
+        Grava apenas os arquivos no pool de gravação, sem criar o ReadingPhoto (usado pelo /detect/batch).
+        """
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, write_photo_files, contents, image_path, box)
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            reading_id, contents, image_path, box = await self._queue.get()
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(self._executor, persist_photo, reading_id, contents, image_path, box)
+                self.written += 1
+                # Fora da requisição: vai direto para o histograma
+                STAGE_SECONDS.observe("photo_write", time.perf_counter() - start)
+            except Exception:
+                self.failed += 1
+                logger.exception("Erro ao gravar a foto da leitura", extra={"reading_id": reading_id, "image_path": image_path})
+            finally:
+                remaining = self._pending_paths[image_path] - 1
+                if remaining:
+                    self._pending_paths[image_path] = remaining
+                else:
+                    del self._pending_paths[image_path]
+                self._queue.task_done()
+
+    def exists(self, image_path: str) -> bool:
+        """
+        True se a foto já foi gravada ou está na fila para ser gravada.
+        """
+        return image_path in self._pending_paths or os.path.exists(image_path)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def stop(self):
+        """
+        Grava as fotos ainda na fila e encerra os gravadores (shutdown da aplicação).
+        """
+        if self._queue is None:
+            return
+        await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+        self._queue = None
+        self._tasks = []
+        self._executor = None
+
+    def get_stats(self) -> dict:
+        return {
+            "writers": self.writers,
+            "max_queue": self.max_queue,
+            "queue_depth": self.queue_depth(),
+            "pending": sum(self._pending_paths.values()),
+            "written": self.written,
+            "failed": self.failed,
+        }
+
+
+photo_store = PhotoStore(PHOTO_QUEUE_SIZE, PHOTO_WRITERS)
@@ -0,0 +1,186 @@
+"""
+Inferência INT8 na CPU (INFERENCE_BACKEND=onnx_int8).
+
+O modelo ONNX é quantizado uma única vez com a quantização dinâmica do
+onnxruntime (pesos em INT8, ativações quantizadas em tempo de execução) e o
+artefato fica ao lado dos pesos (best-obb.int8.onnx).
+
+Antes de ser usado, o modelo INT8 passa por uma verificação de acurácia: o
+FP32 e o INT8 leem as fotos rotuladas do conjunto de validação e o INT8 só é
+ativado se a acurácia por dígito dele for ao menos QUANT_MIN_RELATIVE_ACCURACY
+da do FP32; caso contrário, o backend carregado é o ONNX FP32. O resultado da
+verificação fica em best-obb.int8.json e só é refeito quando o artefato ou o
+conjunto de validação mudam.
+
+O conjunto de validação é obrigatório: fotos reais de medidores no formato
+de validation_set.py (labels.json com {arquivo: leitura}, ou a leitura no
+prefixo do nome do arquivo), em QUANT_VALIDATION_DIR ou, por padrão, em
+validation/ ao lado dos pesos (backend/server/validation/ com os pesos
+padrão). Sem ele, o startup com INFERENCE_BACKEND=onnx_int8 falha com
+RuntimeError, assim como a carga do backend (ex.: /model/swap ou
+SHADOW_BACKEND=onnx_int8).
+
+O formato do resultado do detector não muda: o backend INT8 é só mais um
+backend de detector_backends.py.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from detector_backends import ONNX_THREADS, OnnxObbBackend, export_onnx
+from app_logging import get_logger
+from validation_set import LABELS_FILE, accuracy, load_labeled_photos
+
+logger = get_logger(__name__)
+
+# Configurações
+QUANT_VALIDATION_DIR = os.getenv("QUANT_VALIDATION_DIR", "")  # Padrão: validation/ ao lado dos pesos
+QUANT_MIN_RELATIVE_ACCURACY = float(os.getenv("QUANT_MIN_RELATIVE_ACCURACY", "0.98"))
+
+
+def validation_dir_for(weights_path: str) -> str:
+    return QUANT_VALIDATION_DIR or os.path.join(os.path.dirname(os.path.abspath(weights_path)), "validation")
+
+
+def require_validation_set(weights_path: str) -> list:
+    """
+    Fotos rotuladas do conjunto de validação do INT8.
+
+    Raises:
+        RuntimeError: Conjunto ausente ou vazio (o INT8 não é ativado sem verificação de acurácia)
+    """
+    validation_dir = validation_dir_for(weights_path)
+    fixtures = load_labeled_photos(validation_dir)
+    if not fixtures:
+        raise RuntimeError(
+            f"INFERENCE_BACKEND=onnx_int8 exige um conjunto de validação: nenhuma foto rotulada em {validation_dir}. "
+            f"Defina QUANT_VALIDATION_DIR com fotos de medidores e um {LABELS_FILE} ({{arquivo: leitura}}) "
+            f"ou a leitura no prefixo do nome (12345_foto.jpg)"
+        )
+    return fixtures
+
+
+def int8_path_for(onnx_path: str) -> str:
+    return os.path.splitext(onnx_path)[0] + ".int8.onnx"
+
+
+def quantize_onnx(onnx_path: str) -> str:
+    """
+    Quantiza o modelo ONNX para INT8 uma única vez; o artefato fica ao lado do modelo FP32.
+
+    Returns:
+        str: Caminho do .int8.onnx (reaproveitado se for mais novo que o FP32)
+    """
+    int8_path = int8_path_for(onnx_path)
+    if os.path.exists(int8_path) and os.path.getmtime(int8_path) >= os.path.getmtime(onnx_path):
+        return int8_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    logger.info("Quantizando o modelo para INT8", extra={"onnx": onnx_path})
+    # Grava em um arquivo temporário e renomeia: workers iniciando juntos não leem um modelo pela metade
+    fd, tmp_path = tempfile.mkstemp(suffix=".onnx", dir=os.path.dirname(int8_path) or ".")
+    os.close(fd)
+    try:
+        # ConvInteger na CPU só aceita pesos uint8
+        quantize_dynamic(onnx_path, tmp_path, weight_type=QuantType.QUInt8)
+        os.replace(tmp_path, int8_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return int8_path
+
+
+class OnnxInt8ObbBackend(OnnxObbBackend):
+    """
+    Modelo ONNX com pesos quantizados em INT8, executado pelo onnxruntime (CPU).
+    """
+
+    name = "onnx_int8"
+    version_suffix = "-int8"
+
+    def __init__(self, weights_path: str, threads: int = ONNX_THREADS):
+        fp32_path = weights_path if weights_path.endswith(".onnx") else export_onnx(weights_path)
+        super().__init__(quantize_onnx(fp32_path), threads)
+        self.fp32_path = fp32_path
+
+
+def evaluate(backend, fixtures: list) -> dict:
+    """
+    Acurácia do backend nas fotos rotuladas, com a mesma decodificação e pós-processamento do /detect/.
+    """
+    from image_io import decode_image
+    from utilits import postprocess_obb
+
+    predictions = []
+    for path, _ in fixtures:
+        with open(path, "rb") as f:
+            image_np = decode_image(f.read())[0]
+        xywhr_boxes, confidences, labels = backend.predict([image_np], conf=0.3, iou=0.4)[0]
+        predictions.append(postprocess_obb(xywhr_boxes, confidences, labels)["number_detected"])
+    return accuracy(predictions, [label for _, label in fixtures])
+
+
+def _gate_key(int8_path: str, fixtures: list) -> str:
+    digest = hashlib.sha256()
+    digest.update(f"{os.path.getmtime(int8_path)}:{QUANT_MIN_RELATIVE_ACCURACY}".encode())
+    for path, label in fixtures:
+        digest.update(f"{os.path.basename(path)}:{label}:{os.path.getsize(path)}".encode())
+    return digest.hexdigest()
+
+
+def accuracy_gate(fp32_backend, int8_backend, fixtures: list) -> dict:
+    """
+    Compara FP32 e INT8 nas fotos rotuladas (resultado em cache ao lado do artefato INT8).
+
+    Returns:
+        dict: accepted, reason, fp32 e int8 (exact_match, digit_accuracy), relative_accuracy
+    """
+    report_path = os.path.splitext(int8_backend.onnx_path)[0] + ".json"
+    key = _gate_key(int8_backend.onnx_path, fixtures)
+    if os.path.exists(report_path):
+        with open(report_path) as f:
+            report = json.load(f)
+        if report.get("key") == key:
+            return report
+
+    fp32 = evaluate(fp32_backend, fixtures)
+    int8 = evaluate(int8_backend, fixtures)
+    report = {"key": key, "images": len(fixtures), "fp32": fp32, "int8": int8, "relative_accuracy": None}
+    if fp32["digit_accuracy"] <= 0:
+        report.update(accepted=False, reason="O modelo FP32 não acerta nenhum dígito do conjunto de validação")
+    else:
+        report["relative_accuracy"] = int8["digit_accuracy"] / fp32["digit_accuracy"]
+        report["accepted"] = report["relative_accuracy"] >= QUANT_MIN_RELATIVE_ACCURACY
+        report["reason"] = None if report["accepted"] else (
+            f"Acurácia INT8 abaixo de {QUANT_MIN_RELATIVE_ACCURACY:.0%} da FP32"
+        )
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def create_int8_backend(weights_path: str):
+    """
+    Backend INT8 se ele passar na verificação de acurácia; senão, o ONNX FP32.
+
+    Raises:
+        RuntimeError: Sem conjunto de validação (ver require_validation_set)
+
+    O backend devolvido tem o atributo `quantization` com o relatório da verificação.
+    """
+    fixtures = require_validation_set(weights_path)
+    int8_backend = OnnxInt8ObbBackend(weights_path)
+    fp32_backend = OnnxObbBackend(int8_backend.fp32_path, int8_backend.threads)
+    report = accuracy_gate(fp32_backend, int8_backend, fixtures)
+    if not report["accepted"]:
+        logger.warning(
+            "Modelo INT8 recusado; usando o ONNX FP32",
+            extra={"reason": report["reason"], "relative_accuracy": report.get("relative_accuracy")},
+        )
+        fp32_backend.quantization = report
+        return fp32_backend
+    logger.info("Modelo INT8 ativado", extra={"relative_accuracy": report["relative_accuracy"]})
+    int8_backend.quantization = report
+    return int8_backend
@@ -0,0 +1,219 @@
+"""
+Validação das leituras detectadas contra o histórico do medidor.
+
+Uma leitura é suspeita quando volta para trás, quando salta muito acima da
+anterior (dígito a mais ou a menos), quando não é numérica ou quando a
+confiança do detector é baixa. Leituras suspeitas são gravadas como PENDING
+para revisão, em vez de COMPLETED.
+
+A última leitura aceita de cada medidor fica em memória (MeterHistory): o
+índice é carregado com uma única consulta no startup e atualizado a cada
+leitura gravada, então a validação é um acesso a dicionário por requisição,
+sem consulta ao banco. Medidores invalidados (leitura corrigida ou excluída)
+são recarregados individualmente na próxima vez em que forem consultados;
+no /detect/, essa consulta roda no executor padrão, fora do event loop.
+
+O índice é de cada processo: um worker do uvicorn não vê as leituras gravadas
+pelos outros. Com WEB_CONCURRENCY > 1, a última leitura é consultada no banco
+a cada validação (VALIDATION_HISTORY_IN_MEMORY=0, índice
+ix_readings_status_meter_id_id).
+"""
+import asyncio
+import os
+import threading
+
+from sqlalchemy import func
+
+from dbmodels.database import SessionLocal
+from dbmodels.readings import Reading, ReadingStatus
+from app_logging import get_logger
+from runtime_config import UVICORN_WORKERS
+
+logger = get_logger(__name__)
+
+# Configurações
+VALIDATION_MIN_CONFIDENCE = float(os.getenv("VALIDATION_MIN_CONFIDENCE", "0.5"))  # Abaixo disso, a leitura fica pendente
+VALIDATION_MAX_GROWTH = float(os.getenv("VALIDATION_MAX_GROWTH", "0.5"))  # Aumento máximo, relativo à leitura anterior
+VALIDATION_MIN_INCREASE = float(os.getenv("VALIDATION_MIN_INCREASE", "100"))  # Aumento sempre aceito, mesmo com leitura anterior baixa
+VALIDATION_RERUN = os.getenv("VALIDATION_RERUN", "1") == "1"  # Relê em resolução alta as leituras suspeitas
+VALIDATION_RERUN_MAX_SIDE = int(os.getenv("VALIDATION_RERUN_MAX_SIDE", "1280"))
+# Índice em memória só é confiável com um único worker gravando leituras
+VALIDATION_HISTORY_IN_MEMORY = os.getenv("VALIDATION_HISTORY_IN_MEMORY", "1" if UVICORN_WORKERS <= 1 else "0") == "1"
+
+
+def parse_reading(value):
+    """
+    Valor numérico de uma leitura (aceita vírgula decimal). Retorna None se não for numérica.
+    """
+    if value is None:
+        return None
+    try:
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+class MeterHistory:
+    """
+    Índice em memória da última leitura aceita (COMPLETED) de cada medidor.
+
+    Com in_memory=False, não guarda nada: toda consulta vai ao banco.
+    """
+
+    def __init__(self, in_memory: bool = True):
+        self.in_memory = in_memory
+        self._values = {}
+        self._stale = set()
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Carrega a última leitura de todos os medidores com uma única consulta (startup).
+        """
+        if not self.in_memory:
+            return
+        db = SessionLocal()
+        try:
+            latest = (
+                db.query(func.max(Reading.id))
+                .filter(Reading.status == ReadingStatus.COMPLETED)
+                .group_by(Reading.meter_id)
+                .scalar_subquery()
+            )
+            rows = db.query(Reading.meter_id, Reading.current_reading).filter(Reading.id.in_(latest)).all()
+        finally:
+            db.close()
+        with self._lock:
+            self._values = {meter_id: parse_reading(value) for meter_id, value in rows}
+            self._stale.clear()
+            self._loaded = True
+        logger.info("Histórico de leituras carregado", extra={"meters": len(rows)})
+
+    def _load_meter(self, meter_id: int):
+        db = SessionLocal()
+        try:
+            row = (
+                db.query(Reading.current_reading)
+                .filter(Reading.meter_id == meter_id, Reading.status == ReadingStatus.COMPLETED)
+                .order_by(Reading.id.desc())
+                .first()
+            )
+        finally:
+            db.close()
+        return parse_reading(row[0]) if row is not None else None
+
+    def _cached(self, meter_id: int) -> tuple:
+        """
+        (encontrado, valor) no índice em memória, sem consultar o banco.
+        """
+        with self._lock:
+            if meter_id in self._values:
+                return True, self._values[meter_id]
+            if self.in_memory and self._loaded and meter_id not in self._stale:
+                return True, None
+        return False, None
+
+    def _store(self, meter_id: int, value):
+        if not self.in_memory:
+            return
+        with self._lock:
+            self._values[meter_id] = value
+            self._stale.discard(meter_id)
+
+    def get(self, meter_id: int):
+        """
+        Última leitura aceita do medidor, ou None se não houver histórico.
+
+        Só consulta o banco se o índice ainda não foi carregado ou se o medidor foi invalidado.
+        """
+        found, value = self._cached(meter_id)
+        if found:
+            return value
+        value = self._load_meter(meter_id)
+        self._store(meter_id, value)
+        return value
+
+    async def get_async(self, meter_id: int):
+        """
+        Como get, para o event loop: a consulta ao banco (se necessária) roda no executor padrão.
+        """
+        found, value = self._cached(meter_id)
+        if found:
+            return value
+        value = await asyncio.get_running_loop().run_in_executor(None, self._load_meter, meter_id)
+        self._store(meter_id, value)
+        return value
+
+    def record(self, meter_id: int, value):
+        """
+        Registra uma leitura aceita como a última do medidor.
+        """
+        number = parse_reading(value)
+        if number is None:
+            return
+        self._store(meter_id, number)
+
+    def invalidate(self, meter_id: int):
+        """
+        Descarta o valor em memória; a próxima consulta relê o medidor no banco.
+        """
+        with self._lock:
+            self._values.pop(meter_id, None)
+            self._stale.add(meter_id)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "in_memory": self.in_memory,
+                "loaded": self._loaded,
+                "meters": len(self._values),
+                "stale": len(self._stale),
+            }
+
+
+meter_history = MeterHistory(VALIDATION_HISTORY_IN_MEMORY)
+
+
+def validate_reading(value: str, confidence, previous) -> tuple:
+    """
+    Verifica se a leitura detectada é plausível diante da leitura anterior do medidor.
+
+    Args:
+        value (str): Número detectado
+        confidence (float): Confiança média dos dígitos (None se nenhum foi reconhecido)
+        previous (float): Última leitura aceita do medidor (None se não houver)
+
+    Returns:
+        tuple: (plausível, motivo em texto ou None)
+    """
+    number = parse_reading(value)
+    if number is None:
+        return False, "leitura não numérica"
+    if confidence is None or confidence < VALIDATION_MIN_CONFIDENCE:
+        return False, "confiança baixa"
+    if previous is None:
+        return True, None
+    if number < previous:
+        return False, f"menor que a leitura anterior ({previous:g})"
+    if number - previous > max(VALIDATION_MIN_INCREASE, previous * VALIDATION_MAX_GROWTH):
+        return False, f"salto grande em relação à leitura anterior ({previous:g})"
+    return True, None
+
+
+def check(meter_id: int, result: dict) -> tuple:
+    """
+    Valida o resultado do detector para o medidor (O(1): usa o índice em memória).
+
+    Returns:
+        tuple: (plausível, motivo em texto ou None)
+    """
+    return validate_reading(result["number_detected"], result["confidence"], meter_history.get(meter_id))
+
+
+async def check_async(meter_id: int, result: dict) -> tuple:
+    """
+    Como check, para o event loop (ver MeterHistory.get_async).
+    """
+    previous = await meter_history.get_async(meter_id)
+    return validate_reading(result["number_detected"], result["confidence"], previous)
@@ -0,0 +1,132 @@
+"""
+Dica de ROI por medidor: posição do visor na última foto de cada medidor.
+
+O mesmo medidor é fotografado todo mês, mais ou menos do mesmo ângulo. Com a
+caixa do visor (classe 10) da última detecção confiável, a próxima foto do
+medidor é lida primeiro só no recorte em volta dessa caixa, em resolução
+reduzida (ROI_IMGSZ); a imagem inteira só é processada se o recorte não der
+uma leitura confiável (ver inference._roi_pass).
+
+A caixa é guardada em frações da largura e da altura, para valer também para
+fotos de outra resolução. Camadas: LRU em memória (ROI_HINTS_SIZE medidores)
+e, opcionalmente, uma tabela SQLite (ROI_HINTS_DB) que sobrevive a reinícios e
+é compartilhada entre os workers do uvicorn. As rotas async usam get_async e
+update_async, que fazem o I/O dessa tabela fora do event loop.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from utilits import accept_roi
+
+# Configurações
+ROI_HINTS_SIZE = int(os.getenv("ROI_HINTS_SIZE", "10000"))  # 0 desativa as dicas
+ROI_HINTS_DB = os.getenv("ROI_HINTS_DB", "")  # Ex.: roi_hints.db
+
+
+class RoiHintStore:
+    """
+    Última caixa do visor de cada medidor, indexada por Meter.id.
+    """
+
+    def __init__(self, max_entries: int, db_path: str = ""):
+        self.max_entries = max_entries
+        self._hints = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.fallbacks = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS roi_hints (meter_id INTEGER PRIMARY KEY, box TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, meter_id: int, hint: tuple):
+        self._hints[meter_id] = hint
+        self._hints.move_to_end(meter_id)
+        while len(self._hints) > self.max_entries:
+            self._hints.popitem(last=False)
+
+    def get(self, meter_id: int):
+        """
+        Dica do medidor (x1, y1, x2, y2 em frações da imagem), ou None.
+        """
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            hint = self._hints.get(meter_id)
+            if hint is None and self._db is not None:
+                row = self._db.execute("SELECT box FROM roi_hints WHERE meter_id = ?", (meter_id,)).fetchone()
+                if row is not None:
+                    hint = tuple(json.loads(row[0]))
+            if hint is not None:
+                self._remember(meter_id, hint)
+            return hint
+
+    async def get_async(self, meter_id: int):
+        """
+        Como get, para o event loop: com a camada SQLite, a busca roda no executor padrão.
+        """
+        if self._db is None:
+            return self.get(meter_id)
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, meter_id)
+
+    def update(self, meter_id: int, result: dict, image_size: tuple):
+        """
+        Guarda a caixa do visor de uma detecção confiável como dica para a próxima foto do medidor.
+
+        Args:
+            result (dict): Resultado do detector (caixa em coordenadas da foto original)
+            image_size (tuple): (largura, altura) da foto
+        """
+        if self.max_entries <= 0 or not accept_roi(result):
+            return
+        width, height = image_size
+        x1, y1, x2, y2 = result["box"]
+        hint = (x1 / width, y1 / height, x2 / width, y2 / height)
+        with self._lock:
+            self._remember(meter_id, hint)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO roi_hints (meter_id, box) VALUES (?, ?)", (meter_id, json.dumps(hint))
+                )
+                self._db.commit()
+
+    async def update_async(self, meter_id: int, result: dict, image_size: tuple):
+        """
+        Como update, para o event loop: com a camada SQLite, a gravação roda no executor padrão.
+        """
+        if self._db is None:
+            self.update(meter_id, result, image_size)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.update, meter_id, result, image_size)
+
+    def record_outcome(self, result: dict):
+        """
+        Contabiliza se a detecção com dica foi resolvida no recorte ou precisou da imagem inteira.
+        """
+        with self._lock:
+            if result.get("roi"):
+                self.hits += 1
+            else:
+                self.fallbacks += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            attempts = self.hits + self.fallbacks
+            return {
+                "enabled": self.max_entries > 0,
+                "persistent": self._db is not None,
+                "meters": len(self._hints),
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "hit_ratio": self.hits / attempts if attempts else 0.0,
+            }
+
+
+roi_hints = RoiHintStore(ROI_HINTS_SIZE, ROI_HINTS_DB)
@@ -1,26 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
 from datetime import datetime
 
-from dbmodels.database import get_db
-from dbmodels.condominiums import Condominium, CondominiumBase, CondominiumCreate, CondominiumUpdate, CondominiumResponse
+from dbmodels.database import get_async_db, get_db, rollback_after_error
+from dbmodels.condominiums import Condominium, CondominiumBase, CondominiumCreate, CondominiumUpdate, CondominiumResponse, CondominiumListResponse
 from dbmodels.units import Unit
 from dbmodels.users import User
-from dependencies import get_current_user, get_manager_or_admin, get_any_authenticated_user
+from dependencies import get_current_user, get_manager_or_admin, get_any_authenticated_user, get_any_authenticated_user_async
 
 router = APIRouter()
 
-@router.get("/", response_model=dict)
-def get_condominiums(
+@router.get("/", response_model=CondominiumListResponse)
+async def get_condominiums(
     skip: int = 0, 
     limit: int = 100, 
     search: str = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_any_authenticated_user)  # Qualquer usuário autenticado pode ver
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_any_authenticated_user_async)  # Qualquer usuário autenticado pode ver
 ):
-    query = db.query(Condominium)
+    query = select(Condominium)
     
     # Aplicar filtro de busca se fornecido
     if search:
@@ -31,10 +33,11 @@ def get_condominiums(
         )
     
     # Contar total de registros
-    total = query.count()
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
     # Aplicar paginação
-    condominiums = query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    condominiums = result.scalars().all()
     
     return {
         "condominiums": condominiums,
@@ -44,12 +47,12 @@ def get_condominiums(
     }
 
 @router.get("/{condominium_id}", response_model=CondominiumResponse)
-def get_condominium(
+async def get_condominium(
     condominium_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_any_authenticated_user)  # Qualquer usuário autenticado pode ver
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_any_authenticated_user_async)  # Qualquer usuário autenticado pode ver
 ):
-    condominium = db.query(Condominium).filter(Condominium.id == condominium_id).first()
+    condominium = await db.get(Condominium, condominium_id)
     if condominium is None:
         raise HTTPException(status_code=404, detail="Condomínio não encontrado")
     return condominium
@@ -73,7 +76,7 @@ def create_condominium(
         db.refresh(db_condominium)
         return db_condominium
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "create_condominium")
         raise HTTPException(status_code=400, detail=f"Erro ao criar condomínio: {str(e)}")
 
 @router.put("/{condominium_id}", response_model=CondominiumResponse)
@@ -102,7 +105,7 @@ def update_condominium(
         db.refresh(db_condominium)
         return db_condominium
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "update_condominium")
         raise HTTPException(status_code=400, detail=f"Erro ao atualizar condomínio: {str(e)}")
 
 @router.delete("/{condominium_id}")
@@ -125,5 +128,5 @@ def delete_condominium(
         db.commit()
         return {"message": "Condomínio excluído com sucesso"}
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "delete_condominium")
         raise HTTPException(status_code=400, detail=f"Erro ao excluir condomínio: {str(e)}")
@@ -1,24 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
 
-from dbmodels.database import get_db
+from dbmodels.database import get_async_db, get_db, rollback_after_error
 from dbmodels.measurement_types import MeasurementType, MeasurementTypeBase, MeasurementTypeCreate, MeasurementTypeUpdate, MeasurementTypeResponse
 from dbmodels.users import User
 from dependencies import get_current_user, get_manager_or_admin, get_any_authenticated_user
+from app_logging import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 @router.get("/", response_model=List[MeasurementTypeResponse])
-def get_measurement_types(
-    db: Session = Depends(get_db)
+async def get_measurement_types(
+    db: AsyncSession = Depends(get_async_db)
     # Temporariamente removendo autenticação para debug
     # current_user: User = Depends(get_any_authenticated_user)
 ):
-    print("Endpoint measurement_types chamado")
-    measurement_types = db.query(MeasurementType).filter(MeasurementType.active == True).all()
-    print(f"Encontrados {len(measurement_types)} tipos de medição")
+    result = await db.execute(select(MeasurementType).filter(MeasurementType.active == True))
+    measurement_types = result.scalars().all()
+    logger.debug("Tipos de medição listados", extra={"count": len(measurement_types)})
     return measurement_types
 
 @router.post("/", response_model=MeasurementTypeResponse)
@@ -37,7 +41,7 @@ def create_measurement_type(measurement_type: MeasurementTypeCreate, db: Session
         db.refresh(db_measurement_type)
         return db_measurement_type
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "create_measurement_type")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/{measurement_type_id}", response_model=MeasurementTypeResponse)
@@ -79,7 +83,7 @@ def update_measurement_type(
         db.refresh(db_measurement_type)
         return db_measurement_type
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "update_measurement_type")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{measurement_type_id}")
@@ -96,5 +100,5 @@ def delete_measurement_type(measurement_type_id: int, db: Session = Depends(get_
         db.commit()
         return {"message": "Tipo de medição desativado com sucesso"}
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "delete_measurement_type")
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 
-from dbmodels.database import get_db
+from dbmodels.database import get_async_db, get_db
 from dbmodels.meters import Meter
 from dbmodels.units import Unit
 
@@ -44,26 +46,26 @@ def create_meter(meter: MeterCreate, db: Session = Depends(get_db)):
     return db_meter
 
 @router.get("/meters/", response_model=List[MeterResponse])
-def list_meters(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    meters = db.query(Meter).offset(skip).limit(limit).all()
-    return meters
+async def list_meters(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(Meter).offset(skip).limit(limit))
+    return result.scalars().all()
 
 @router.get("/meters/{meter_id}", response_model=MeterResponse)
-def get_meter(meter_id: int, db: Session = Depends(get_db)):
-    meter = db.query(Meter).filter(Meter.id == meter_id).first()
+async def get_meter(meter_id: int, db: AsyncSession = Depends(get_async_db)):
+    meter = await db.get(Meter, meter_id)
     if meter is None:
         raise HTTPException(status_code=404, detail="Medidor não encontrado")
     return meter
 
 @router.get("/units/{unit_id}/meters/", response_model=List[MeterResponse])
-def get_meters_by_unit(unit_id: int, db: Session = Depends(get_db)):
+async def get_meters_by_unit(unit_id: int, db: AsyncSession = Depends(get_async_db)):
     # Verifica se a unidade existe
-    unit = db.query(Unit).filter(Unit.id == unit_id).first()
+    unit = await db.get(Unit, unit_id)
     if not unit:
         raise HTTPException(status_code=404, detail="Unidade não encontrada")
         
-    meters = db.query(Meter).filter(Meter.unit_id == unit_id).all()
-    return meters
+    result = await db.execute(select(Meter).filter(Meter.unit_id == unit_id))
+    return result.scalars().all()
 
 @router.put("/meters/{meter_id}", response_model=MeterResponse)
 def update_meter(meter_id: int, meter: MeterUpdate, db: Session = Depends(get_db)):
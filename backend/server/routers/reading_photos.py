@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
 
-from dbmodels.database import get_db
+from dbmodels.database import get_db, rollback_after_error
 from dbmodels.reading_photos import ReadingPhoto, ReadingPhotoResponse, ReadingPhotoCreate, ReadingPhotoUpdate
 from dbmodels.readings import Reading
 
@@ -44,7 +44,7 @@ def create_reading_photo(
         db.refresh(db_photo)
         return db_photo
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "create_reading_photo")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/photos/{photo_id}", response_model=ReadingPhotoResponse)
@@ -67,7 +67,7 @@ def update_reading_photo(
         db.refresh(db_photo)
         return db_photo
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "update_reading_photo")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/photos/{photo_id}")
@@ -81,5 +81,5 @@ def delete_reading_photo(photo_id: int, db: Session = Depends(get_db)):
         db.commit()
         return {"message": "Foto excluída com sucesso"}
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "delete_reading_photo")
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,34 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import List, Optional
 from datetime import datetime
 
-from dbmodels.database import get_db
-from dbmodels.readings import Reading, ReadingResponse, ReadingCreate, ReadingUpdate
+from dbmodels.database import get_async_db, get_db, rollback_after_error
+from dbmodels.readings import Reading, ReadingResponse, ReadingCreate, ReadingUpdate, ReadingStatus
 from dbmodels.meters import Meter
 from dbmodels.readings import ReadingPhoto
 from dbmodels.users import User
-from dependencies import get_current_user, get_reader_or_above, get_any_authenticated_user
+from dependencies import get_current_user, get_reader_or_above, get_any_authenticated_user, get_any_authenticated_user_async
+from reading_validation import meter_history
 
 router = APIRouter()
 
+# Relacionamentos serializados no ReadingResponse, carregados junto com a página (na sessão
+# assíncrona não há lazy load): o medidor no mesmo SELECT (JOIN) e as fotos de todas as
+# leituras em um segundo SELECT ... IN. Uma página custa 2 consultas, qualquer que seja o limit
+READING_RESPONSE_OPTIONS = (selectinload(Reading.photos), joinedload(Reading.meter))
+
 @router.get("/", response_model=List[ReadingResponse])
-def get_readings(
+async def get_readings(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_any_authenticated_user)  # Qualquer usuário autenticado pode ver
+    meter_id: Optional[int] = None,
+    status: Optional[ReadingStatus] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_any_authenticated_user_async)  # Qualquer usuário autenticado pode ver
 ):
-    readings = db.query(Reading).offset(skip).limit(limit).all()
-    return readings
+    query = select(Reading).options(*READING_RESPONSE_OPTIONS)
+    if meter_id is not None:
+        # Histórico do medidor, mais recentes primeiro (índice ix_readings_meter_id_date)
+        query = query.filter(Reading.meter_id == meter_id).order_by(Reading.date.desc())
+    if status is not None:
+        query = query.filter(Reading.status == status)
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
 @router.get("/{reading_id}", response_model=ReadingResponse)
-def get_reading(
+async def get_reading(
     reading_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_any_authenticated_user)  # Qualquer usuário autenticado pode ver
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_any_authenticated_user_async)  # Qualquer usuário autenticado pode ver
 ):
-    reading = db.query(Reading).filter(Reading.id == reading_id).first()
+    result = await db.execute(select(Reading).options(*READING_RESPONSE_OPTIONS).filter(Reading.id == reading_id))
+    reading = result.scalars().first()
     if reading is None:
         raise HTTPException(status_code=404, detail="Leitura não encontrada")
     return reading
@@ -39,6 +56,10 @@ def create_reading(
     reading: ReadingCreate,
     db: Session = Depends(get_db)
 ):
+    # O medidor do caminho e o do corpo precisam ser o mesmo
+    if reading.meter_id != meter_id:
+        raise HTTPException(status_code=400, detail="meter_id do corpo difere do medidor do caminho")
+
     # Verifica se o medidor existe
     meter = db.query(Meter).filter(Meter.id == meter_id).first()
     if not meter:
@@ -62,9 +83,11 @@ def create_reading(
         
         db.commit()
         db.refresh(db_reading)
+        if db_reading.status == ReadingStatus.COMPLETED:
+            meter_history.record(db_reading.meter_id, db_reading.current_reading)
         return db_reading
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "create_reading")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.put("/{reading_id}", response_model=ReadingResponse)
@@ -85,9 +108,11 @@ def update_reading(
         
         db.commit()
         db.refresh(db_reading)
+        # Leitura corrigida: a última leitura do medidor é relida do banco na próxima validação
+        meter_history.invalidate(db_reading.meter_id)
         return db_reading
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "update_reading")
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{reading_id}")
@@ -97,9 +122,11 @@ def delete_reading(reading_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Leitura não encontrada")
     
     try:
+        meter_id = db_reading.meter_id
         db.delete(db_reading)
         db.commit()
+        meter_history.invalidate(meter_id)
         return {"message": "Leitura excluída com sucesso"}
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "delete_reading")
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,34 +1,37 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime
 
-from dbmodels.database import get_db
-from dbmodels.units import Unit, UnitBase, UnitCreate, UnitUpdate, UnitResponse
+from dbmodels.database import get_async_db, get_db, rollback_after_error
+from dbmodels.units import Unit, UnitBase, UnitCreate, UnitUpdate, UnitResponse, UnitListResponse
 from dbmodels.condominiums import Condominium
 from dbmodels.users import User
-from dependencies import get_current_user, get_manager_or_admin, get_any_authenticated_user
+from dependencies import get_current_user, get_manager_or_admin, get_any_authenticated_user, get_any_authenticated_user_async
 
 router = APIRouter()
 
-@router.get("/condominiums/{condominium_id}/units", response_model=dict)
-def get_units(
+@router.get("/condominiums/{condominium_id}/units", response_model=UnitListResponse)
+async def get_units(
     condominium_id: int, 
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_any_authenticated_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_any_authenticated_user_async)
 ):
     # Verifica se o condomínio existe
-    condominium = db.query(Condominium).filter(Condominium.id == condominium_id).first()
+    condominium = await db.get(Condominium, condominium_id)
     if not condominium:
         raise HTTPException(status_code=404, detail="Condomínio não encontrado")
     
     # Contar total
-    total = db.query(Unit).filter(Unit.condominium_id == condominium_id).count()
+    total = await db.scalar(select(func.count()).select_from(Unit).filter(Unit.condominium_id == condominium_id))
     
     # Buscar unidades com paginação
-    units = db.query(Unit).filter(Unit.condominium_id == condominium_id).offset(skip).limit(limit).all()
+    result = await db.execute(select(Unit).filter(Unit.condominium_id == condominium_id).offset(skip).limit(limit))
+    units = result.scalars().all()
     
     return {
         "units": units,
@@ -38,12 +41,12 @@ def get_units(
     }
 
 @router.get("/units/{unit_id}", response_model=UnitResponse)
-def get_unit(
+async def get_unit(
     unit_id: int, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_any_authenticated_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_any_authenticated_user_async)
 ):
-    unit = db.query(Unit).filter(Unit.id == unit_id).first()
+    unit = await db.get(Unit, unit_id)
     if unit is None:
         raise HTTPException(status_code=404, detail="Unidade não encontrada")
     return unit
@@ -82,7 +85,7 @@ def create_unit(
         
         return db_unit
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "create_unit")
         raise HTTPException(status_code=400, detail=f"Erro ao criar unidade: {str(e)}")
 
 @router.put("/condominiums/{condominium_id}/units/{unit_id}", response_model=UnitResponse)
@@ -120,7 +123,7 @@ def update_unit(
         db.refresh(db_unit)
         return db_unit
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "update_unit")
         raise HTTPException(status_code=400, detail=f"Erro ao atualizar unidade: {str(e)}")
 
 @router.delete("/condominiums/{condominium_id}/units/{unit_id}")
@@ -157,5 +160,5 @@ def delete_unit(
         db.commit()
         return {"message": "Unidade excluída com sucesso"}
     except Exception as e:
-        db.rollback()
+        rollback_after_error(db, "delete_unit")
         raise HTTPException(status_code=400, detail=f"Erro ao excluir unidade: {str(e)}")
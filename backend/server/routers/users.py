@@ -7,8 +7,10 @@ from dbmodels.database import get_db
 from dbmodels.users import User, UserCreate, UserUpdate, UserResponse, UserRole
 from auth import verify_password, get_password_hash, create_access_token
 from dependencies import get_current_user, get_admin_user, get_manager_or_admin
+from app_logging import get_logger
 
 router = APIRouter()
+logger = get_logger(__name__)
 
 def can_view_user(current_user: User, target_user: User) -> bool:
     """
@@ -81,14 +83,18 @@ def login(username: str, password: str, db: Session = Depends(get_db)):
         (User.username == username) | (User.email == username)
     ).first()
     
+    # Eventos de segurança: toda tentativa recusada é registrada, sem amostragem
     if not user:
+        logger.info("Login recusado: usuário não encontrado", extra={"username": username})
         raise HTTPException(status_code=401, detail="Usuário não encontrado")
     
     if not user.active:
+        logger.info("Login recusado: usuário inativo", extra={"username": username})
         raise HTTPException(status_code=401, detail="Usuário inativo")
     
     # Verificar senha criptografada
     if not verify_password(password, user.password_hash):
+        logger.info("Login recusado: senha incorreta", extra={"username": username})
         raise HTTPException(status_code=401, detail="Senha incorreta")
     
     # Atualizar último acesso
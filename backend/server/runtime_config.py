@@ -0,0 +1,190 @@
+"""
+Configuração do runtime de inferência por processo: threads, afinidade de CPU e alocador.
+
+Sem configuração, cada instância do torch (e do onnxruntime) usa todos os
+núcleos da máquina. Com vários workers do uvicorn (WEB_CONCURRENCY) ou vários
+processos de inferência (INFERENCE_EXECUTOR=process), essas instâncias
+disputam os mesmos núcleos e a vazão total cai. Aqui os núcleos disponíveis
+são divididos entre os processos que executam inferência:
+
+- threads intra-op: núcleos / processos de inferência na máquina (TORCH_THREADS
+  ou ONNX_THREADS fixam o valor);
+- threads inter-op do torch: TORCH_INTEROP_THREADS (o modelo é sequencial);
+- INFERENCE_PIN_CORES=1: cada processo reserva uma fatia fixa dos núcleos
+  (sched_setaffinity). A fatia é escolhida por um lock de arquivo, então
+  funciona entre workers do uvicorn que não se conhecem; sem fatia livre (ex.:
+  durante a troca de pool do /model/swap), o processo segue sem afinidade;
+- INFERENCE_MALLOC_ARENAS: limita as arenas do malloc da glibc, que crescem
+  com o número de threads e inflam a memória de cada worker;
+- o autograd do torch fica desligado (o modo de gradiente é por thread, por
+  isso também é desligado no inicializador das threads de inferência).
+
+INFERENCE_RUNTIME_CONFIG=0 desativa tudo isso (comportamento padrão das bibliotecas).
+"""
+import os
+import sys
+import tempfile
+import threading
+
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configurações
+INFERENCE_RUNTIME_CONFIG = os.getenv("INFERENCE_RUNTIME_CONFIG", "1") == "1"
+UVICORN_WORKERS = int(os.getenv("WEB_CONCURRENCY", "1"))  # Processos do uvicorn (--workers) na máquina
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))  # 0 = núcleos / processos de inferência
+TORCH_INTEROP_THREADS = int(os.getenv("TORCH_INTEROP_THREADS", "1"))  # 0 mantém o padrão do torch
+INFERENCE_PIN_CORES = os.getenv("INFERENCE_PIN_CORES", "0") == "1"
+INFERENCE_PIN_LOCK_DIR = os.getenv("INFERENCE_PIN_LOCK_DIR", tempfile.gettempdir())
+INFERENCE_MALLOC_ARENAS = int(os.getenv("INFERENCE_MALLOC_ARENAS", "0"))  # 0 mantém o padrão da glibc
+
+M_ARENA_MAX = -8  # mallopt, malloc.h da glibc
+
+_state = {"configured": False, "slots": None, "slot": None, "cores": None, "malloc_arenas": None, "torch_threads": None}
+_slot_lock_file = None
+_lock = threading.Lock()
+
+
+def available_cores() -> list:
+    """
+    Núcleos que o processo pode usar (respeita taskset/cgroups quando o SO informa).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def inference_slots() -> int:
+    """
+    Quantos processos executam inferência na máquina, cada um com uma fatia dos núcleos.
+
+    No modo "thread" é um por worker do uvicorn; no modo "process", os workers
+    do pool de cada um deles.
+    """
+    if not INFERENCE_RUNTIME_CONFIG:
+        return 1
+    per_api = int(os.getenv("INFERENCE_WORKERS", "1")) if os.getenv("INFERENCE_EXECUTOR", "thread") == "process" else 1
+    return max(1, UVICORN_WORKERS) * max(1, per_api)
+
+
+def threads_per_worker(concurrent: int = 1) -> int:
+    """
+    Threads intra-op para cada uma das `concurrent` inferências simultâneas do processo.
+    """
+    cores = len(available_cores())
+    if _state["cores"] is None:
+        cores //= _state["slots"] if _state["configured"] else inference_slots()
+    return max(1, cores // max(1, concurrent))
+
+
+def _claim_cores(slots: int):
+    """
+    Reserva a primeira fatia de núcleos livre (lock de arquivo mantido enquanto o processo viver).
+
+    Returns:
+        tuple: (índice da fatia, núcleos) ou (None, None) se todas estiverem ocupadas
+    """
+    global _slot_lock_file
+    import fcntl
+
+    cores = available_cores()
+    per_slot = max(1, len(cores) // slots)
+    for slot in range(slots):
+        lock_file = open(os.path.join(INFERENCE_PIN_LOCK_DIR, f"medicoes-inference-slot-{slot}.lock"), "w")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        _slot_lock_file = lock_file
+        start = (slot * per_slot) % len(cores)
+        return slot, cores[start:start + per_slot]
+    return None, None
+
+
+def _limit_malloc_arenas(arenas: int) -> bool:
+    import ctypes
+
+    try:
+        return bool(ctypes.CDLL(None).mallopt(M_ARENA_MAX, arenas))
+    except (OSError, AttributeError):  # Fora da glibc (musl, macOS)
+        return False
+
+
+def configure_process(slots: int = None) -> dict:
+    """
+    Aplica afinidade de CPU e limite de arenas ao processo atual (uma única vez).
+
+    Chamado no processo que executa a inferência: o worker do uvicorn no modo
+    "thread" e cada worker do pool no modo "process".
+
+    Args:
+        slots (int): Processos de inferência na máquina (padrão: inference_slots())
+    """
+    with _lock:
+        if _state["configured"] or not INFERENCE_RUNTIME_CONFIG:
+            return get_status()
+        _state["slots"] = slots or inference_slots()
+        if INFERENCE_PIN_CORES and hasattr(os, "sched_setaffinity"):
+            slot, cores = _claim_cores(_state["slots"])
+            if cores is None:
+                logger.warning("Nenhuma fatia de núcleos livre; processo sem afinidade", extra={"slots": _state["slots"]})
+            else:
+                os.sched_setaffinity(0, cores)
+                _state.update(slot=slot, cores=cores)
+        if INFERENCE_MALLOC_ARENAS > 0 and _limit_malloc_arenas(INFERENCE_MALLOC_ARENAS):
+            _state["malloc_arenas"] = INFERENCE_MALLOC_ARENAS
+        _state["configured"] = True
+    logger.info("Runtime de inferência configurado", extra=get_status())
+    return get_status()
+
+
+def configure_torch():
+    """
+    Threads do torch e autograd desligado; chamado ao carregar um modelo torch.
+    """
+    if not INFERENCE_RUNTIME_CONFIG:
+        return
+    import torch
+
+    # Um único modelo por processo: no modo "thread" as chamadas são serializadas (TorchObbBackend._lock)
+    threads = TORCH_THREADS or threads_per_worker()
+    torch.set_num_threads(threads)
+    if TORCH_INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+        except RuntimeError:  # Só pode ser definido uma vez, antes do primeiro trabalho paralelo
+            pass
+    torch.set_grad_enabled(False)
+    _state["torch_threads"] = threads
+
+
+def configure_thread():
+    """
+    Inicializador das threads de inferência: desliga o autograd do torch na thread.
+    """
+    if not INFERENCE_RUNTIME_CONFIG:
+        return
+    from model_registry import INFERENCE_BACKEND
+
+    if INFERENCE_BACKEND != "torch" and "torch" not in sys.modules:
+        return
+    try:
+        import torch
+    except ImportError:  # O erro aparece no carregamento do modelo, com a mensagem do registro
+        return
+    torch.set_grad_enabled(False)
+
+
+def get_status() -> dict:
+    return {
+        "enabled": INFERENCE_RUNTIME_CONFIG,
+        "pid": os.getpid(),
+        "slots": _state.get("slots") or inference_slots(),
+        "slot": _state["slot"],
+        "cores": _state["cores"],
+        "threads_per_worker": threads_per_worker(),
+        "torch_threads": _state["torch_threads"],
+        "malloc_arenas": _state["malloc_arenas"],
+    }
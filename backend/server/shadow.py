@@ -0,0 +1,179 @@
+"""
+Avaliação de um modelo candidato (shadow) com o tráfego real, fora do caminho da requisição.
+
+Com SHADOW_MODEL_PATH definido, uma fração das fotos (SHADOW_FRACTION) que
+passam pelo detector principal também é processada pelo modelo candidato, em
+uma thread própria e depois que a resposta já foi montada. O resultado do
+candidato não é gravado: só é comparado com o do principal (mesma leitura ou
+não) e o tempo de predict dos dois vai para o /metrics. Quando o candidato se
+mostrar melhor, ele vira o principal com o /model/swap.
+
+Com a fila cheia (SHADOW_MAX_PENDING), as fotos sorteadas são descartadas em
+vez de acumular: o shadow nunca atrasa o detector principal.
+"""
+import asyncio
+import contextvars
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from image_io import decode_image
+from metrics import Histogram, collecting
+from runtime_config import configure_thread
+from model_registry import INFERENCE_BACKEND, ModelRegistry
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# Configurações
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH", "")  # Vazio desativa o shadow
+SHADOW_BACKEND = os.getenv("SHADOW_BACKEND", INFERENCE_BACKEND)
+SHADOW_FRACTION = float(os.getenv("SHADOW_FRACTION", "0.05"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "8"))
+
+PREDICT_STAGES = ("predict", "roi_predict")
+
+
+class ShadowEvaluator:
+    """
+    Executa o modelo candidato em uma amostra das fotos e compara com o principal.
+    """
+
+    def __init__(self, weights_path: str, backend_name: str, fraction: float, max_pending: int):
+        self.registry = ModelRegistry(weights_path, backend_name) if weights_path else None
+        self.fraction = fraction
+        self.max_pending = max_pending
+        self.pending = 0
+        self.compared = 0
+        self.agreements = 0
+        self.dropped = 0
+        self.errors = 0
+        self.predict_seconds = Histogram(
+            "shadow_predict_seconds",
+            "Tempo de predict do modelo principal e do candidato nas fotos comparadas.",
+            "model",
+        )
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.registry is not None and self.fraction > 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="shadow", initializer=configure_thread
+            )
+        return self._executor
+
+    async def preload(self):
+        """
+        Carrega e aquece o candidato na thread do shadow (hook de startup).
+        """
+        if self.registry is None:
+            return
+        from model_registry import warmup_backend
+
+        def load():
+            backend = self.registry.get()
+            if backend is not None:
+                self.registry.warmup_seconds = warmup_backend(backend)
+
+        await asyncio.get_running_loop().run_in_executor(self._get_executor(), load)
+
+    def maybe_submit(self, contents: bytes, primary: dict, primary_spans: list) -> bool:
+        """
+        Sorteia a foto para o shadow e, se sorteada, agenda a comparação sem aguardá-la.
+
+        Args:
+            contents (bytes): Conteúdo do arquivo enviado
+            primary (dict): Resultado do detector principal
+            primary_spans (list): Spans da detecção principal (de onde sai o tempo de predict)
+        """
+        if not self.enabled or random.random() >= self.fraction:
+            return False
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self.pending += 1
+        primary_seconds = sum(seconds for stage, seconds in primary_spans if stage in PREDICT_STAGES)
+        # Cópia do contexto: os logs da avaliação saem com o request_id da requisição
+        future = asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), contextvars.copy_context().run, self._evaluate, contents
+        )
+        future.add_done_callback(lambda done: self._record(done, primary, primary_seconds))
+        return True
+
+    def _evaluate(self, contents: bytes):
+        from utilits import run_yolov8_obb_batch
+
+        if self.registry.get() is None:
+            raise RuntimeError(f"Modelo candidato indisponível ({self.registry.status})")
+        image_np, _, _ = decode_image(contents)
+        with collecting() as spans:
+            result = run_yolov8_obb_batch([image_np], model=self.registry)[0]
+        return result, sum(seconds for stage, seconds in spans if stage == "predict")
+
+    def _record(self, done, primary: dict, primary_seconds: float):
+        with self._lock:
+            self.pending -= 1
+            if done.cancelled() or done.exception() is not None:
+                self.errors += 1
+                return
+            result, shadow_seconds = done.result()
+            self.compared += 1
+            agree = result["number_detected"] == primary["number_detected"]
+            self.agreements += agree
+        self.predict_seconds.observe("primary", primary_seconds)
+        self.predict_seconds.observe("shadow", shadow_seconds)
+        if not agree:
+            logger.info(
+                "Leitura do modelo candidato diverge da do principal",
+                extra={
+                    "sample_key": "shadow_disagreement",
+                    "primary": primary["number_detected"],
+                    "primary_version": primary.get("model_version"),
+                    "shadow": result["number_detected"],
+                    "shadow_version": result.get("model_version"),
+                },
+            )
+
+    def swap(self, weights_path: str, backend_name: str = None) -> dict:
+        """
+        Troca o modelo candidato e zera a comparação (roda fora do event loop).
+        """
+        if self.registry is None:
+            self.registry = ModelRegistry(weights_path, backend_name or SHADOW_BACKEND)
+            self.registry.get()
+        else:
+            self.registry.swap(weights_path, backend_name)
+        with self._lock:
+            self.compared = self.agreements = self.dropped = self.errors = 0
+        return self.registry.get_status()
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "fraction": self.fraction,
+                "model": self.registry.get_status() if self.registry is not None else None,
+                "pending": self.pending,
+                "compared": self.compared,
+                "agreement_ratio": self.agreements / self.compared if self.compared else None,
+                "dropped": self.dropped,
+                "errors": self.errors,
+            }
+
+    def render_metrics(self) -> list:
+        return self.predict_seconds.render()
+
+
+shadow = ShadowEvaluator(SHADOW_MODEL_PATH, SHADOW_BACKEND, SHADOW_FRACTION, SHADOW_MAX_PENDING)
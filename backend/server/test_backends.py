@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Testes dos routers contra os dois bancos suportados (SQLite e PostgreSQL)
+
+O PostgreSQL só é testado com TEST_POSTGRES_URL definido (ex.:
+postgresql://postgres@localhost/medicoes_test); as tabelas desse banco são
+recriadas a cada teste.
+"""
+import os
+
+import pytest
+from sqlalchemy import inspect
+
+from dbmodels.database import Base
+from dbmodels.measurement_types import MeasurementType
+from dbmodels.readings import Reading, ReadingStatus
+
+BACKENDS = [
+    pytest.param(lambda: None, id="sqlite"),
+    pytest.param(
+        lambda: os.environ["TEST_POSTGRES_URL"],
+        id="postgresql",
+        marks=pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL não definido"),
+    ),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, make_api):
+    api = make_api(request.param(), seed=lambda db: db.add(MeasurementType(name="Água", unit="m³")))
+    yield api.client, api.Session
+    Base.metadata.drop_all(bind=api.engine)
+    api.engine.dispose()
+
+
+def test_enum_types(backend):
+    _, TestingSession = backend
+    engine = TestingSession.kw["bind"]
+    columns = {column["name"]: column["type"] for column in inspect(engine).get_columns("readings")}
+    if engine.dialect.name == "postgresql":
+        # Tipos ENUM nativos, com nome fixo (não dependem do nome da classe Python)
+        assert columns["status"].name == "reading_status"
+        assert set(columns["status"].enums) == {"PENDING", "COMPLETED", "INACCESSIBLE"}
+    else:
+        assert "VARCHAR" in str(columns["status"])
+
+    # Os valores gravados e lidos continuam sendo os membros do enum
+    db = TestingSession()
+    try:
+        db.add_all([Reading(current_reading="100", status=status) for status in ReadingStatus])
+        db.commit()
+        assert {reading.status for reading in db.query(Reading)} == set(ReadingStatus)
+        assert db.query(Reading).filter(Reading.status == ReadingStatus.COMPLETED).count() == 1
+    finally:
+        db.close()
+
+
+def test_routers_crud(backend):
+    client, _ = backend
+
+    response = client.post("/api/condominiums/", json={
+        "name": "Condomínio Teste", "address": "Rua A, 1", "cnpj": "00.000.000/0001-00",
+        "manager": "Gerente", "phone": "(11) 99999-9999", "email": "contato@condominio.com",
+    })
+    assert response.status_code == 200, response.text
+    condominium_id = response.json()["id"]
+
+    response = client.post(f"/api/condominiums/{condominium_id}/units", json={"number": "101", "owner": "Maria"})
+    assert response.status_code == 200, response.text
+    unit_id = response.json()["id"]
+
+    measurement_type_id = client.get("/api/measurement-types").json()[0]["id"]
+    response = client.post("/api/meters/meters/", json={"unit_id": unit_id, "measurement_type_id": measurement_type_id})
+    assert response.status_code == 200, response.text
+    meter_id = response.json()["id"]
+
+    response = client.get(f"/api/units/{unit_id}")
+    assert response.status_code == 200 and response.json()["number"] == "101"
+    response = client.get(f"/api/meters/units/{unit_id}/meters/")
+    assert response.status_code == 200 and [meter["id"] for meter in response.json()] == [meter_id]
+    assert client.get("/api/meters/units/999/meters/").status_code == 404
+
+    response = client.post(f"/api/readings/meters/{meter_id}/readings", json={
+        "meter_id": meter_id, "current_reading": "123", "status": "COMPLETED",
+    })
+    assert response.status_code == 200, response.text
+    reading_id = response.json()["id"]
+    response = client.post(f"/api/readings/meters/{meter_id}/readings", json={
+        "meter_id": meter_id + 1, "current_reading": "124", "status": "COMPLETED",
+    })
+    assert response.status_code == 400
+    response = client.get("/api/readings/", params={"meter_id": meter_id})
+    assert response.status_code == 200, response.text
+    assert [(reading["id"], reading["meter"]["id"]) for reading in response.json()] == [(reading_id, meter_id)]
+
+    response = client.get("/api/users/me")
+    assert response.status_code == 200 and response.json()["role"] == "Admin"
+    response = client.get("/api/users", params={"search": "ADMIN"})
+    assert response.status_code == 200, response.text
+
+    response = client.get(f"/api/condominiums/{condominium_id}")
+    assert response.status_code == 200 and response.json()["cnpj"] == "00.000.000/0001-00"
+    response = client.get("/api/condominiums/", params={"search": "Teste"})
+    assert response.status_code == 200 and response.json()["total"] == 1
+    response = client.get(f"/api/condominiums/{condominium_id}/units")
+    assert response.status_code == 200 and [unit["id"] for unit in response.json()["units"]] == [unit_id]
+
+    assert client.delete(f"/api/meters/meters/{meter_id}").status_code == 200
+    assert client.get(f"/api/meters/meters/{meter_id}").status_code == 404
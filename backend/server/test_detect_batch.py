@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Testes do /detect/batch: uma linha NDJSON por foto e, no fim, as leituras gravadas
+"""
+import json
+
+from dbmodels.condominiums import Condominium
+from dbmodels.measurement_types import MeasurementType
+from dbmodels.meters import Meter
+from dbmodels.units import Unit
+
+
+def seed(db) -> int:
+    condominium = Condominium(name="Condomínio", address="Rua A", cnpj="00", manager="M", phone="0", email="c@teste.com")
+    measurement_type = MeasurementType(name="Água", unit="m³")
+    db.add_all([condominium, measurement_type])
+    db.flush()
+    unit = Unit(condominium_id=condominium.id, number="101", owner="P")
+    db.add(unit)
+    db.flush()
+    meter = Meter(unit_id=unit.id, measurement_type_id=measurement_type.id)
+    db.add(meter)
+    db.flush()
+    return meter.id
+
+
+def test_detect_batch_stream(make_api, make_jpeg, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)  # uploads/ é relativo ao diretório atual
+    (tmp_path / "uploads").mkdir()
+    api = make_api(seed=seed)
+    meter_id = api.seed
+    files = [
+        ("files", ("a.jpg", make_jpeg(1), "image/jpeg")),
+        ("files", ("b.jpg", make_jpeg(2), "image/jpeg")),
+        ("files", ("c.txt", b"texto", "text/plain")),
+    ]
+    with api.client as client:
+        response = client.post("/detect/batch", files=files, data={"meter_ids": [str(meter_id), "999", str(meter_id)]})
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    *items, summary = [json.loads(line) for line in response.text.splitlines()]
+    items = {item["index"]: item for item in items}
+    assert set(items) == {0, 1, 2}
+    # Erros ficam no item: medidor desconhecido e arquivo que não é imagem não derrubam o lote
+    assert items[1]["error"] == "Medidor não encontrado" and items[1]["meter_id"] == 999
+    assert items[2]["error"] == "Arquivo deve ser uma imagem"
+    assert "error" not in items[0] and items[0]["meter_id"] == meter_id and "number_detected" in items[0]
+
+    assert summary["committed"] is True and summary["failed"] == 2
+    assert [reading["index"] for reading in summary["readings"]] == [0]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de detecções (detection_cache.py)
+"""
+import asyncio
+
+import inference
+import main
+from detection_cache import DetectionCache
+from model_registry import registry
+
+
+def test_concurrent_identical_uploads_share_one_detection():
+    cache = DetectionCache(16)
+    cache.file_exists = lambda path: True
+    calls = []
+
+    async def detect():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"number_detected": "12345"}, "uploads/foto.jpg"
+
+    async def run():
+        return await asyncio.gather(*[cache.get_or_detect("hash:v1", detect) for _ in range(3)])
+
+    results = asyncio.run(run())
+    # Um envio detecta; os reenvios simultâneos aguardam o mesmo resultado
+    assert len(calls) == 1
+    assert sorted(cached for _, cached in results) == [False, True, True]
+    assert all(entry["result"] == {"number_detected": "12345"} for entry, _ in results)
+    assert cache.get_stats()["coalesced"] == 2
+
+
+def test_model_swap_misses_the_cache(recording_backend, make_jpeg, monkeypatch):
+    cache = DetectionCache(16)
+    cache.file_exists = lambda path: True
+    monkeypatch.setattr(main, "detection_cache", cache)
+    monkeypatch.setattr(inference, "_batcher", None)
+    photo = make_jpeg()
+
+    async def run():
+        try:
+            first = await main.detect_cached(photo, 1)
+            again = await main.detect_cached(photo, 1)
+            registry.set_backend(recording_backend, "recording", version="v2")
+            swapped = await main.detect_cached(photo, 1)
+            return first, again, swapped
+        finally:
+            await inference.get_batcher().stop()
+
+    first, again, swapped = asyncio.run(run())
+    assert [cached for _, cached in (first, again, swapped)] == [False, True, False]
+    # A mesma foto passa de novo pelo detector depois da troca de versão do modelo
+    assert len(recording_backend.calls) == 2
+    assert swapped[0]["result"]["model_version"] == "v2"
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Testes do executor de inferência (inference.py)
+"""
+import asyncio
+
+import inference
+
+
+def test_micro_batcher_batches_and_isolates_errors(recording_backend, make_jpeg):
+    async def run():
+        batcher = inference.MicroBatcher(max_batch_size=8, max_wait_ms=50, workers=1)
+        try:
+            photos = [make_jpeg(seed) for seed in range(4)] + [b"nao e uma imagem"]
+            return batcher, await asyncio.gather(*[batcher.submit(photo) for photo in photos], return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    batcher, results = asyncio.run(run())
+    # As cinco imagens formam um lote; a inválida falha sozinha e as outras vão em um único predict
+    assert batcher.get_stats()["batch_sizes"] == {5: 1}
+    assert len(recording_backend.calls) == 1 and len(recording_backend.calls[0][0]) == 4
+    assert all(result["number_detected"] == "" for result in results[:4])
+    assert isinstance(results[4], Exception)
+
+
+def test_rerun_keeps_high_resolution(recording_backend, make_jpeg):
+    # Sem caixa do visor, a imagem inteira é relida em até 1280 px e a rede recebe 1280 px
+    result, _ = inference.process_rerun(make_jpeg(size=(2000, 1500)), None, 1280)
+    assert recording_backend.calls == [([(960, 1280, 3)], 1280)]
+    assert result["number_detected"] == "" and result["box"] is None
+
+
+def test_detect_in_process_mode(monkeypatch, tmp_path, make_api, make_jpeg):
+    # Pool de processos com um worker; sem pesos, o detector devolve leituras vazias
+    monkeypatch.setattr(inference, "INFERENCE_EXECUTOR", "process")
+    monkeypatch.setattr(inference, "INFERENCE_WORKERS", 1)
+    monkeypatch.setattr(inference, "_executor", None)
+    monkeypatch.setattr(inference, "_batcher", None)
+    monkeypatch.setattr(inference, "_worker_model_status", [])
+    monkeypatch.chdir(tmp_path)  # uploads/ é relativo ao diretório atual
+    (tmp_path / "uploads").mkdir()
+
+    api = make_api()
+    with api.client as client:
+        client.portal.call(inference.preload)
+        response = client.post("/detect/", files={"file": ("foto.jpg", make_jpeg(), "image/jpeg")}, data={"meter_id": "1"})
+        assert response.status_code == 200, response.text
+        assert response.json()["number_detected"] == ""
+
+        # Um único estado, com o de cada worker em `workers`
+        status = inference.get_model_status()
+        assert isinstance(status, dict) and len(status["workers"]) == 1
+        assert status["status"] == status["workers"][0]["status"]
+        assert client.get("/health").json()["model"]["status"] == status["status"]
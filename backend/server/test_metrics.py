@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Testes das métricas por etapa (metrics.py): histogramas do /metrics e cabeçalho Server-Timing
+"""
+import re
+
+import inference
+import main
+import metrics
+from detection_cache import DetectionCache
+
+
+def test_histogram_render():
+    histogram = metrics.Histogram("stage_seconds", "Tempo por etapa.", "stage", buckets=(0.01, 0.1))
+    for seconds in (0.005, 0.05, 0.5):
+        histogram.observe("decode", seconds)
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP stage_seconds Tempo por etapa.", "# TYPE stage_seconds histogram"]
+    # Buckets cumulativos, com +Inf igual à contagem
+    assert lines[2:] == [
+        'stage_seconds_bucket{stage="decode",le="0.01"} 1',
+        'stage_seconds_bucket{stage="decode",le="0.1"} 2',
+        'stage_seconds_bucket{stage="decode",le="+Inf"} 3',
+        'stage_seconds_sum{stage="decode"} 0.555',
+        'stage_seconds_count{stage="decode"} 3',
+    ]
+
+
+def test_server_timing_sums_repeated_stages():
+    assert metrics.server_timing([("decode", 0.001), ("predict", 0.02), ("decode", 0.002)]) == "decode;dur=3.0, predict;dur=20.0"
+
+
+def test_detect_stages_reach_header_and_metrics(make_api, make_jpeg, recording_backend, monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "SERVER_TIMING", True)
+    monkeypatch.setattr(main, "detection_cache", DetectionCache(16))
+    monkeypatch.setattr(inference, "_batcher", None)
+    monkeypatch.chdir(tmp_path)  # uploads/ é relativo ao diretório atual
+    (tmp_path / "uploads").mkdir()
+
+    api = make_api()
+    with api.client as client:
+        before = client.get("/metrics").text
+        response = client.post("/detect/", files={"file": ("foto.jpg", make_jpeg(), "image/jpeg")}, data={"meter_id": "1"})
+        assert response.status_code == 200, response.text
+        after = client.get("/metrics").text
+
+    # Etapas da requisição e do executor de inferência no mesmo cabeçalho
+    stages = dict(item.split(";dur=") for item in response.headers["server-timing"].split(", "))
+    for stage in ("upload_read", "hash", "queue_wait", "decode", "predict", "db_commit", "total"):
+        assert stage in stages, stages
+    assert all(float(duration) >= 0 for duration in stages.values())
+
+    def count(text: str, pattern: str) -> int:
+        match = re.search(pattern + r" (\d+)", text)
+        return int(match.group(1)) if match else 0
+
+    # Cada chamada ao detector (inclusive a nova tentativa da validação) é uma observação de "predict"
+    predicted = count(after, r'detect_stage_seconds_count\{stage="predict"\}') - count(before, r'detect_stage_seconds_count\{stage="predict"\}')
+    assert predicted == len(recording_backend.calls) >= 1
+    assert count(after, r'detect_request_seconds_count\{path="/detect/"\}') == count(before, r'detect_request_seconds_count\{path="/detect/"\}') + 1
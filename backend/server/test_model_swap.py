@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Testes da troca de modelo (/model/swap) e da comparação com o modelo candidato (shadow.py)
+"""
+import asyncio
+import time
+
+import pytest
+
+import detector_backends
+import inference
+import main
+from conftest import RecordingBackend
+from detection_cache import DetectionCache
+from shadow import ShadowEvaluator
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch, recording_backend):
+    """
+    MODEL_DIR temporário com dois arquivos de pesos, carregados como RecordingBackend.
+    """
+    monkeypatch.setitem(detector_backends.BACKENDS, "recording", lambda weights_path: RecordingBackend())
+    monkeypatch.setattr(main, "MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "detection_cache", DetectionCache(16))
+    monkeypatch.setattr(main, "shadow", ShadowEvaluator("", "recording", 1.0, 8))
+    monkeypatch.setattr(inference, "_batcher", None)
+    monkeypatch.chdir(tmp_path)  # uploads/ é relativo ao diretório atual
+    (tmp_path / "uploads").mkdir()
+    (tmp_path / "novo.pt").write_bytes(b"pesos novos")
+    (tmp_path / "candidato.pt").write_bytes(b"pesos do candidato")
+    return tmp_path
+
+
+def wait_for_shadow(shadow, compared: int):
+    deadline = time.monotonic() + 5
+    while shadow.get_stats()["compared"] + shadow.get_stats()["errors"] < compared:
+        assert time.monotonic() < deadline, shadow.get_stats()
+        time.sleep(0.01)
+
+
+def test_swap_primary_model(make_api, make_jpeg, model_dir):
+    api = make_api()
+    with api.client as client:
+        assert client.post("/model/swap", json={"weights": "../fora.pt"}).status_code == 400
+        assert client.post("/model/swap", json={"weights": "ausente.pt"}).status_code == 404
+
+        response = client.post("/model/swap", json={"weights": "novo.pt"})
+        assert response.status_code == 200, response.text
+        status = response.json()
+        detected = client.post("/detect/", files={"file": ("foto.jpg", make_jpeg(), "image/jpeg")}, data={"meter_id": "1"})
+
+    # Versão nova (nome + hash dos pesos) e a anterior guardada para o rollback
+    assert status["status"] == "ready" and status["version"].startswith("novo-")
+    assert status["previous_version"] == "recording"
+    assert detected.status_code == 200, detected.text
+    assert detected.json()["model_version"] == status["version"]
+
+
+def test_shadow_swap_compares_with_primary(make_api, make_jpeg, model_dir):
+    api = make_api()
+    with api.client as client:
+        response = client.post("/model/swap", json={"weights": "candidato.pt", "backend": "recording", "target": "shadow"})
+        assert response.status_code == 200, response.text
+        assert response.json()["version"].startswith("candidato-")
+
+        for seed in range(2):
+            detected = client.post("/detect/", files={"file": ("foto.jpg", make_jpeg(seed), "image/jpeg")}, data={"meter_id": "1"})
+            assert detected.status_code == 200, detected.text
+        wait_for_shadow(main.shadow, 2)
+        metrics_text = client.get("/metrics").text
+
+    # Os dois modelos não encontram nada: as leituras concordam
+    stats = main.shadow.get_stats()
+    assert stats["compared"] == 2 and stats["errors"] == 0 and stats["agreement_ratio"] == 1.0
+    assert 'shadow_predict_seconds_count{model="shadow"} 2' in metrics_text
+    assert "shadow_agreement_ratio 1.0" in metrics_text
+    main.shadow.stop()
+
+
+def test_shadow_counts_disagreements(model_dir, make_jpeg):
+    shadow = ShadowEvaluator(str(model_dir / "candidato.pt"), "recording", 1.0, 8)
+
+    async def run():
+        submitted = [
+            shadow.maybe_submit(make_jpeg(), {"number_detected": ""}, [("predict", 0.01)]),
+            shadow.maybe_submit(make_jpeg(), {"number_detected": "123"}, [("predict", 0.01)]),
+        ]
+        while shadow.get_stats()["pending"]:
+            await asyncio.sleep(0.01)
+        return submitted
+
+    try:
+        assert asyncio.run(run()) == [True, True]
+    finally:
+        shadow.stop()
+    stats = shadow.get_stats()
+    assert stats["compared"] == 2 and stats["agreement_ratio"] == 0.5
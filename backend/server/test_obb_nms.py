@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Testes do NMS com IoU rotacionado (obb_nms.py)
+"""
+import math
+
+import numpy as np
+
+from obb_nms import rotated_intersection, rotated_iou, rotated_nms
+
+
+def test_rotated_iou():
+    square = np.array([[0.0, 0.0, 2.0, 2.0, 0.0]])
+
+    # Caixas idênticas
+    assert np.allclose(rotated_iou(square, square), 1.0)
+
+    # Mesma caixa descrita com w/h trocados e rotação de 90°
+    assert np.allclose(rotated_iou(square, np.array([[0.0, 0.0, 2.0, 2.0, math.pi / 2]])), 1.0)
+
+    # Deslocada meia largura: interseção 2, união 6
+    assert np.allclose(rotated_iou(square, np.array([[1.0, 0.0, 2.0, 2.0, 0.0]])), 1 / 3)
+
+    # Quadrado girado 45°: interseção é um octógono de área 8(√2 − 1)
+    octagon = 8 * (math.sqrt(2) - 1)
+    rotated = np.array([[0.0, 0.0, 2.0, 2.0, math.pi / 4]])
+    assert np.allclose(rotated_intersection(square, rotated), octagon)
+    assert np.allclose(rotated_iou(square, rotated), octagon / (8 - octagon))
+
+    # Disjuntas e apenas encostadas
+    assert np.allclose(rotated_iou(square, np.array([[5.0, 5.0, 2.0, 2.0, 0.3]])), 0.0)
+    assert np.allclose(rotated_iou(square, np.array([[2.0, 0.0, 2.0, 2.0, 0.0]])), 0.0)
+
+    # Uma caixa contida na outra
+    inner = np.array([[0.2, 0.1, 1.0, 0.5, 0.7]])
+    assert np.allclose(rotated_iou(square, inner), 0.5 / 4)
+
+
+def test_rotated_nms():
+    tilt = 0.5
+    direction = np.array([math.cos(tilt), math.sin(tilt)])
+    # Dígitos altos e estreitos lado a lado numa linha inclinada, no formato do
+    # ultralytics (lado maior em w): as caixas sem rotação se sobrepõem muito
+    centers = np.array([direction * k * 22.0 for k in range(4)])
+    digits = np.column_stack((centers, np.full(4, 50.0), np.full(4, 20.0), np.full(4, tilt + math.pi / 2)))
+    duplicate = digits[1] + np.array([1.0, -1.0, 2.0, 1.0, 0.02])
+    boxes = np.vstack((digits, duplicate))
+    scores = np.array([0.9, 0.8, 0.85, 0.7, 0.6])
+
+    keep = rotated_nms(boxes, scores, 0.45)
+    assert list(keep) == [0, 2, 1, 3]
+
+    assert len(rotated_nms(np.zeros((0, 5)), np.zeros(0), 0.45)) == 0
+
+
+if __name__ == "__main__":
+    print("🔷 === TESTE NMS ROTACIONADO ===")
+    test_rotated_iou()
+    print("✅ IoU rotacionado OK")
+    test_rotated_nms()
+    print("✅ NMS rotacionado OK")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Testes da gravação das fotos em segundo plano (photo_store.py)
+"""
+import asyncio
+import os
+
+from sqlalchemy.orm import sessionmaker
+
+import dbmodels.users  # noqa: F401 (readings.registered_by referencia users)
+import photo_store
+from dbmodels.database import Base, create_db_engine
+from dbmodels.reading_photos import ReadingPhoto
+from dbmodels.readings import Reading, ReadingStatus
+from photo_store import PhotoStore, cropped_path_for
+
+
+def test_deferred_write_creates_reading_photo(tmp_path, monkeypatch, make_jpeg):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'medicoes.db'}")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    monkeypatch.setattr(photo_store, "SessionLocal", Session)
+    db = Session()
+    reading = Reading(current_reading="123", status=ReadingStatus.COMPLETED)
+    db.add(reading)
+    db.commit()
+    reading_id = reading.id
+    db.close()
+
+    store = PhotoStore(max_queue=4, writers=1)
+    image_path = str(tmp_path / "foto.jpg")
+
+    async def run():
+        await store.submit(reading_id, make_jpeg(size=(200, 100)), image_path, [10, 10, 110, 60])
+        # Ainda na fila: conta como existente (cache de detecções) antes de ser gravada
+        queued = store.exists(image_path) and not os.path.exists(image_path)
+        await store.stop()  # Grava o que está na fila
+        return queued
+
+    assert asyncio.run(run())
+    assert os.path.exists(image_path) and os.path.exists(cropped_path_for(image_path))
+    assert store.get_stats()["written"] == 1 and store.get_stats()["pending"] == 0
+
+    db = Session()
+    try:
+        photo = db.query(ReadingPhoto).one()
+        assert photo.reading_id == reading_id
+        assert photo.file_path == image_path and photo.cropped_file_path == cropped_path_for(image_path)
+        assert photo.is_cropped
+    finally:
+        db.close()
+    engine.dispose()
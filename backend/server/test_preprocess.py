@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Testes do pré-processamento em buffer reaproveitado (detector_backends.preprocess)
+"""
+import numpy as np
+from PIL import Image
+
+from detector_backends import PAD_VALUE, preprocess, unletterbox
+
+
+def test_preprocess_letterbox():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (48, 96, 3), dtype=np.uint8)
+
+    batch, [(gain, pad)] = preprocess([image], 64)
+    assert batch.shape == (1, 3, 64, 64) and batch.dtype == np.float32
+    assert gain == 64 / 96 and pad == (0, 16)
+
+    # Faixas de preenchimento em cima e embaixo; no miolo, a imagem redimensionada, BGR, em [0, 1]
+    assert np.all(batch[0, :, :16] == np.float32(PAD_VALUE))
+    assert np.all(batch[0, :, 48:] == np.float32(PAD_VALUE))
+    resized = np.asarray(Image.fromarray(image).resize((64, 32), Image.BILINEAR))
+    expected = (resized[..., ::-1].transpose(2, 0, 1) / 255.0).astype(np.float32)
+    assert np.array_equal(batch[0, :, 16:48], expected)
+
+    # Centro do quadro da rede volta para o centro da imagem original
+    box = unletterbox(np.array([[32.0, 32.0, 64.0, 32.0, 0.1]]), gain, pad)
+    assert np.allclose(box, [[48.0, 24.0, 96.0, 48.0, 0.1]])
+
+
+def test_preprocess_reuses_buffer():
+    tall = np.zeros((80, 20, 3), dtype=np.uint8)
+    wide = np.full((20, 80, 3), 255, dtype=np.uint8)
+
+    first, _ = preprocess([tall, wide], 32)
+    second, _ = preprocess([wide], 32)
+    assert np.shares_memory(first, second)
+
+    # O quadro anterior (imagem alta) não deixa resto nas faixas de preenchimento da imagem larga
+    assert np.all(second[0, :, :12] == np.float32(PAD_VALUE))
+    assert np.all(second[0, :, 12:20] == 1.0)
+
+    # Lote maior que os anteriores: o buffer cresce uma vez
+    bigger, _ = preprocess([tall] * 3, 32)
+    assert bigger.shape[0] == 3
+    assert np.shares_memory(bigger, preprocess([tall], 32)[0])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Testes do número de consultas por requisição nos endpoints de listagem
+
+Os relacionamentos serializados (fotos e medidor no ReadingResponse) são carregados
+junto com a página: o número de consultas não cresce com o número de itens (N+1).
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from dbmodels.condominiums import Condominium
+from dbmodels.measurement_types import MeasurementType
+from dbmodels.meters import Meter
+from dbmodels.reading_photos import ReadingPhoto
+from dbmodels.readings import Reading, ReadingStatus
+from dbmodels.units import Unit
+
+READINGS = 30
+
+
+def seed(db) -> int:
+    condominium = Condominium(name="Condomínio", address="Rua A", cnpj="00", manager="M", phone="0", email="c@teste.com")
+    measurement_type = MeasurementType(name="Água", unit="m³")
+    db.add_all([condominium, measurement_type])
+    db.flush()
+    units = [Unit(condominium_id=condominium.id, number=str(100 + i), owner="P") for i in range(5)]
+    db.add_all(units)
+    db.flush()
+    meters = [Meter(unit_id=unit.id, measurement_type_id=measurement_type.id) for unit in units]
+    db.add_all(meters)
+    db.flush()
+    for i in range(READINGS):
+        reading = Reading(meter_id=meters[i % len(meters)].id, current_reading=str(i), status=ReadingStatus.COMPLETED)
+        reading.photos = [ReadingPhoto(file_path=f"{i}.jpg"), ReadingPhoto(file_path=f"{i}_crop.jpg", is_cropped=True)]
+        db.add(reading)
+    return condominium.id
+
+
+@pytest.fixture(scope="module")
+def api(make_api):
+    api = make_api(seed=seed)
+    statements = []
+
+    @contextmanager
+    def count_queries():
+        statements.clear()
+        yield statements
+
+    for bind in (api.engine, api.async_engine.sync_engine):
+        event.listen(bind, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    yield api.client, count_queries, api.seed
+
+
+def test_readings_list_query_count(api):
+    client, count_queries, _ = api
+
+    counts = {}
+    for limit in (1, 10, READINGS):
+        with count_queries() as statements:
+            response = client.get("/api/readings/", params={"limit": limit})
+        assert response.status_code == 200, response.text
+        readings = response.json()
+        assert len(readings) == limit
+        assert all(len(reading["photos"]) == 2 and reading["meter"]["id"] == reading["meter_id"] for reading in readings)
+        counts[limit] = len(statements)
+
+    # Usuário autenticado, página de leituras com o medidor (JOIN) e fotos (SELECT ... IN)
+    assert counts == {1: 3, 10: 3, READINGS: 3}, counts
+
+
+@pytest.mark.parametrize("path", ["/api/condominiums/", "/api/condominiums/{condominium_id}/units", "/api/meters/meters/"])
+def test_list_endpoints_query_count(api, path):
+    client, count_queries, condominium_id = api
+    path = path.format(condominium_id=condominium_id)
+
+    counts = []
+    for limit in (1, 5):
+        with count_queries() as statements:
+            response = client.get(path, params={"limit": limit})
+        assert response.status_code == 200, response.text
+        counts.append(len(statements))
+    assert counts[0] == counts[1], counts
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Testes dos planos de consulta: as consultas mais frequentes usam os índices criados pelas migrações (SQLite)
+"""
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import func, select, text
+
+from dbmodels.database import create_db_engine, run_migrations
+from dbmodels.meters import Meter
+from dbmodels.reading_photos import ReadingPhoto
+from dbmodels.readings import Reading, ReadingStatus
+from dbmodels.units import Unit
+
+
+@pytest.fixture(scope="module")
+def engine():
+    engine = create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='medicoes_plans_'), 'medicoes.db')}")
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, statement) -> str:
+    sql = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        return "\n".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+# Consultas dos routers e do reading_validation, com o índice que cada uma deve usar
+HOT_QUERIES = {
+    "historico_do_medidor": (
+        select(Reading).filter(Reading.meter_id == 1).order_by(Reading.date.desc()).limit(100),
+        "ix_readings_meter_id_date",
+    ),
+    "ultima_leitura_do_medidor": (
+        select(Reading.current_reading)
+        .filter(Reading.meter_id == 1, Reading.status == ReadingStatus.COMPLETED)
+        .order_by(Reading.id.desc())
+        .limit(1),
+        "ix_readings_status_meter_id_id",
+    ),
+    "ultima_leitura_por_medidor": (
+        select(func.max(Reading.id)).filter(Reading.status == ReadingStatus.COMPLETED).group_by(Reading.meter_id),
+        "ix_readings_status_meter_id_id",
+    ),
+    "unidades_do_condominio": (
+        select(Unit).filter(Unit.condominium_id == 1).offset(0).limit(100),
+        "ix_units_condominium_id_number",
+    ),
+    "unidade_pelo_numero": (
+        select(Unit).filter(Unit.condominium_id == 1, Unit.number == "101"),
+        "ix_units_condominium_id_number",
+    ),
+    "medidores_da_unidade": (select(Meter).filter(Meter.unit_id == 1), "ix_meters_unit_id"),
+    "fotos_das_leituras": (
+        select(ReadingPhoto).filter(ReadingPhoto.reading_id.in_([1, 2, 3])),  # selectinload(Reading.photos)
+        "ix_reading_photos_reading_id",
+    ),
+}
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_index(engine, name):
+    statement, index = HOT_QUERIES[name]
+    plan = query_plan(engine, statement)
+    assert index in plan, plan
+    # A ordem vem do índice: sem ordenação em tabela temporária
+    assert "TEMP B-TREE" not in plan, plan
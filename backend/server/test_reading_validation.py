@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Testes da validação de leituras contra o histórico do medidor (reading_validation.py)
+"""
+import asyncio
+
+from reading_validation import MeterHistory, parse_reading, validate_reading
+
+
+def test_parse_reading():
+    assert parse_reading("00123") == 123
+    assert parse_reading("12,5") == 12.5
+    assert parse_reading("") is None
+    assert parse_reading("12a") is None
+    assert parse_reading(None) is None
+
+
+def test_validate_reading():
+    # Sem histórico, basta ser numérica e confiável
+    assert validate_reading("123", 0.9, None) == (True, None)
+    assert validate_reading("", None, None)[0] is False
+    assert validate_reading("123", 0.2, None) == (False, "confiança baixa")
+
+    # Consumo normal
+    assert validate_reading("1050", 0.9, 1000.0) == (True, None)
+    assert validate_reading("1000", 0.9, 1000.0) == (True, None)
+
+    # Volta para trás
+    plausible, reason = validate_reading("999", 0.9, 1000.0)
+    assert not plausible and "menor" in reason
+
+    # Dígito a mais (10x)
+    plausible, reason = validate_reading("10500", 0.9, 1000.0)
+    assert not plausible and "salto" in reason
+
+    # Leitura anterior baixa: aumentos pequenos em valor absoluto são aceitos
+    assert validate_reading("60", 0.9, 5.0) == (True, None)
+
+
+def test_meter_history_is_updated_in_memory():
+    history = MeterHistory()
+    history._loaded = True
+
+    # Índice carregado: medidor sem histórico não consulta o banco
+    assert history.get(1) is None
+
+    history.record(1, "00100")
+    assert history.get(1) == 100
+    history.record(1, "ilegível")
+    assert history.get(1) == 100
+
+
+def test_meter_history_without_memory_queries_every_time(monkeypatch):
+    history = MeterHistory(in_memory=False)
+    values = iter([100.0, 150.0])
+    monkeypatch.setattr(history, "_load_meter", lambda meter_id: next(values))
+
+    # Outro worker pode ter gravado leituras: nada fica guardado entre consultas
+    history.record(1, "00120")
+    assert history.get(1) == 100.0
+    assert asyncio.run(history.get_async(1)) == 150.0
+    assert history.get_stats()["meters"] == 0
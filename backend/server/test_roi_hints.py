@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Testes das dicas de ROI por medidor (roi_hints.py)
+"""
+import asyncio
+import threading
+
+from roi_hints import RoiHintStore
+
+
+def test_sqlite_tier_runs_off_the_event_loop(tmp_path):
+    db_path = str(tmp_path / "roi_hints.db")
+    store = RoiHintStore(10, db_path)
+    threads = set()
+    store._db.set_trace_callback(lambda statement: threads.add(threading.get_ident()))
+    result = {"box": [100, 50, 300, 150], "confidence": 0.9}
+
+    async def run():
+        await store.update_async(1, result, (1000, 500))
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    assert threads and loop_thread not in threads
+
+    # Outro processo (store novo) encontra a dica na tabela
+    assert asyncio.run(RoiHintStore(10, db_path).get_async(1)) == (0.1, 0.1, 0.3, 0.3)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Testes do escritor único do SQLite (SQLITE_SINGLE_WRITER, dbmodels/database.py)
+"""
+import threading
+import time
+
+import pytest
+from sqlalchemy import Column, Integer, String, func, select, update
+from sqlalchemy.orm import declarative_base
+
+from dbmodels import database
+from dbmodels.database import create_db_engine, create_session_factory
+
+Base = declarative_base()
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+
+@pytest.fixture
+def Session(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'medicoes.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield create_session_factory(engine, single_writer=True)
+    engine.dispose()
+
+
+def test_concurrent_commits_are_serialized(Session):
+    active = []
+    overlaps = []
+    errors = []
+
+    def write(index: int):
+        db = Session()
+        try:
+            db.add(Item(name=f"item {index}"))
+            db.flush()  # Pega o lock do escritor único
+            active.append(index)
+            overlaps.append(len(active))
+            time.sleep(0.01)
+            active.remove(index)
+            db.commit()  # Devolve o lock
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    # Entre o flush e o commit só uma sessão escreve por vez
+    assert overlaps == [1] * 8
+    assert not database._write_lock.locked()
+    db = Session()
+    assert db.scalar(select(func.count()).select_from(Item)) == 8
+    db.close()
+
+
+def test_writer_waits_for_lock_then_times_out(Session, monkeypatch):
+    monkeypatch.setattr(database, "SQLITE_BUSY_TIMEOUT_MS", 50)
+    holder = Session()
+    holder.add(Item(name="primeiro"))
+    holder.flush()
+
+    # UPDATE em massa também passa pelo lock; sem ele, a escrita falha em vez de seguir sem o lock
+    waiting = Session()
+    with pytest.raises(TimeoutError):
+        waiting.execute(update(Item).values(name="outro"))
+    waiting.rollback()
+
+    holder.commit()
+    holder.close()
+    waiting.execute(update(Item).values(name="outro"))
+    waiting.commit()
+    assert waiting.scalar(select(Item.name)) == "outro"
+    waiting.close()
+    assert not database._write_lock.locked()
@@ -1,11 +1,16 @@
 import os
 import numpy as np
-import torch
-from ultralytics import YOLO  # YOLOv8 via ultralytics
 import sys
 from pathlib import Path
-import cv2
-from torchvision.ops import nms
+from obb_nms import rotated_nms
+from model_registry import registry
+from metrics import span
+from app_logging import get_logger
+
+logger = get_logger(__name__)
+
+# torch, torchvision e ultralytics são importados sob demanda (ver model_registry.py
+# e detector_backends.py)
 
 # YOLOv5 imports comentados temporariamente
 ## YOLOv5 path - usando caminho relativo
@@ -21,26 +26,34 @@ from torchvision.ops import nms
 
 # Caminhos para os modelos
 # model_v5_path = os.path.join(os.path.dirname(__file__), "best.pt")  # YOLOv5 model path (comentado)
-model_v8_path = os.path.join(os.path.dirname(__file__), "best-obb.pt")  # YOLOv8 model path
+# O caminho do YOLOv8 (MODEL_V8_PATH) e o carregamento ficam em model_registry.py
 
 # Carregando os modelos
 # model_v5 = DetectMultiBackend(model_v5_path, device=device)  # Comentado
 
-## YOLOv8 apenas
-device = "cuda:0" if torch.cuda.is_available() else "cpu"
-
 ## POCO PENSAR UM MODELO QUE USE OS DOIS JUNTOS
 #model_v5 = YOLO(model_v5_path)  # YOLOv5 model
 
-# Verificar se o modelo YOLOv8 existe
-if os.path.exists(model_v8_path):
-    model_v8 = YOLO(model_v8_path)  # YOLOv8 model
-    print(f"Modelo YOLOv8 carregado com sucesso: {model_v8_path}")
-else:
-    print(f"AVISO: Modelo YOLOv8 não encontrado em: {model_v8_path}")
-    model_v8 = None
+# Pós-processamento das detecções OBB
+CONFIDENCE_THRESHOLD = 0.3
+IOU_THRESHOLD = 0.45
+DISPLAY_CLASS_ID = 10  # Caixa do visor do medidor; as classes 0-9 são os dígitos
+# NMS dos dígitos: "axis" (torchvision, ignora a rotação; comportamento original) ou "rotated"
+# (IoU rotacionado, obb_nms.py). O "rotated" remove mais duplicatas de dígitos inclinados
+# (ver benchmarks/bench_obb_nms.py), mas muda as detecções: é opcional
+OBB_NMS = os.getenv("OBB_NMS", "axis")
+
+# Modo de duas etapas: a primeira passada (imagem inteira reduzida) localiza o
+# visor; a segunda roda só no recorte do visor, em resolução alta
+DETECTION_MODE = os.getenv("DETECTION_MODE", "single")  # "single" ou "two_stage"
+TWO_STAGE_MIN_CONFIDENCE = float(os.getenv("TWO_STAGE_MIN_CONFIDENCE", "0.6"))  # Acima disso, a 2ª passada é pulada
+TWO_STAGE_MARGIN = float(os.getenv("TWO_STAGE_MARGIN", "0.15"))  # Margem em volta do visor, relativa ao maior lado
 
-#print(f"Modelo YOLOv8 carregado com sucesso: {model_v8}")
+# Dica de ROI por medidor (ver roi_hints.py): com a posição do visor na última
+# foto do medidor, a detecção roda primeiro só nessa região, em resolução reduzida
+ROI_IMGSZ = int(os.getenv("ROI_IMGSZ", "320"))  # Entrada do modelo para o recorte (múltiplo de 32)
+ROI_MARGIN = float(os.getenv("ROI_MARGIN", "0.5"))  # Margem em volta do visor da dica (a câmera nunca fica no mesmo lugar)
+ROI_MIN_CONFIDENCE = float(os.getenv("ROI_MIN_CONFIDENCE", "0.6"))  # Abaixo disso, volta para a imagem inteira
 
 
 def run_yolov5(image_np: np.ndarray):
@@ -109,88 +122,199 @@ def run_yolov5(image_np: np.ndarray):
 
 
 def run_yolov8_obb(image_np: np.ndarray):
-    # Verificar se o modelo YOLOv8 está carregado
-    if model_v8 is None:
-        print("AVISO: Modelo YOLOv8 não está disponível. Retornando resultado vazio.")
-        return {
-            "number_detected": "",
-            "confidence": 0.0,
-            "box": None
-        }
-    
+    return run_yolov8_obb_batch([image_np])[0]
+
+
+def run_yolov8_obb_batch(images_np: list, imgsz: int = None, model=registry):
+    """
+    Executa o YOLOv8-OBB em um lote de imagens com uma única chamada a predict.
+
+    Args:
+        images_np (list): Lista de imagens RGB (np.ndarray)
+        imgsz (int): Tamanho de entrada do modelo (padrão: INFERENCE_IMGSZ do backend)
+        model (ModelRegistry): Modelo a usar (padrão: o principal; o shadow usa o seu, ver shadow.py)
+
+    Returns:
+        list: Um resultado (number_detected, confidence, box, model_version) por imagem, na mesma ordem
+    """
+    # Carrega o modelo YOLOv8 no primeiro uso, se ainda não foi carregado no startup
+    backend, version = model.get_active()
+    if backend is None:
+        logger.warning(
+            "Modelo YOLOv8 não está disponível. Retornando resultado vazio.",
+            extra={"sample_key": "model_unavailable"},
+        )
+        return [
+            {
+                "number_detected": "",
+                "confidence": 0.0,
+                "box": None
+            }
+            for _ in images_np
+        ]
+
     try:
-        results = model_v8.predict(source=image_np, conf=0.3, iou=0.4, device=0 if torch.cuda.is_available() else 'cpu')[0]
+        with span("predict"):
+            size = {"imgsz": imgsz} if imgsz else {}
+            outputs = backend.predict(list(images_np), conf=0.3, iou=0.4, **size)
+    except Exception:
+        logger.exception("Erro ao executar YOLOv8", extra={"sample_key": "predict_error"})
+        return [
+            {
+                "number_detected": "",
+                "confidence": 0.0,
+                "box": None
+            }
+            for _ in images_np
+        ]
+
+    with span("postprocess"):
+        results = [postprocess_obb(xywhr_boxes, confidences, labels) for xywhr_boxes, confidences, labels in outputs]
+    for result in results:
+        result["model_version"] = version
+    return results
+
+
+def needs_second_pass(result: dict) -> bool:
+    """
+    A segunda passada só roda quando o visor foi encontrado e a leitura dos dígitos não é confiável.
+    """
+    if result["box"] is None:
+        return False
+    return result["confidence"] is None or result["confidence"] < TWO_STAGE_MIN_CONFIDENCE
 
-        xywhr_boxes = results.obb.xywhr.cpu().numpy()
-        confidences = results.obb.conf.cpu().numpy()
-        labels = results.obb.cls.cpu().numpy()
-    except Exception as e:
-        print(f"Erro ao executar YOLOv8: {e}")
-        return {
-            "number_detected": "",
-            "confidence": 0.0,
-            "box": None
-        }
 
-    # Converter (x_center, y_center, w, h, rotation) → (x1, y1, x2, y2) para NMS
-    boxes_xyxy = []
-    valid_indices = []
-
-    for i, (box, conf) in enumerate(zip(xywhr_boxes, confidences)):
-        if conf < 0.3:  # CONFIDENCE_THRESHOLD
-            continue
-
-        x_c, y_c, w, h, _ = box
-        x1 = x_c - w / 2
-        y1 = y_c - h / 2
-        x2 = x_c + w / 2
-        y2 = y_c + h / 2
-        boxes_xyxy.append([x1, y1, x2, y2])
-        valid_indices.append(i)
-
-    if not boxes_xyxy:
+def display_region(box: list, image_size: tuple, margin: float = TWO_STAGE_MARGIN) -> tuple:
+    """
+    Região (left, top, right, bottom) do recorte da segunda passada: a caixa do visor com margem.
+    """
+    width, height = image_size
+    x1, y1, x2, y2 = box
+    pad = margin * max(x2 - x1, y2 - y1)
+    return max(0.0, x1 - pad), max(0.0, y1 - pad), min(float(width), x2 + pad), min(float(height), y2 + pad)
+
+
+def roi_region(hint: tuple, image_size: tuple) -> tuple:
+    """
+    Região (left, top, right, bottom) a recortar a partir da dica do medidor.
+
+    Args:
+        hint (tuple): Caixa do visor na última foto, em frações da largura e da altura
+        image_size (tuple): (largura, altura) da foto atual
+    """
+    width, height = image_size
+    box = [hint[0] * width, hint[1] * height, hint[2] * width, hint[3] * height]
+    return display_region(box, image_size, ROI_MARGIN)
+
+
+def accept_roi(result: dict) -> bool:
+    """
+    A leitura do recorte é aceita se o visor foi encontrado e os dígitos são confiáveis.
+    """
+    return result["box"] is not None and result["confidence"] is not None and result["confidence"] >= ROI_MIN_CONFIDENCE
+
+
+def map_box(box: list, offset: tuple, scale: float) -> list:
+    """
+    Leva uma caixa (x1, y1, x2, y2) de um recorte para as coordenadas da imagem original.
+    """
+    x1, y1, x2, y2 = box
+    return [x1 * scale + offset[0], y1 * scale + offset[1], x2 * scale + offset[0], y2 * scale + offset[1]]
+
+
+def merge_second_pass(first: dict, second: dict, offset: tuple, scale: float) -> dict:
+    """
+    Escolhe entre a primeira e a segunda passada, levando a caixa do recorte para a imagem original.
+
+    A leitura do recorte só substitui a da primeira passada se tiver maior confiança.
+
+    Args:
+        first (dict): Resultado da primeira passada (caixa em coordenadas da imagem original)
+        second (dict): Resultado no recorte
+        offset (tuple): Canto superior esquerdo do recorte na imagem original
+        scale (float): Pixels da imagem original por pixel do recorte
+    """
+    if second["confidence"] is None or (
+        first["confidence"] is not None and second["confidence"] <= first["confidence"]
+    ):
+        return first
+
+    box = first["box"]
+    if second["box"] is not None:
+        box = map_box(second["box"], offset, scale)
+    return {
+        "number_detected": second["number_detected"],
+        "confidence": second["confidence"],
+        "box": box,
+        "model_version": second.get("model_version"),
+    }
+
+
+def postprocess_obb(xywhr_boxes: np.ndarray, confidences: np.ndarray, labels: np.ndarray):
+    """
+    Filtra, aplica NMS e monta o número lido a partir das caixas OBB de uma imagem.
+
+    Todo o processamento é feito sobre arrays, sem criar objetos por caixa.
+
+    Args:
+        xywhr_boxes (np.ndarray): Caixas (N, 5) no formato (x_c, y_c, w, h, rotação)
+        confidences (np.ndarray): Confianças (N,)
+        labels (np.ndarray): Classes (N,)
+
+    Returns:
+        dict: number_detected, confidence (média dos dígitos) e box do visor (x1, y1, x2, y2)
+    """
+    # Filtro de confiança por máscara
+    mask = confidences >= CONFIDENCE_THRESHOLD
+    if not mask.any():
         return {
             "number_detected": "",
             "confidence": None,
             "box": None
         }
+    xywhr_boxes = xywhr_boxes[mask]
+    confidences = np.ascontiguousarray(confidences[mask], dtype=np.float32)
+    labels = labels[mask].astype(np.int64)
 
-    boxes_tensor = torch.tensor(boxes_xyxy, device=device)
-    scores_tensor = torch.tensor([confidences[i] for i in valid_indices], device=device)
-
-    # Aplicar NMS usando torchvision.ops.nms
-    keep_indices = nms(boxes_tensor, scores_tensor, 0.45)  # IOU_THRESHOLD
-    keep_indices = keep_indices.cpu().numpy()
-
-    digits = []
-    all_confidences = []
-    box_coords = None
-
-    for idx in keep_indices:
-        i = valid_indices[idx]
-        x_c, y_c, w, h, angle = xywhr_boxes[i]
-        class_id = int(labels[i])
-        conf = float(confidences[i])
-
-        if class_id == 10:
-            x1 = x_c - w / 2
-            y1 = y_c - h / 2
-            x2 = x_c + w / 2
-            y2 = y_c + h / 2
-            box_coords = [x1, y1, x2, y2]
-        else:
-            digits.append((x_c, str(class_id)))
-            all_confidences.append(conf)
+    # Converter (x_center, y_center, w, h, rotation) → (x1, y1, x2, y2) para NMS
+    half_sizes = xywhr_boxes[:, 2:4] / 2
+    boxes_xyxy = np.concatenate(
+        (xywhr_boxes[:, 0:2] - half_sizes, xywhr_boxes[:, 0:2] + half_sizes), axis=1
+    ).astype(np.float32)
+
+    # Aplicar NMS (índices em ordem decrescente de confiança)
+    if OBB_NMS == "rotated":
+        keep = rotated_nms(xywhr_boxes, confidences, IOU_THRESHOLD)
+    else:
+        import torch
+        from torchvision.ops import nms
+
+        keep = nms(
+            torch.from_numpy(boxes_xyxy),
+            torch.from_numpy(confidences),
+            IOU_THRESHOLD,
+        ).cpu().numpy()
+    boxes_xyxy = boxes_xyxy[keep]
+    x_centers = xywhr_boxes[keep, 0]
+    confidences = confidences[keep]
+    labels = labels[keep]
+
+    # Separa a caixa do visor (classe 10) dos dígitos; fica a de maior confiança
+    is_display = labels == DISPLAY_CLASS_ID
+    display_boxes = boxes_xyxy[is_display]
+    box_coords = display_boxes[0] if len(display_boxes) else None
 
     # Ordena os dígitos por posição x
-    digits.sort()
-    number_detected = ''.join([d[1] for d in digits])
-    avg_conf = sum(all_confidences) / len(all_confidences) if all_confidences else None
+    is_digit = ~is_display
+    order = np.argsort(x_centers[is_digit], kind="stable")
+    digit_labels = labels[is_digit][order]
+    number_detected = (digit_labels + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+    avg_conf = confidences[is_digit].mean() if is_digit.any() else None
 
     return {
         "number_detected": number_detected,
         "confidence": float(avg_conf) if avg_conf is not None else None,
-        "box": [float(x) for x in box_coords] if box_coords is not None else None
+        "box": box_coords.astype(float).tolist() if box_coords is not None else None
     }
  
 
@@ -0,0 +1,62 @@
+"""
+Conjunto de fotos rotuladas para medir a acurácia do detector.
+
+Um conjunto de validação é um diretório de fotos de medidores com a leitura
+esperada de cada uma, em um destes formatos:
+
+- labels.json no diretório, com {arquivo: leitura} (ex.: {"foto_001.jpg": "01234"});
+- sem labels.json, a leitura no prefixo do nome do arquivo (01234_foto.jpg).
+
+É usado na verificação de acurácia do modelo INT8 (quantization.py) e nos
+benchmarks (benchmarks/fixtures.py gera um conjunto sintético nesse formato).
+"""
+import json
+import os
+
+LABELS_FILE = "labels.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def load_labeled_photos(directory: str) -> list:
+    """
+    Lê um diretório de fotos rotuladas: labels.json ou, na falta dele, a leitura no prefixo do nome (12345_foto.jpg).
+
+    Returns:
+        list: Pares (caminho, leitura esperada); vazia se o diretório não existir
+    """
+    if not os.path.isdir(directory):
+        return []
+    labels_path = os.path.join(directory, LABELS_FILE)
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+    else:
+        labels = {
+            name: name.split("_")[0]
+            for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS) and name.split("_")[0].isdigit()
+        }
+    return [(os.path.join(directory, name), label) for name, label in sorted(labels.items())]
+
+
+def edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def accuracy(predictions: list, labels: list) -> dict:
+    """
+    Acurácia da leitura inteira e por dígito (1 - distância de edição / dígitos esperados).
+    """
+    exact = sum(p == l for p, l in zip(predictions, labels))
+    errors = sum(edit_distance(p, l) for p, l in zip(predictions, labels))
+    digits = sum(len(l) for l in labels)
+    return {
+        "exact_match": exact / len(labels),
+        "digit_accuracy": max(0.0, 1 - errors / digits),
+    }